@@ -0,0 +1,40 @@
+# app_cache.py
+import hashlib
+import os
+import streamlit as st
+from data_loader import load_demand_data
+from data_preprocessor import build_monthly_series
+from forecast_store import STORE_ENV_VAR
+from model_selector import select_best_model
+
+# La aplicación guarda los modelos ganadores en disco para reutilizarlos tras un
+# reinicio o en otros procesos; la variable de entorno permite cambiar la ruta
+os.environ.setdefault(STORE_ENV_VAR, os.path.join('.proyekta_cache', 'forecasts.sqlite'))
+
+# Horizontes ofrecidos en la aplicación; cada uno se valida con sus propios últimos meses
+HORIZONS = (3, 6, 12)
+
+# Entradas máximas por caché; Streamlit descarta la menos usada recientemente al superarlas
+MAX_CACHED_FILES = 8
+MAX_CACHED_SELECTIONS = 32
+
+def file_hash(file_bytes):
+    """Huella SHA-256 del contenido del archivo subido; es la clave de todas las cachés."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+# Los parámetros con guion bajo no se usan como clave: el contenido ya está
+# identificado por content_hash y así se evita volver a hashear los datos.
+@st.cache_data(max_entries=MAX_CACHED_FILES, show_spinner=False)
+def load_upload(content_hash, file_name, _file_bytes):
+    """Lee el archivo subido (Excel, CSV o Parquet) una sola vez por contenido."""
+    return load_demand_data(_file_bytes, name=file_name)
+
+@st.cache_data(max_entries=MAX_CACHED_FILES, show_spinner=False)
+def load_monthly_series(content_hash, sector, _data):
+    """Preprocesa los datos de un archivo y sector una sola vez."""
+    return build_monthly_series(_data, sector=sector)
+
+@st.cache_data(max_entries=MAX_CACHED_SELECTIONS, show_spinner=False)
+def run_model_selection(content_hash, sector, horizon, _monthly_series):
+    """Ejecuta la selección de modelos una sola vez por archivo, sector y horizonte."""
+    return select_best_model(_monthly_series, horizon, sector=sector)
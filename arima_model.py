@@ -2,113 +2,292 @@ import pandas as pd
 import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from sklearn.metrics import mean_absolute_percentage_error
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+from data_preprocessor import build_monthly_series
+from smoothing import DEFAULT_ALPHAS, find_best_alpha, smooth_series
+from forecast_store import data_fingerprint, default_store, leaderboard
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+import warnings
+from functools import partial
+from order_search import nearest_candidate, search_orders, warm_start_params
+from multi_horizon import best_per_horizon, future_dates, normalize_horizons, split_for_horizons
+from kalman_arima import evaluate_arima_candidates
+from forecast_result import ForecastResult
+import telemetry
+import time
 
-def preprocess_arima_data(data):
+# Motores de ajuste: statsmodels (un modelo por candidato) o el filtro de Kalman por lotes de kalman_arima.
+# kalman_arima no tiene parte estacional: SARIMA se ajusta solo con statsmodels (sarima_model.BACKENDS)
+BACKENDS = ('statsmodels', 'kalman')
+
+def arima_grid():
     """
-    Preprocesar los datos cargados, filtrando por sector privado
-    y resampleando mensualmente.
+    Construye la grilla de órdenes (p, d, q) evaluados por ARIMA, en el mismo
+    orden en que se recorren durante la búsqueda.
     """
-    data['FECHA'] = pd.to_datetime(data['FECHA'], errors='coerce')
-    data = data.dropna(subset=['FECHA'])
-    data = data.set_index('FECHA')
-    data_privado = data[data['SECTOR'] == 'PRIVADO']
-    
-    # Resamplear datos mensuales
-    data_resampled = data_privado[['CANTIDAD']].resample('MS').sum()
-    
-    # Manejo de valores negativos o nulos
-    data_resampled['CANTIDAD'] = data_resampled['CANTIDAD'].clip(lower=0).fillna(0)
-    
-    return data_resampled
+    # Rango de búsqueda para p, d, q
+    p_values = range(0, 3)
+    d_values = range(0, 2)
+    q_values = range(0, 3)
 
-def find_best_alpha(data):
+    return [(p, d, q) for p in p_values for d in d_values for q in q_values]
+
+def _differencing_order(order):
+    """Orden de diferenciación d de un candidato; la búsqueda stepwise no los mezcla."""
+    return order[1]
+
+def fit_arima_candidate(train, test, order, maxiter=None, start_from=None):
     """
-    Encuentra el mejor valor de alpha para la suavización exponencial
-    basado en el MAPE más bajo.
+    Ajusta un candidato ARIMA sobre el conjunto de entrenamiento y lo evalúa
+    contra el conjunto de prueba.
+    Args:
+        train (pd.Series): Serie de entrenamiento.
+        test (pd.Series): Serie de prueba.
+        order (tuple): Orden (p, d, q).
+        maxiter (int): Límite de iteraciones del optimizador para ajustes baratos
+            (None = ajuste completo).
+        start_from (tuple): (param_names, params) de un vecino ya ajustado desde el
+            cual arrancar el optimizador (None = parámetros iniciales por defecto).
+    Returns:
+        dict: 'mape', 'aic', 'forecast' (proyección sobre el periodo de prueba),
+            'params' y 'param_names' (parámetros ajustados) e 'iterations'
+            (iteraciones del optimizador), o None si el ajuste falla (el motivo
+            queda registrado en telemetry).
     """
-    alphas = np.linspace(0.01, 1.0, 10)
-    best_alpha = None
-    best_mape = float('inf')
+    start = time.perf_counter()
+    try:
+        arima = ARIMA(train, order=order)
+        start_params = None if start_from is None else warm_start_params(arima.param_names, start_from)
+        if maxiter is None:
+            model = arima.fit(start_params=start_params)
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', ConvergenceWarning)
+                model = arima.fit(start_params=start_params, method_kwargs={'maxiter': maxiter})
+        forecast = model.forecast(steps=len(test))
+        mape = mean_absolute_percentage_error(test, forecast)
+    except Exception as e:
+        telemetry.record_fit('ARIMA', order, time.perf_counter() - start, status='failed',
+                             reason=type(e).__name__, error=str(e),
+                             proxy=maxiter is not None, warm_start=start_from is not None)
+        return None
 
-    for alpha in alphas:
-        model = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=alpha, optimized=False)
-        fitted_values = model.fittedvalues
-        mape = mean_absolute_percentage_error(data['CANTIDAD'], fitted_values)
-        if mape < best_mape:
-            best_mape = mape
-            best_alpha = alpha
+    iterations = model.mle_retvals.get('iterations') if model.mle_retvals else None
+    telemetry.record_fit('ARIMA', order, time.perf_counter() - start, iterations=iterations, mape=mape,
+                         aic=model.aic, proxy=maxiter is not None, warm_start=start_from is not None)
+    # Solo arreglos planos: el modelo ajustado se libera al salir de la función
+    return {
+        'mape': mape,
+        'aic': model.aic,
+        'forecast': np.asarray(forecast),
+        'params': np.asarray(model.params),
+        'param_names': list(arima.param_names),
+        'iterations': iterations,
+    }
 
-    return best_alpha
+def evaluate_arima_grid(train, test, candidates, maxiter=None, warm_start=False):
+    """
+    Evalúa secuencialmente los órdenes ARIMA indicados. Con warm_start cada ajuste
+    parte de los parámetros del orden ya ajustado más cercano.
+    Returns:
+        list: Resultados de fit_arima_candidate, alineados con `candidates`.
+    """
+    results = []
+    fitted = {}
+    for order in candidates:
+        start_from = None
+        if warm_start and fitted:
+            start_from = fitted[nearest_candidate(order, fitted, _differencing_order)]
+        result = fit_arima_candidate(train, test, order, maxiter, start_from)
+        if result is not None:
+            fitted[order] = (result['param_names'], result['params'])
+        results.append(result)
+    return results
+
+def evaluate_arima_grid_kalman(train, test, candidates, maxiter=None, warm_start=False):
+    """
+    Igual que evaluate_arima_grid, pero ajusta todos los candidatos en un solo lote con
+    kalman_arima. warm_start se ignora: el lote completo parte de los mismos valores iniciales.
+    """
+    start = time.perf_counter()
+    results = evaluate_arima_candidates(np.asarray(train, dtype=float), np.asarray(test, dtype=float), candidates, maxiter)
+
+    # El lote se ajusta de una vez: a cada candidato se le atribuye una parte igual del tiempo
+    share = (time.perf_counter() - start) / max(len(candidates), 1)
+    for order, result in zip(candidates, results):
+        if result is None:
+            telemetry.record_fit('ARIMA', order, share, status='failed', reason='InvalidLikelihood',
+                                 proxy=maxiter is not None)
+        else:
+            telemetry.record_fit('ARIMA', order, share, iterations=result['iterations'], mape=result['mape'],
+                                 aic=result['aic'], proxy=maxiter is not None)
+    return results
 
-def arima_forecast(data, horizon):
+def restore_arima_model(train, order, params):
+    """
+    Reconstruye un modelo ARIMA a partir de parámetros ya ajustados, sin volver
+    a optimizar (arranque en caliente desde el almacén persistente).
+    """
+    return ARIMA(train, order=order).filter(np.asarray(params, dtype=float))
+
+def arima_forecast(data, horizon, search='exhaustive', search_options=None, store=None, orders=None, alpha=None,
+                   backend='statsmodels', return_params=False):
     """
     Realiza proyecciones ARIMA en base a los datos proporcionados.
     Devuelve la proyección, las fechas proyectadas y el MAPE asociado.
+    `search` elige la estrategia de order_search ('exhaustive', 'aic_topk',
+    'stepwise', 'halving' o 'warm_start') y `search_options` sus parámetros. Con un
+    ForecastStore (o PROYEKTA_FORECAST_STORE definido) se reutiliza el modelo
+    ganador de una búsqueda anterior sobre la misma serie. `orders` reemplaza la
+    grilla de órdenes y `alpha` fija el nivel de suavización en vez de buscarlo.
+    `backend` elige el motor de ajuste: 'statsmodels' o 'kalman' (kalman_arima, que
+    ajusta todos los candidatos de la búsqueda en un solo lote). Con return_params se
+    agrega al final de la tupla el vector de parámetros del ganador.
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor ARIMA desconocido: {backend}. Opciones: {', '.join(BACKENDS)}")
+    candidates = arima_grid() if orders is None else [tuple(order) for order in orders]
+    alphas = DEFAULT_ALPHAS if alpha is None else [alpha]
+
+    # Consultar el almacén persistente antes de buscar
+    store = store or default_store()
+    cached = None
+    if store is not None:
+        fingerprint = data_fingerprint(data)
+        search_space = {'grid': candidates, 'search': search, 'options': search_options, 'alphas': alphas}
+        if backend != 'statsmodels':
+            search_space['backend'] = backend
+        key = store.make_key('ARIMA', fingerprint, horizon, search_space)
+        with telemetry.span('store_lookup', 'ARIMA'):
+            cached = store.get(key)
+
     # Suavización exponencial
-    best_alpha = find_best_alpha(data)
-    data['CANTIDAD_SUAVIZADA'] = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=best_alpha, optimized=False).fittedvalues
+    with telemetry.span('alpha_search', 'ARIMA'):
+        best_alpha = cached['alpha'] if cached else find_best_alpha(data, alphas=alphas)
+    data['CANTIDAD_SUAVIZADA'] = smooth_series(data['CANTIDAD'], best_alpha)
 
     # División en conjunto de entrenamiento y prueba
     train = data['CANTIDAD_SUAVIZADA'].iloc[:-horizon]
     test = data['CANTIDAD_SUAVIZADA'].iloc[-horizon:]
 
-    # Optimización de parámetros ARIMA
-    best_mape = float('inf')
-    best_order = None
-    best_model = None
+    if cached:
+        # Arranque en caliente: sin búsqueda, con los parámetros guardados del ganador
+        best_order = tuple(cached['order'])
+        best_params = np.asarray(cached['params'], dtype=float)
+        with telemetry.span('restore', 'ARIMA'):
+            best_forecast = np.asarray(restore_arima_model(train, best_order, best_params).forecast(steps=horizon))
+        best_mape = cached['mape']
+    else:
+        # Optimización de parámetros ARIMA
+        evaluate_grid = evaluate_arima_grid if backend == 'statsmodels' else evaluate_arima_grid_kalman
+        evaluate = partial(evaluate_grid, train, test)
+        options = {'group_key': _differencing_order, 'start': (2, 0, 2)}
+        options.update(search_options or {})
+        with telemetry.span('grid_search', 'ARIMA'):
+            search_result = search_orders(candidates, evaluate, strategy=search, **options)
 
-    # Rango de búsqueda para p, d, q
-    p_values = range(0, 3)
-    d_values = range(0, 2)
-    q_values = range(0, 3)
+        if search_result['best'] is None:
+            raise ValueError("Ningún candidato ARIMA pudo ajustarse a los datos.")
 
-    for p in p_values:
-        for d in d_values:
-            for q in q_values:
-                try:
-                    model = ARIMA(train, order=(p, d, q)).fit()
-                    forecast = model.forecast(steps=horizon)
-                    mape = mean_absolute_percentage_error(test, forecast)
-
-                    if mape < best_mape:
-                        best_mape = mape
-                        best_order = (p, d, q)
-                        best_model = model
-                except:
-                    continue
+        best_order = candidates[search_result['best']]
+        best_result = search_result['results'][search_result['best']]
+        best_mape = best_result['mape']
+        best_forecast = best_result['forecast']
+        best_params = best_result['params']
+
+        if store is not None:
+            with telemetry.span('store_save', 'ARIMA'):
+                store.put(key, 'ARIMA', fingerprint, horizon, {
+                    'alpha': best_alpha,
+                    'order': best_order,
+                    'params': best_params,
+                    'mape': best_mape,
+                    'leaderboard': leaderboard(candidates, search_result),
+                })
+
+        # Los candidatos descartados se liberan de inmediato; solo queda el ganador
+        del search_result, best_result
 
     # Generar la proyección futura
-    forecast = best_model.forecast(steps=horizon)
-    forecast = np.maximum(forecast, 0)  # Establecer valores negativos en 0
-    forecast_dates = pd.date_range(start=data.index[-1] + pd.DateOffset(months=1), periods=horizon, freq='M')
+    forecast = np.maximum(best_forecast, 0)  # Establecer valores negativos en 0
+    forecast_dates = future_dates(data.index, horizon)
 
+    if return_params:
+        return forecast, forecast_dates, best_order, best_mape, best_params
     return forecast, forecast_dates, best_order, best_mape
 
-def run_arima_projection(data, horizon=3):
+def arima_forecast_horizons(data, horizons, search='exhaustive', search_options=None, orders=None, alpha=None,
+                            backend='statsmodels'):
+    """
+    Proyecciones ARIMA para varios horizontes con una sola búsqueda: cada candidato
+    se ajusta una vez sobre la división del horizonte más largo y se elige el
+    ganador de cada horizonte con el MAPE de los primeros h meses (ver multi_horizon).
+    Las estrategias no exhaustivas guían la búsqueda con el horizonte más largo.
+    Returns:
+        dict: Horizonte -> (proyección, fechas, mejor orden, MAPE), como arima_forecast.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor ARIMA desconocido: {backend}. Opciones: {', '.join(BACKENDS)}")
+    horizons = normalize_horizons(horizons)
+    candidates = arima_grid() if orders is None else [tuple(order) for order in orders]
+    alphas = DEFAULT_ALPHAS if alpha is None else [alpha]
+
+    with telemetry.span('alpha_search', 'ARIMA'):
+        best_alpha = find_best_alpha(data, alphas=alphas)
+    data['CANTIDAD_SUAVIZADA'] = smooth_series(data['CANTIDAD'], best_alpha)
+    train, test = split_for_horizons(data['CANTIDAD_SUAVIZADA'], horizons)
+
+    evaluate_grid = evaluate_arima_grid if backend == 'statsmodels' else evaluate_arima_grid_kalman
+    evaluate = partial(evaluate_grid, train, test)
+    options = {'group_key': _differencing_order, 'start': (2, 0, 2)}
+    options.update(search_options or {})
+    with telemetry.span('grid_search', 'ARIMA'):
+        search_result = search_orders(candidates, evaluate, strategy=search, **options)
+
+    winners = best_per_horizon(search_result['results'], test, horizons)
+    if not winners:
+        raise ValueError("Ningún candidato ARIMA pudo ajustarse a los datos.")
+
+    projections = {}
+    for h, (index, mape) in winners.items():
+        forecast = np.maximum(np.asarray(search_result['results'][index]['forecast'])[:h], 0)
+        projections[h] = (forecast, future_dates(data.index, h), candidates[index], mape)
+    return projections
+
+def run_arima_projection(data, horizon=3, search='exhaustive', search_options=None, store=None, backend='statsmodels'):
     """
     Función principal para ejecutar ARIMA sobre un conjunto de datos.
-    Devuelve las proyecciones y las métricas asociadas.
+    Devuelve un ForecastResult con las proyecciones, las métricas asociadas y los
+    parámetros del modelo ganador. Acepta los datos crudos o una MonthlySeries ya preparada.
     """
-    data_processed = preprocess_arima_data(data)  # Usar la nueva función de preprocesamiento
+    with telemetry.span('preprocess', 'ARIMA'):
+        data_processed = build_monthly_series(data).frame()  # Serie mensual compartida entre modelos
 
     # Validar que haya suficientes datos para realizar la proyección
     if len(data_processed) < horizon + 1:
         raise ValueError("Datos insuficientes para realizar la proyección ARIMA.")
 
-    forecast, forecast_dates, best_order, mape = arima_forecast(data_processed, horizon)
+    forecast, forecast_dates, best_order, mape, params = arima_forecast(
+        data_processed, horizon, search=search, search_options=search_options, store=store, backend=backend,
+        return_params=True
+    )
+
+    # Resultado compacto; la tabla de resultados se construye al consultarla
+    return ForecastResult('ARIMA', forecast, forecast_dates, mape, (best_order,), params)
 
-    # Crear tabla con los resultados
-    results_table = pd.DataFrame({
-        'Fecha': forecast_dates,
-        'Proyección (m³)': forecast
-    })
+def run_arima_projection_horizons(data, horizons=(3, 6, 12), search='exhaustive', search_options=None):
+    """
+    Ejecuta ARIMA para varios horizontes con una sola búsqueda.
+    Returns:
+        dict: Horizonte -> resultados con el mismo formato que run_arima_projection.
+    """
+    with telemetry.span('preprocess', 'ARIMA'):
+        data_processed = build_monthly_series(data).frame()
+
+    if len(data_processed) < max(horizons) + 1:
+        raise ValueError("Datos insuficientes para realizar la proyección ARIMA.")
 
+    projections = arima_forecast_horizons(data_processed, horizons, search=search, search_options=search_options)
     return {
-        "forecast": forecast,
-        "forecast_dates": forecast_dates,
-        "best_order": best_order,
-        "mape": mape,
-        "results_table": results_table
+        h: ForecastResult('ARIMA', forecast, forecast_dates, mape, (best_order,))
+        for h, (forecast, forecast_dates, best_order, mape) in projections.items()
     }
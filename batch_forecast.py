@@ -0,0 +1,197 @@
+# batch_forecast.py
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from data_preprocessor import exact_sums
+
+# Funciones de proyección disponibles: nombre -> (módulo, función). Se importan
+# recién en el proceso que las usa para no cargar modelos innecesarios.
+FORECASTERS = {
+    'ARIMA': ('arima_model', 'arima_forecast'),
+    'SARIMA': ('sarima_model', 'sarima_forecast'),
+    'Linear Projection': ('linear_projection', 'linear_forecast'),
+}
+
+RESULT_COLUMNS = ['Fecha', 'Proyección (m³)', 'Orden', 'MAPE', 'Estado']
+
+def monthly_by_group(data, group_by=('MATERIAL',), sector=None, resample_frequency='MS'):
+    """
+    Agrega los datos crudos a series mensuales por grupo con un único groupby.
+    Args:
+        data (pd.DataFrame): Datos en formato largo con 'FECHA', 'CANTIDAD' y las columnas de agrupación.
+        group_by (tuple): Columnas que definen cada serie (por ejemplo ('MATERIAL',) o ('SECTOR', 'MATERIAL')).
+        sector (str): Si se indica, filtra ese sector antes de agrupar.
+        resample_frequency (str): Frecuencia de las series ('MS' o 'M').
+    Returns:
+        dict: Clave del grupo (tupla) -> pd.DataFrame con la columna 'CANTIDAD' indexada por fecha,
+            en el orden en que aparece cada grupo en los datos.
+    """
+    group_by = list(group_by)
+    data = data[group_by + ['FECHA', 'CANTIDAD'] + (['SECTOR'] if sector and 'SECTOR' not in group_by else [])]
+    data = data.assign(FECHA=pd.to_datetime(data['FECHA'], errors='coerce')).dropna(subset=['FECHA'])
+    if sector is not None:
+        data = data[data['SECTOR'] == sector]
+
+    # groupby descarta las filas con algún nivel vacío (NaN): tampoco forman una serie
+    order = [key for key in pd.unique(pd.MultiIndex.from_frame(data[group_by])) if not any(pd.isna(value) for value in key)]
+    # Con la misma suma exacta que preprocess_data los totales no dependen del orden de las filas
+    grouped = data.groupby(group_by + [pd.Grouper(key='FECHA', freq=resample_frequency)], observed=True)['CANTIDAD']
+    sums = exact_sums(grouped, data['CANTIDAD'].to_numpy(dtype=float))
+    levels = list(range(len(group_by)))
+    groups = {
+        key if isinstance(key, tuple) else (key,): group.droplevel(levels)
+        for key, group in sums.groupby(level=levels[0] if len(levels) == 1 else levels, observed=True)
+    }
+
+    series = {}
+    for key in order:
+        group = groups[key].sort_index()
+        # Igual que resample(): los meses sin movimientos quedan en cero
+        index = pd.date_range(group.index.min(), group.index.max(), freq=resample_frequency)
+        monthly = group.reindex(index, fill_value=0).clip(lower=0).to_frame('CANTIDAD')
+        monthly.index.name = 'FECHA'
+        series[key] = monthly
+    return series
+
+def _forecast_group(monthly, horizon, model, forecast_options, min_months):
+    """Proyecta una serie; se ejecuta dentro de los procesos del pool."""
+    if len(monthly) < max(min_months, horizon + 1):
+        return None, 'Datos insuficientes'
+
+    module_name, function_name = FORECASTERS[model]
+    forecast_function = getattr(importlib.import_module(module_name), function_name)
+    try:
+        result = forecast_function(monthly, horizon, **forecast_options)
+    except Exception as e:
+        return None, f"Error: {e}"
+
+    # Todas las funciones devuelven (proyección, fechas, ..., MAPE); lo intermedio son los órdenes
+    forecast, forecast_dates, orders, mape = result[0], result[1], result[2:-1], result[-1]
+    return {
+        'Fecha': forecast_dates,
+        'Proyección (m³)': np.asarray(forecast, dtype=float),
+        'Orden': ' x '.join(str(order) for order in orders),
+        'MAPE': mape,
+    }, 'OK'
+
+def _batch_forecaster(model, forecast_options):
+    """
+    Función vectorizada (matriz de series, horizonte) -> dict con 'forecast' y 'mape'
+    para proyectar todos los grupos juntos, o None si el modelo se proyecta serie a serie.
+    """
+    if model == 'Linear Projection' and not forecast_options:
+        from linear_projection import batch_linear_forecast
+        return batch_linear_forecast
+    if model == 'ARIMA' and forecast_options == {'backend': 'kalman'}:
+        from functools import partial
+        from arima_model import arima_grid
+        from kalman_arima import batch_arima_forecast
+        return partial(batch_arima_forecast, orders=arima_grid())
+    return None
+
+def _forecast_stacked_groups(series, horizon, min_months, batch_function):
+    """
+    Proyección de todos los grupos con una función vectorizada (ver _batch_forecaster):
+    las series del mismo largo se apilan en una matriz y se resuelven juntas.
+    Returns:
+        list: (resultado, estado) por serie, como _forecast_group.
+    """
+    from multi_horizon import future_dates
+
+    outcomes = [(None, 'Datos insuficientes')] * len(series)
+    by_length = {}
+    for position, monthly in enumerate(series):
+        if len(monthly) >= max(min_months, horizon + 1):
+            by_length.setdefault(len(monthly), []).append(position)
+
+    for positions in by_length.values():
+        values = np.vstack([series[position]['CANTIDAD'].to_numpy(dtype=float) for position in positions])
+        try:
+            batch = batch_function(values, horizon)
+        except Exception as e:
+            for position in positions:
+                outcomes[position] = (None, f"Error: {e}")
+            continue
+        for row, position in enumerate(positions):
+            order = batch['order'][row] if 'order' in batch else ()
+            if order is None:
+                outcomes[position] = (None, "Error: ningún candidato pudo ajustarse")
+                continue
+            outcomes[position] = ({
+                'Fecha': future_dates(series[position].index, horizon),
+                'Proyección (m³)': batch['forecast'][row],
+                'Orden': str(order) if order else '',
+                'MAPE': batch['mape'][row],
+            }, 'OK')
+    return outcomes
+
+def forecast_series(series, horizon, model='ARIMA', forecast_options=None, n_jobs=1, min_months=6):
+    """
+    Proyecta una lista de series mensuales, en lote vectorizado o en paralelo.
+    Args:
+        series (list): pd.DataFrame con la columna 'CANTIDAD' indexada por fecha.
+        Los demás argumentos son los de forecast_groups.
+    Returns:
+        list: (resultado, estado) por serie; el resultado es None si la serie no se proyectó
+            y en otro caso un diccionario con 'Fecha', 'Proyección (m³)', 'Orden' y 'MAPE'.
+    """
+    if model not in FORECASTERS:
+        raise ValueError(f"Modelo desconocido: {model}. Opciones: {', '.join(FORECASTERS)}")
+
+    arguments = (series, repeat(horizon), repeat(model), repeat(forecast_options or {}), repeat(min_months))
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    batch_function = _batch_forecaster(model, forecast_options or {})
+    if batch_function is not None:
+        # Todas las series se resuelven en operaciones vectorizadas; no hace falta el pool
+        return _forecast_stacked_groups(series, horizon, min_months, batch_function)
+    if n_jobs <= 1 or len(series) <= 1:
+        return list(map(_forecast_group, *arguments))
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(series))) as executor:
+        chunk_size = max(1, len(series) // (n_jobs * 4))
+        return list(executor.map(_forecast_group, *arguments, chunksize=chunk_size))
+
+def forecast_groups(data, horizon=3, group_by=('MATERIAL',), sector=None, model='ARIMA',
+                    forecast_options=None, n_jobs=1, min_months=6, resample_frequency='MS'):
+    """
+    Proyecta en lote cada grupo (material, o sector y material) de un DataFrame en formato largo.
+    Args:
+        data (pd.DataFrame): Datos crudos con 'FECHA', 'CANTIDAD' y las columnas de agrupación.
+        horizon (int): Horizonte de proyección (número de meses).
+        group_by (tuple): Columnas que definen cada serie.
+        sector (str): Sector a filtrar antes de agrupar (None = todos).
+        model (str): 'ARIMA', 'SARIMA' o 'Linear Projection'.
+        forecast_options (dict): Argumentos adicionales para la función de proyección. La
+            Proyección Lineal sin opciones y ARIMA con {'backend': 'kalman'} proyectan todos
+            los grupos juntos en operaciones vectorizadas.
+        n_jobs (int): Número de procesos (1 = secuencial, -1 o None = todos los núcleos).
+        min_months (int): Meses mínimos para proyectar un grupo.
+        resample_frequency (str): Frecuencia de las series ('MS' o 'M').
+    Returns:
+        pd.DataFrame: Una fila por grupo y fecha proyectada con 'Fecha', 'Proyección (m³)',
+            'Orden', 'MAPE' y 'Estado'; los grupos omitidos aparecen en una fila sin proyección.
+    """
+    if model not in FORECASTERS:
+        raise ValueError(f"Modelo desconocido: {model}. Opciones: {', '.join(FORECASTERS)}")
+
+    group_by = list(group_by)
+    series = monthly_by_group(data, group_by, sector=sector, resample_frequency=resample_frequency)
+    keys = list(series)
+    outcomes = forecast_series([series[key] for key in keys], horizon, model, forecast_options, n_jobs, min_months)
+
+    frames = []
+    for key, (result, status) in zip(keys, outcomes):
+        if result is None:
+            frame = pd.DataFrame([{'Estado': status}])
+        else:
+            frame = pd.DataFrame(result).assign(Estado=status)
+        for column, value in zip(group_by, key):
+            frame.insert(group_by.index(column), column, value)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=group_by + RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True).reindex(columns=group_by + RESULT_COLUMNS)
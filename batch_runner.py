@@ -0,0 +1,150 @@
+# batch_runner.py
+"""
+Ejecución por lotes (sin Streamlit) de la selección de modelos.
+
+Ejemplo:
+    python batch_runner.py datos/*.xlsx --by material --horizon 6 --jobs -1 --output-dir resultados
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from batch_forecast import monthly_by_group
+from data_loader import aggregate_demand_file, load_demand_data
+from data_preprocessor import MonthlySeries
+from model_selector import select_best_model
+
+def build_tasks(path, by, sectors, chunk_size=None):
+    """
+    Series mensuales de un archivo, una por sector o por sector y material.
+    Con chunk_size el archivo se agrega por bloques sin cargarlo completo en memoria.
+    """
+    group_by = ['SECTOR'] if by == 'sector' else ['SECTOR', 'MATERIAL']
+    if chunk_size:
+        groups = aggregate_demand_file(path, chunk_size=chunk_size).monthly_by_group(group_by)
+        if sectors:
+            groups = {key: monthly for key, monthly in groups.items() if key[0] in sectors}
+    else:
+        data = load_demand_data(path)
+        if sectors:
+            data = data[data['SECTOR'].isin(sectors)]
+        groups = monthly_by_group(data, group_by)
+
+    tasks = []
+    for key, monthly in groups.items():
+        group = dict(zip(group_by, key))
+        series = MonthlySeries(monthly.index, monthly['CANTIDAD'].to_numpy(), group['SECTOR'])
+        tasks.append(({'archivo': os.path.basename(path), **group}, series))
+    return tasks
+
+def run_task(group, series, horizon, verbose=False):
+    """Selecciona el mejor modelo de una serie y devuelve sus filas de proyección y de ranking."""
+    output = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(output):
+        results = select_best_model(series, horizon)
+
+    if not results:
+        return [], [{**group, 'modelo': None, 'mape': None, 'segundos': None, 'seleccionado': False,
+                     'estado': 'Sin modelo válido'}]
+
+    forecasts = []
+    leaderboard = []
+    for model_name, details in results['all_results'].items():
+        selected = model_name == results['best_model']
+        leaderboard.append({**group, 'modelo': model_name, 'mape': details['mape'],
+                            'segundos': results['timings'].get(model_name), 'seleccionado': selected,
+                            'estado': 'OK'})
+        for date, value in zip(details['forecast_dates'], details['forecast']):
+            forecasts.append({**group, 'modelo': model_name, 'seleccionado': selected,
+                              'fecha': date, 'proyeccion_m3': float(value)})
+    return forecasts, leaderboard
+
+def failed_task(group, error):
+    """Fila de ranking de una serie cuya selección falló, para que quede registrada en la salida."""
+    print(f"Error proyectando {group}: {error}", file=sys.stderr)
+    return [{**group, 'modelo': None, 'mape': None, 'segundos': None, 'seleccionado': False,
+             'estado': f"Error: {error}"}]
+
+def write_table(rows, path, output_format):
+    """Escribe una tabla de resultados en CSV o Parquet."""
+    table = pd.DataFrame(rows)
+    if output_format == 'parquet':
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+    return table
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Proyección de demanda por lotes sin interfaz web.")
+    parser.add_argument('inputs', nargs='+', help="Archivos .xlsx, .csv o .parquet con FECHA, SECTOR, MATERIAL y CANTIDAD.")
+    parser.add_argument('--by', choices=['sector', 'material'], default='sector',
+                        help="Proyectar una serie por sector o por sector y material (por defecto: sector).")
+    parser.add_argument('--sectors', nargs='*', default=None, help="Sectores a proyectar (por defecto: todos).")
+    parser.add_argument('--horizon', type=int, default=3, help="Horizonte de proyección en meses (por defecto: 3).")
+    parser.add_argument('--jobs', type=int, default=-1, help="Procesos en paralelo (-1 = todos los núcleos).")
+    parser.add_argument('--output-dir', default='resultados', help="Carpeta de salida (por defecto: resultados).")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Formato de salida.")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="Leer los archivos por bloques de este número de filas (para históricos muy grandes).")
+    parser.add_argument('--store', default=None, help="Ruta del almacén SQLite de modelos ganadores.")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar la salida detallada de cada modelo.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.store:
+        # Se define antes de crear el pool para que los procesos hijos la hereden
+        os.environ['PROYEKTA_FORECAST_STORE'] = args.store
+
+    tasks = []
+    for path in args.inputs:
+        try:
+            tasks.extend(build_tasks(path, args.by, args.sectors, args.chunk_size))
+        except Exception as e:
+            print(f"Error leyendo {path}: {e}", file=sys.stderr)
+    if not tasks:
+        print("No hay series para proyectar.", file=sys.stderr)
+        return 1
+
+    jobs = (os.cpu_count() or 1) if args.jobs is None or args.jobs < 0 else args.jobs
+    print(f"Proyectando {len(tasks)} series con {min(jobs, len(tasks))} procesos...")
+
+    forecasts = []
+    leaderboard = []
+    if jobs <= 1:
+        # Una serie que falla no detiene las demás, igual que con el pool
+        for group, series in tasks:
+            try:
+                task_forecasts, task_leaderboard = run_task(group, series, args.horizon, args.verbose)
+            except Exception as e:
+                leaderboard.extend(failed_task(group, e))
+                continue
+            forecasts.extend(task_forecasts)
+            leaderboard.extend(task_leaderboard)
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            futures = [executor.submit(run_task, group, series, args.horizon, args.verbose) for group, series in tasks]
+            for (group, _), future in zip(tasks, futures):
+                try:
+                    task_forecasts, task_leaderboard = future.result()
+                except Exception as e:
+                    leaderboard.extend(failed_task(group, e))
+                    continue
+                forecasts.extend(task_forecasts)
+                leaderboard.extend(task_leaderboard)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    extension = 'parquet' if args.format == 'parquet' else 'csv'
+    forecasts_path = os.path.join(args.output_dir, f"proyecciones.{extension}")
+    leaderboard_path = os.path.join(args.output_dir, f"ranking_mape.{extension}")
+    write_table(forecasts, forecasts_path, args.format)
+    write_table(leaderboard, leaderboard_path, args.format)
+    print(f"Proyecciones guardadas en {forecasts_path}")
+    print(f"Ranking de MAPE guardado en {leaderboard_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+# benchmark.py
+"""
+Benchmark reproducible del flujo de proyección con series sintéticas de tamaño creciente.
+
+Ejemplos:
+    python benchmark.py --months 24 120 360 --materials 1 10 --output benchmark.json
+    python benchmark.py --models arima sarima --sarima-search stepwise --select-best
+    python benchmark.py --months 60 --materials 1 --shared-split
+    python benchmark.py --compare benchmark_main.json benchmark.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from functools import partial
+
+# Sin almacén persistente: cada medición debe ajustar los modelos desde cero
+os.environ.pop('PROYEKTA_FORECAST_STORE', None)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np
+import pandas as pd
+import statsmodels
+import data_preprocessor
+from arima_model import _differencing_order, arima_grid, evaluate_arima_grid, restore_arima_model, run_arima_projection
+from batch_forecast import forecast_groups, monthly_by_group
+from data_loader import load_demand_data
+from linear_projection import linear_forecast, run_linear_projection
+from model_selector import select_best_model, select_best_model_horizons, select_best_model_shared_split
+from order_search import search_orders
+from sarima_model import (ALPHAS, _differencing_orders, evaluate_sarima_grid, restore_sarima_model,
+                          run_sarima_projection, sarima_grid)
+from smoothing import find_best_alpha, smooth_series
+
+SECTORS = ('PRIVADO', 'PUBLICO')
+
+RUNNERS = {'arima': run_arima_projection, 'sarima': run_sarima_projection, 'linear': run_linear_projection}
+
+# Horizontes de la aplicación, para --shared-split
+SHARED_SPLIT_HORIZONS = (3, 6, 12)
+
+# Etapas cuyo tiempo aumenta más que este factor se reportan como regresión
+REGRESSION_THRESHOLD = 1.2
+
+def synthetic_demand(n_months, n_materials=1, rows_per_month=4, seed=0):
+    """
+    Genera demanda mensual sintética en formato largo (FECHA, SECTOR, MATERIAL, CANTIDAD)
+    con tendencia, estacionalidad anual y ruido distintos para cada material.
+    Args:
+        n_months (int): Meses de historia.
+        n_materials (int): Número de materiales.
+        rows_per_month (int): Movimientos por mes, sector y material.
+        seed (int): Semilla del generador aleatorio.
+    Returns:
+        pd.DataFrame: Datos crudos como los del archivo Excel de la aplicación.
+    """
+    rng = np.random.default_rng(seed)
+    months = pd.date_range('2000-01-01', periods=n_months, freq='MS')
+    n_series = n_materials * len(SECTORS)
+
+    level = rng.uniform(50, 500, n_series)
+    trend = rng.uniform(-0.2, 1.0, n_series)
+    amplitude = rng.uniform(0.05, 0.3, n_series) * level
+    phase = rng.integers(0, 12, n_series)
+
+    # Una fila por mes, serie (material y sector) y movimiento
+    t = np.repeat(np.arange(n_months), n_series * rows_per_month)
+    series = np.tile(np.repeat(np.arange(n_series), rows_per_month), n_months)
+    mean = level[series] + trend[series] * t + amplitude[series] * np.sin(2 * np.pi * (t + phase[series]) / 12)
+    noise = rng.normal(0, 0.1, t.size) * level[series]
+    quantity = np.maximum(mean + noise, 0) / rows_per_month
+
+    materials = np.array([f"MATERIAL_{i:04d}" for i in range(n_materials)])
+    return pd.DataFrame({
+        'FECHA': months[t] + pd.to_timedelta(rng.integers(0, 28, t.size), unit='D'),
+        'SECTOR': np.array(SECTORS)[series % len(SECTORS)],
+        'MATERIAL': materials[series // len(SECTORS)],
+        'CANTIDAD': quantity,
+    })
+
+def _measure(function, trace_memory):
+    """
+    Ejecuta una etapa y devuelve (resultado, segundos, pico de memoria en MB o None).
+    tracemalloc hace varias veces más lentos los ajustes, así que el pico de memoria
+    se mide en una segunda ejecución y no afecta el tiempo.
+    """
+    # Los modelos imprimen su progreso; no interesa en el benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+
+        peak = None
+        if trace_memory:
+            tracemalloc.start()
+            try:
+                function()
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+            finally:
+                tracemalloc.stop()
+    return result, seconds, peak
+
+def _max_rss_mb():
+    """Memoria residente máxima del proceso en MB (None si la plataforma no la informa)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+def _write_input(data, directory, file_format):
+    path = os.path.join(directory, f"demanda.{file_format}")
+    if file_format == 'parquet':
+        data.to_parquet(path, index=False)
+    elif file_format == 'xlsx':
+        data.to_excel(path, index=False)
+    else:
+        data.to_csv(path, index=False)
+    return path
+
+def _grid_search(model, monthly, horizon, args):
+    """Suavización y búsqueda de órdenes de un modelo, como en arima_forecast/sarima_forecast."""
+    if model == 'arima':
+        candidates, evaluate_grid, group_key, start = arima_grid(), evaluate_arima_grid, _differencing_order, (2, 0, 2)
+        alpha = find_best_alpha(monthly)
+        strategy = args.arima_search
+    else:
+        candidates = sarima_grid()
+        evaluate_grid = partial(evaluate_sarima_grid, n_jobs=args.jobs)
+        group_key, start = _differencing_orders, ((2, 0, 2), (1, 0, 1, 3))
+        alpha = find_best_alpha(monthly, alphas=ALPHAS)
+        strategy = args.sarima_search
+
+    smoothed = smooth_series(monthly['CANTIDAD'], alpha)
+    train, test = smoothed.iloc[:-horizon], smoothed.iloc[-horizon:]
+    search = search_orders(candidates, partial(evaluate_grid, train, test), strategy, group_key=group_key, start=start)
+    return train, candidates, search
+
+def run_case(n_months, n_materials, args, directory):
+    """
+    Mide todas las etapas para un tamaño de serie y número de materiales.
+    Returns:
+        list: Una fila por etapa con 'seconds', 'peak_mb' y datos del caso.
+    """
+    rows = []
+    case = {'months': n_months, 'materials': n_materials}
+
+    def record(stage, function, **extra):
+        result, seconds, peak = _measure(function, args.trace_memory)
+        rows.append({**case, 'stage': stage, 'seconds': seconds, 'peak_mb': peak, 'max_rss_mb': _max_rss_mb(), **extra})
+        if args.verbose:
+            print(f"  {stage:<28} {seconds:8.3f} s" + (f" {peak:8.1f} MB" if peak is not None else ""))
+        return result
+
+    raw = synthetic_demand(n_months, n_materials, args.rows_per_month, args.seed)
+    path = _write_input(raw, directory, args.format)
+    case['raw_rows'] = len(raw)
+
+    data = record('ingest', lambda: load_demand_data(path, cache_dir=None), format=args.format)
+    monthly = record('preprocess', lambda: data_preprocessor.preprocess_data(data))
+    if n_materials > 1:
+        record('preprocess_by_material', lambda: monthly_by_group(data, ('MATERIAL',), sector='PRIVADO'))
+    record('alpha_search', lambda: find_best_alpha(monthly, alphas=ALPHAS))
+
+    for model in args.models:
+        if model == 'linear':
+            record('final_forecast_linear', lambda: linear_forecast(monthly.copy(), args.horizon))
+        else:
+            train, candidates, search = record(f'grid_search_{model}', lambda: _grid_search(model, monthly, args.horizon, args))
+            best = search['best']
+            if best is None:
+                continue
+            params = search['results'][best]['params']
+            orders = candidates[best] if model == 'sarima' else (candidates[best],)
+            restore = restore_sarima_model if model == 'sarima' else restore_arima_model
+            record(f'final_forecast_{model}', lambda: restore(train, *orders, params).forecast(steps=args.horizon),
+                   n_fits=search['n_fits'], n_proxy_fits=search['n_proxy_fits'])
+
+        options = {
+            'arima': {'search': args.arima_search},
+            'sarima': {'search': args.sarima_search, 'n_jobs': args.jobs},
+            'linear': {},
+        }[model]
+        data_preprocessor._series_cache.clear()
+        record(f'end_to_end_{model}', lambda: RUNNERS[model](data, horizon=args.horizon, **options))
+
+        if n_materials > 1 and model != 'sarima':
+            name = 'ARIMA' if model == 'arima' else 'Linear Projection'
+            record(f'batch_{model}', lambda: forecast_groups(data, args.horizon, sector='PRIVADO', model=name, n_jobs=args.jobs))
+
+    if args.select_best:
+        data_preprocessor._series_cache.clear()
+        record('select_best_model', lambda: select_best_model(data, args.horizon))
+
+    # Validación por horizonte (la de la aplicación) frente a la división común descartada
+    if args.shared_split and n_months >= max(SHARED_SPLIT_HORIZONS) + 1:
+        data_preprocessor._series_cache.clear()
+        record('select_best_model_horizons', lambda: select_best_model_horizons(data, SHARED_SPLIT_HORIZONS))
+        data_preprocessor._series_cache.clear()
+        record('select_best_model_shared_split', lambda: select_best_model_shared_split(data, SHARED_SPLIT_HORIZONS))
+
+    return rows
+
+def _git_commit():
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+def environment_info():
+    """Versiones y máquina, para comparar resultados entre commits."""
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'statsmodels': statsmodels.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def compare(base_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara dos archivos de resultados por caso y etapa.
+    Returns:
+        pd.DataFrame: Segundos de ambos, razón nuevo/base y si es una regresión.
+    """
+    def load(path):
+        with open(path, encoding='utf-8') as file:
+            return pd.DataFrame(json.load(file)['results'])
+
+    keys = ['months', 'materials', 'stage']
+    merged = load(base_path)[keys + ['seconds']].merge(
+        load(new_path)[keys + ['seconds']], on=keys, suffixes=('_base', '_new')
+    )
+    merged['ratio'] = merged['seconds_new'] / merged['seconds_base']
+    merged['regression'] = merged['ratio'] > threshold
+    return merged
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del flujo de proyección con series sintéticas.")
+    parser.add_argument('--months', type=int, nargs='+', default=[24, 60, 120], help="Largos de historia en meses.")
+    parser.add_argument('--materials', type=int, nargs='+', default=[1, 10], help="Números de materiales.")
+    parser.add_argument('--models', nargs='+', choices=['arima', 'sarima', 'linear'], default=['arima', 'linear'],
+                        help="Modelos a medir (SARIMA exhaustivo tarda minutos por serie).")
+    parser.add_argument('--arima-search', default='exhaustive', help="Estrategia de búsqueda de órdenes ARIMA.")
+    parser.add_argument('--sarima-search', default='stepwise', help="Estrategia de búsqueda de órdenes SARIMA.")
+    parser.add_argument('--select-best', action='store_true', help="Medir también select_best_model (incluye SARIMA).")
+    parser.add_argument('--shared-split', action='store_true',
+                        help="Medir la selección por horizonte frente a la división común (incluye SARIMA).")
+    parser.add_argument('--horizon', type=int, default=3, help="Horizonte de proyección en meses.")
+    parser.add_argument('--rows-per-month', type=int, default=4, help="Movimientos por mes, sector y material.")
+    parser.add_argument('--format', choices=['csv', 'parquet', 'xlsx'], default='csv', help="Formato del archivo de entrada.")
+    parser.add_argument('--jobs', type=int, default=1, help="Procesos para SARIMA y el lote por material.")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de las series sintéticas.")
+    parser.add_argument('--no-trace-memory', dest='trace_memory', action='store_false',
+                        help="No medir el pico de memoria por etapa (evita repetir cada etapa).")
+    parser.add_argument('--output', default='benchmark.json', help="Archivo JSON de resultados.")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NUEVO'), help="Comparar dos archivos de resultados.")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar cada etapa al medirla.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        comparison = compare(*args.compare)
+        print(comparison.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+        return 1 if comparison['regression'].any() else 0
+
+    # Los avisos de convergencia de statsmodels no cambian las mediciones
+    warnings.simplefilter('ignore')
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n_months in args.months:
+            for n_materials in args.materials:
+                print(f"Caso: {n_months} meses, {n_materials} materiales")
+                results.extend(run_case(n_months, n_materials, args, directory))
+
+    report = {'environment': environment_info(), 'arguments': vars(args), 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, default=str)
+    print(f"Resultados guardados en {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# chart_data.py
+"""
+Datos livianos para los gráficos de la aplicación web.
+
+El historial se grafica a la frecuencia de modelación (la MonthlySeries que
+usan los modelos, una fila por mes) y no una fila por movimiento. Si aun así la
+serie supera MAX_POINTS, se reduce con LTTB (Largest-Triangle-Three-Buckets),
+que conserva la forma visual de la curva (picos y valles) con pocos puntos. Las
+trazas con más de WEBGL_THRESHOLD puntos se dibujan con Scattergl (WebGL).
+Así el JSON que recibe el navegador queda acotado sin importar el tamaño del
+archivo cargado.
+"""
+import numpy as np
+import pandas as pd
+from data_preprocessor import build_monthly_series
+
+MAX_POINTS = 2000  # Puntos máximos por traza enviados al navegador
+WEBGL_THRESHOLD = 1000  # Desde esta cantidad de puntos se usa Scattergl
+
+def lttb(x, y, n_out):
+    """
+    Índices de los puntos elegidos por Largest-Triangle-Three-Buckets.
+    Args:
+        x (array-like): Coordenadas x numéricas y crecientes.
+        y (array-like): Valores.
+        n_out (int): Puntos a conservar (se incluyen siempre el primero y el último).
+    Returns:
+        np.ndarray: Índices crecientes de los puntos conservados.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB requiere conservar al menos 3 puntos.")
+
+    # Los puntos interiores se reparten en n_out - 2 baldes de tamaño parecido
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Vértice C: promedio del balde siguiente (el último punto para el último balde)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            cx, cy = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        # Punto del balde que forma el triángulo de mayor área con A y C
+        areas = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def downsample(dates, values, max_points=MAX_POINTS):
+    """
+    Reduce una serie temporal a lo más max_points puntos con LTTB.
+    Args:
+        dates (array-like): Fechas crecientes.
+        values (array-like): Valores.
+        max_points (int): Puntos máximos.
+    Returns:
+        tuple: (fechas, valores) conservados, como pd.DatetimeIndex y np.ndarray.
+    """
+    dates = pd.DatetimeIndex(dates)
+    values = np.asarray(values, dtype=float)
+    if len(values) <= max_points:
+        return dates, values
+    index = lttb(dates.asi8, values, max_points)
+    return dates[index], values[index]
+
+def scatter_trace(x, y, **kwargs):
+    """Traza de líneas: Scattergl sobre WEBGL_THRESHOLD puntos, Scatter en otro caso."""
+    import plotly.graph_objects as go
+
+    trace = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+def history_points(data, sector='PRIVADO', max_points=MAX_POINTS):
+    """
+    Historial a graficar: la serie a la frecuencia de modelación, reducida si es muy larga.
+    Args:
+        data (pd.DataFrame | MonthlySeries): Datos crudos o la serie usada por los modelos.
+        sector (str): Sector cuando se reciben datos crudos.
+        max_points (int): Puntos máximos.
+    Returns:
+        tuple: (fechas, cantidades).
+    """
+    frame = build_monthly_series(data, sector=sector).frame()
+    return downsample(frame.index, frame['CANTIDAD'], max_points)
+
+def comparison_figure(data, all_results, selected_models, sector='PRIVADO', max_points=MAX_POINTS):
+    """
+    Gráfico comparativo del historial mensual y las proyecciones de los modelos elegidos.
+    Args:
+        data (pd.DataFrame | MonthlySeries): Datos crudos o la serie usada por los modelos.
+        all_results (dict): Nombre del modelo -> resultado (con 'forecast' y 'forecast_dates').
+        selected_models (list): Modelos a graficar.
+        sector (str): Sector cuando se reciben datos crudos.
+        max_points (int): Puntos máximos por traza.
+    Returns:
+        plotly.graph_objects.Figure: Gráfico con a lo más max_points puntos por traza.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    dates, quantities = history_points(data, sector, max_points)
+    fig.add_trace(scatter_trace(dates, quantities, mode='lines', name='Datos Históricos (mensual)'))
+    for model in selected_models:
+        model_results = all_results[model]
+        forecast_dates, forecast = downsample(model_results['forecast_dates'], model_results['forecast'], max_points)
+        fig.add_trace(scatter_trace(forecast_dates, forecast, mode='lines+markers', name=f"Proyección {model}"))
+    fig.update_layout(
+        title="Comparación de Modelos de Proyección",
+        xaxis_title="Fecha",
+        yaxis_title="Cantidad de Material (m³)",
+        template="plotly_dark",
+        hovermode="x"
+    )
+    return fig
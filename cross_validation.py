@@ -0,0 +1,204 @@
+# cross_validation.py
+"""
+Validación cruzada con origen móvil (backtesting) para los modelos de proyección.
+
+Cada pliegue corta la serie suavizada en un origen, entrena con los meses
+anteriores y mide el MAPE de la proyección de los `horizon` meses siguientes.
+El alpha de la suavización y los órdenes de cada modelo se eligen solo con los
+meses anteriores a la primera ventana de prueba, así que ningún pliegue evalúa
+meses que influyeron en esa elección. Los parámetros se ajustan una vez en el
+primer pliegue y se reutilizan en los demás:
+
+- reuse=True: sin volver a optimizar. Con ventana creciente el estado del
+  filtro se extiende con los meses nuevos (results.extend), y con ventana
+  deslizante se vuelve a filtrar la ventana con los mismos parámetros.
+- reuse=False: cada pliegue se reajusta partiendo de los parámetros del
+  primero; los pliegues son independientes y pueden ir en paralelo.
+
+Ejemplo:
+    cv = cross_validate(serie_mensual, 3, ['ARIMA', 'SARIMA', 'Linear Projection'], n_folds=4)
+    cv['errors']  # DataFrame modelos x pliegues con el MAPE de cada uno
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_percentage_error
+import telemetry
+from arima_model import arima_forecast, fit_arima_candidate, restore_arima_model
+from data_preprocessor import MonthlySeries
+from sarima_model import ALPHAS, fit_sarima_candidate, restore_sarima_model, sarima_forecast
+from smoothing import DEFAULT_ALPHAS, find_best_alpha, smooth_series
+
+WINDOWS = ('expanding', 'sliding')
+
+# Modelo -> (grilla de alphas, ajuste de un candidato, reconstrucción con parámetros, búsqueda de órdenes)
+STATE_SPACE_MODELS = {
+    'ARIMA': (DEFAULT_ALPHAS, fit_arima_candidate, restore_arima_model, arima_forecast),
+    'SARIMA': (ALPHAS, fit_sarima_candidate, restore_sarima_model, sarima_forecast),
+}
+
+def rolling_origin_splits(n_obs, horizon, n_folds=3, step=1, window='expanding', min_train=3):
+    """
+    Pliegues de origen móvil; el último termina en el último mes de la serie.
+    Args:
+        n_obs (int): Largo de la serie.
+        horizon (int): Meses evaluados en cada pliegue.
+        n_folds (int): Número de pliegues.
+        step (int): Meses que avanza el origen entre pliegues.
+        window (str): 'expanding' (el entrenamiento crece) o 'sliding' (largo fijo).
+        min_train (int): Largo mínimo del entrenamiento del primer pliegue.
+    Returns:
+        list: Tuplas (inicio del entrenamiento, origen, fin de la prueba) en posiciones de la serie.
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Ventana desconocida: {window}. Opciones: {', '.join(WINDOWS)}")
+    if n_folds < 1 or step < 1:
+        raise ValueError("n_folds y step deben ser enteros positivos.")
+
+    first_origin = n_obs - horizon - step * (n_folds - 1)
+    if first_origin < min_train:
+        raise ValueError("Datos insuficientes para la validación cruzada con esos pliegues.")
+
+    splits = []
+    for k in range(n_folds):
+        origin = first_origin + k * step
+        start = 0 if window == 'expanding' else origin - first_origin
+        splits.append((start, origin, origin + horizon))
+    return splits
+
+def _orders_before(name, history, horizon):
+    """Órdenes que elige la búsqueda del modelo con solo los meses de `history`."""
+    search = STATE_SPACE_MODELS[name][3]
+    outcome = search(history.copy(), horizon)
+    # (proyección, fechas, órdenes..., MAPE)
+    return tuple(outcome[2:-1])
+
+def _model_orders(name, details):
+    """Órdenes de un modelo a partir de sus resultados (como los de run_*_projection)."""
+    if name == 'ARIMA':
+        return (tuple(details['best_order']),)
+    if name == 'SARIMA':
+        return tuple(details['order']), tuple(details['seasonal_order'])
+    return ()
+
+def _linear_fold(values, split):
+    # Misma regresión sobre el índice temporal que linear_projection.linear_forecast
+    start, origin, end = split
+    train_index = np.arange(origin - start).reshape(-1, 1)
+    test_index = np.arange(origin - start, end - start).reshape(-1, 1)
+    forecast = LinearRegression().fit(train_index, values[start:origin]).predict(test_index)
+    return mean_absolute_percentage_error(values[origin:end], np.maximum(forecast, 0))
+
+def _state_space_fold(name, values, orders, split, params=None, start_from=None):
+    """
+    Error de un pliegue: filtra con `params` (sin optimizar) o reajusta partiendo de
+    `start_from`. Se ejecuta también dentro de los procesos del pool.
+    """
+    _, fit_candidate, restore, _ = STATE_SPACE_MODELS[name]
+    start, origin, end = split
+    train, test = values[start:origin], values[origin:end]
+    if params is None:
+        fitted = fit_candidate(train, test, *orders, start_from=start_from)
+        return np.nan if fitted is None else fitted['mape']
+    try:
+        forecast = restore(train, *orders, params).forecast(steps=len(test))
+        return mean_absolute_percentage_error(test, forecast)
+    except Exception:
+        return np.nan
+
+def _run_folds(tasks, n_jobs):
+    """Evalúa pliegues independientes (tuplas de argumentos de _state_space_fold), en serie o en paralelo."""
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(tasks))
+    if n_jobs <= 1:
+        return [_state_space_fold(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return list(executor.map(_state_space_fold, *zip(*tasks)))
+
+def _cross_validate_state_space(name, values, orders, splits, window, reuse, n_jobs):
+    """Errores por pliegue de ARIMA o SARIMA con los órdenes indicados."""
+    _, fit_candidate, restore, _ = STATE_SPACE_MODELS[name]
+    start, origin, end = splits[0]
+    first = fit_candidate(values[start:origin], values[origin:end], *orders)
+    if first is None:
+        return [np.nan] * len(splits)
+
+    errors = [first['mape']]
+    later = splits[1:]
+    if not reuse:
+        # Reajuste de cada pliegue partiendo de los parámetros del primero
+        start_from = (first['param_names'], first['params'])
+        return errors + _run_folds([(name, values, orders, split, None, start_from) for split in later], n_jobs)
+
+    if window == 'sliding':
+        # Ventana deslizante: cada ventana se filtra con los parámetros del primer pliegue
+        return errors + _run_folds([(name, values, orders, split, first['params']) for split in later], n_jobs)
+
+    # Ventana creciente: el estado del filtro se extiende solo con los meses nuevos
+    try:
+        results = restore(values[:origin], *orders, first['params'])
+        previous = origin
+        for _, origin, end in later:
+            results = results.extend(values[previous:origin])
+            previous = origin
+            errors.append(mean_absolute_percentage_error(values[origin:end], results.forecast(steps=end - origin)))
+    except Exception:
+        errors.extend([np.nan] * (len(splits) - len(errors)))
+    return errors
+
+def cross_validate(data, horizon, models, n_folds=3, step=1, window='expanding', reuse=True, n_jobs=1, min_train=3,
+                   reselect=True):
+    """
+    Validación cruzada con origen móvil de varios modelos sobre la misma serie.
+    Args:
+        data (pd.DataFrame | MonthlySeries): Serie mensual con la columna 'CANTIDAD'.
+        horizon (int): Meses evaluados en cada pliegue.
+        models (dict | list): Modelos a evaluar. Con reselect=False, un diccionario
+            nombre -> resultados de su búsqueda, con sus órdenes ('best_order' para ARIMA;
+            'order' y 'seasonal_order' para SARIMA).
+        n_folds (int), step (int), window (str), min_train (int): Ver rolling_origin_splits.
+        reuse (bool): Reutilizar los parámetros del primer pliegue sin volver a optimizar.
+        n_jobs (int): Procesos para los pliegues independientes (1 = secuencial, -1 = todos los núcleos).
+        reselect (bool): Volver a buscar los órdenes con los meses anteriores a la primera
+            ventana de prueba (una búsqueda más por modelo). Con False se usan los órdenes de
+            `models`; si su búsqueda vio los meses de prueba, el MAPE resulta optimista.
+    Returns:
+        dict: 'errors' (DataFrame modelos x pliegues con el MAPE), 'mean' (MAPE promedio por
+            modelo, ignorando pliegues fallidos), 'origins' (último mes de entrenamiento de
+            cada pliegue) y 'orders' (órdenes evaluados de cada modelo de espacio de estados).
+    """
+    frame = data.frame() if isinstance(data, MonthlySeries) else data[['CANTIDAD']].astype(float)
+    splits = rolling_origin_splits(len(frame), horizon, n_folds, step, window, min_train)
+    # Alpha y órdenes se eligen sin ver ninguna ventana de prueba
+    history = frame.iloc[:splits[0][1]]
+
+    errors = {}
+    orders = {}
+    for name in models:
+        with telemetry.span('cross_validation', name):
+            if name not in STATE_SPACE_MODELS:
+                values = smooth_series(frame['CANTIDAD'], find_best_alpha(history)).to_numpy()
+                errors[name] = [_linear_fold(values, split) for split in splits]
+                continue
+
+            alphas = STATE_SPACE_MODELS[name][0]
+            values = smooth_series(frame['CANTIDAD'], find_best_alpha(history, alphas=alphas)).to_numpy()
+            try:
+                orders[name] = _orders_before(name, history, horizon) if reselect else _model_orders(name, models[name])
+            except ValueError:
+                # Muy pocos meses antes del primer pliegue para buscar los órdenes
+                errors[name] = [np.nan] * len(splits)
+                continue
+            errors[name] = _cross_validate_state_space(name, values, orders[name], splits, window, reuse, n_jobs)
+
+    folds = [f"pliegue_{k + 1}" for k in range(len(splits))]
+    table = pd.DataFrame.from_dict(errors, orient='index', columns=folds, dtype=float)
+    return {
+        'errors': table,
+        'mean': table.mean(axis=1),
+        'origins': [frame.index[origin - 1] for _, origin, _ in splits],
+        'orders': orders,
+    }
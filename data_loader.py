@@ -0,0 +1,188 @@
+# data_loader.py
+import hashlib
+import io
+import os
+import pandas as pd
+from data_preprocessor import MonthlyAggregator
+
+REQUIRED_COLUMNS = ['FECHA', 'SECTOR', 'MATERIAL', 'CANTIDAD']
+SUPPORTED_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# Carpeta donde se guardan las conversiones de Excel a Parquet
+DEFAULT_CACHE_DIR = os.path.join('.proyekta_cache', 'ingesta')
+
+# Filas por bloque en la lectura por streaming
+DEFAULT_CHUNK_SIZE = 100_000
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+def detect_format(name):
+    """Formato del archivo según su extensión ('xlsx', 'csv' o 'parquet')."""
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    if extension == 'xls':
+        extension = 'xlsx'
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"Formato no soportado: {name}. Formatos válidos: {', '.join(SUPPORTED_FORMATS)}")
+    return extension
+
+def _check_columns(columns, name):
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"El archivo {name} no contiene las columnas requeridas: {', '.join(missing)}")
+
+def normalize_columns(data):
+    """
+    Deja solo las columnas requeridas con tipos explícitos: FECHA como fecha,
+    SECTOR y MATERIAL como categorías y CANTIDAD como número real.
+    """
+    return pd.DataFrame({
+        'FECHA': pd.to_datetime(data['FECHA'], errors='coerce'),
+        'SECTOR': data['SECTOR'].astype('category'),
+        'MATERIAL': data['MATERIAL'].astype('category'),
+        'CANTIDAD': pd.to_numeric(data['CANTIDAD'], errors='coerce').astype('float64'),
+    })
+
+def _read_excel(buffer, name):
+    # openpyxl debe recorrer todo el XML; al menos se descartan las columnas sobrantes al leer
+    data = pd.read_excel(buffer, usecols=lambda column: column in REQUIRED_COLUMNS,
+                         dtype={'SECTOR': str, 'MATERIAL': str})
+    _check_columns(data.columns, name)
+    return data
+
+def _read_csv(buffer, name):
+    header = pd.read_csv(buffer, nrows=0).columns
+    _check_columns(header, name)
+    buffer.seek(0)
+    options = {'usecols': REQUIRED_COLUMNS, 'dtype': {'SECTOR': 'string', 'MATERIAL': 'string', 'CANTIDAD': 'float64'}}
+    if HAS_PYARROW:
+        options['engine'] = 'pyarrow'
+    return pd.read_csv(buffer, **options)
+
+def _read_parquet(buffer, name):
+    if not HAS_PYARROW:
+        data = pd.read_parquet(buffer)
+        _check_columns(data.columns, name)
+        return data
+
+    import pyarrow.parquet as pq
+    _check_columns(pq.read_schema(buffer).names, name)
+    buffer.seek(0)
+    return pd.read_parquet(buffer, columns=REQUIRED_COLUMNS)
+
+_READERS = {'xlsx': _read_excel, 'csv': _read_csv, 'parquet': _read_parquet}
+
+def load_demand_data(source, name=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Carga un archivo de demanda histórica leyendo solo FECHA, SECTOR, MATERIAL y CANTIDAD.
+    Los Excel se convierten una sola vez a Parquet (identificado por el hash del
+    contenido), de modo que las lecturas siguientes del mismo archivo son columnares.
+    Args:
+        source (str | bytes | file-like): Ruta, contenido o archivo subido.
+        name (str): Nombre del archivo para detectar el formato (por defecto, la ruta).
+        cache_dir (str): Carpeta de la caché Parquet (None = sin caché).
+    Returns:
+        pd.DataFrame: Datos con las cuatro columnas requeridas y tipos explícitos.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = name or os.fspath(source)
+        with open(source, 'rb') as file:
+            content = file.read()
+    elif isinstance(source, bytes):
+        content = source
+    else:
+        name = name or getattr(source, 'name', '')
+        content = source.getvalue() if hasattr(source, 'getvalue') else source.read()
+
+    file_format = detect_format(name or '')
+    cache_path = None
+    if file_format == 'xlsx' and cache_dir and HAS_PYARROW:
+        cache_path = os.path.join(cache_dir, hashlib.sha256(content).hexdigest() + '.parquet')
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+    data = normalize_columns(_READERS[file_format](io.BytesIO(content), name))
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Escritura atómica para que dos procesos no lean un archivo a medio escribir
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        data.to_parquet(temporary_path, index=False)
+        os.replace(temporary_path, cache_path)
+    return data
+
+def _iter_csv(path, chunk_size):
+    _check_columns(pd.read_csv(path, nrows=0).columns, path)
+    # El motor pyarrow no admite chunksize; se usa el motor C
+    reader = pd.read_csv(path, usecols=REQUIRED_COLUMNS, chunksize=chunk_size,
+                         dtype={'SECTOR': 'string', 'MATERIAL': 'string', 'CANTIDAD': 'float64'})
+    with reader:
+        yield from reader
+
+def _iter_parquet(path, chunk_size):
+    if not HAS_PYARROW:
+        raise ImportError("La lectura por bloques de Parquet requiere pyarrow.")
+
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(path)
+    _check_columns(parquet_file.schema_arrow.names, path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=REQUIRED_COLUMNS):
+        yield batch.to_pandas()
+
+def _iter_excel(path, chunk_size):
+    from openpyxl import load_workbook
+
+    # En modo solo lectura openpyxl recorre la hoja fila a fila sin cargarla entera
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+        _check_columns(header, path)
+        positions = [header.index(column) for column in REQUIRED_COLUMNS]
+
+        block = []
+        for row in rows:
+            block.append([row[position] if position < len(row) else None for position in positions])
+            if len(block) >= chunk_size:
+                yield pd.DataFrame(block, columns=REQUIRED_COLUMNS)
+                block = []
+        if block:
+            yield pd.DataFrame(block, columns=REQUIRED_COLUMNS)
+    finally:
+        workbook.close()
+
+_CHUNK_READERS = {'xlsx': _iter_excel, 'csv': _iter_csv, 'parquet': _iter_parquet}
+
+def iter_demand_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lee un archivo de demanda por bloques de filas, con las cuatro columnas requeridas.
+    Args:
+        path (str): Ruta del archivo (.xlsx, .csv o .parquet).
+        chunk_size (int): Filas por bloque.
+    Returns:
+        iterator: Bloques pd.DataFrame con FECHA, SECTOR, MATERIAL y CANTIDAD normalizados.
+    """
+    path = os.fspath(path)
+    for chunk in _CHUNK_READERS[detect_format(path)](path, chunk_size):
+        yield normalize_columns(chunk)
+
+def aggregate_demand_file(path, sector=None, resample_frequency='MS', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Agrega un archivo de demanda a totales mensuales por sector y material sin cargarlo
+    completo en memoria; el uso de memoria queda acotado por chunk_size.
+    Args:
+        path (str): Ruta del archivo (.xlsx, .csv o .parquet).
+        sector (str): Si se indica, descarta las filas de otros sectores al leer.
+        resample_frequency (str): Frecuencia de las series ('MS' o 'M').
+        chunk_size (int): Filas por bloque.
+    Returns:
+        MonthlyAggregator: Acumulador con los totales; sus series coinciden exactamente
+            con las de preprocess_data y monthly_by_group sobre el archivo completo.
+    """
+    aggregator = MonthlyAggregator(sector=sector, resample_frequency=resample_frequency)
+    for chunk in iter_demand_chunks(path, chunk_size):
+        aggregator.add(chunk)
+    return aggregator
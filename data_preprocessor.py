@@ -1,9 +1,46 @@
 # data_preprocessor.py
+import hashlib
+import math
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 
+# Cantidad máxima de series mensuales memorizadas (una por archivo/sector/frecuencia)
+MAX_CACHED_SERIES = 16
+_series_cache = OrderedDict()
+
+def _reduce_groups(grouped, values, function):
+    # Aplica function a las cantidades de cada grupo (sin NaN), en el orden de grouped.size():
+    # se ordenan las filas por grupo una sola vez y cada grupo es un tramo contiguo
+    sizes = grouped.size()
+    codes = grouped.ngroup().to_numpy(dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = ~np.isnan(codes) & ~np.isnan(values)
+    codes = codes[keep].astype(np.int64)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(sizes) + 1)).tolist()
+    values = values[keep][order].tolist()
+    return sizes.index, [function(values[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+def exact_sums(grouped, values):
+    """
+    Suma correctamente redondeada (math.fsum) de cada grupo, con el mismo índice que
+    grouped.sum() y sin contar los NaN. El resultado no depende del orden de las filas:
+    la agregación en memoria y la agregación por bloques (MonthlyAggregator) producen
+    exactamente los mismos totales y, por lo tanto, la misma huella.
+    Args:
+        grouped (SeriesGroupBy): Agrupación de las filas (p. ej. data.groupby(...)['CANTIDAD']).
+        values (np.ndarray): Cantidades de las filas, en el orden de los datos agrupados.
+    Returns:
+        pd.Series: Total de cada grupo.
+    """
+    index, totals = _reduce_groups(grouped, values, math.fsum)
+    return pd.Series(totals, index=index, dtype=float)
+
 def preprocess_data(data, sector='PRIVADO', resample_frequency='MS'):
     """
     Preprocesar los datos cargados, filtrando por sector y resampleando según la frecuencia indicada.
+    No modifica el DataFrame recibido.
     Args:
         data (pd.DataFrame): Datos crudos cargados desde el archivo.
         sector (str): Sector para filtrar (ejemplo: 'PRIVADO').
@@ -11,17 +48,216 @@ def preprocess_data(data, sector='PRIVADO', resample_frequency='MS'):
     Returns:
         pd.DataFrame: Datos procesados y resampleados.
     """
-    # Asegurarse de que la columna 'FECHA' esté en formato datetime
-    data['FECHA'] = pd.to_datetime(data['FECHA'], errors='coerce')
+    # Asegurarse de que la columna 'FECHA' esté en formato datetime (sobre una copia)
+    data = data[['FECHA', 'SECTOR', 'CANTIDAD']].assign(FECHA=pd.to_datetime(data['FECHA'], errors='coerce'))
     data = data.dropna(subset=['FECHA'])
 
     # Filtrar por sector
     data = data[data['SECTOR'] == sector]
 
-    # Establecer FECHA como índice y resamplear
-    data = data.set_index('FECHA')
-    data_resampled = data[['CANTIDAD']].resample(resample_frequency).sum()
+    # Establecer FECHA como índice y resamplear; con una sola clave de fecha, ngroup()
+    # numera las filas en orden cronológico, así que se ordenan antes para alinear las cantidades
+    data = data.sort_values('FECHA', kind='stable').set_index('FECHA')
+    grouped = data['CANTIDAD'].groupby(pd.Grouper(freq=resample_frequency))
+    data_resampled = exact_sums(grouped, data['CANTIDAD'].to_numpy(dtype=float)).to_frame('CANTIDAD')
 
     # Manejar valores nulos o negativos
     data_resampled['CANTIDAD'] = data_resampled['CANTIDAD'].clip(lower=0).fillna(0)
     return data_resampled
+
+def series_fingerprint(index, values):
+    """
+    Huella SHA-256 de una serie a partir de sus fechas y valores exactos. Los totales
+    mensuales se calculan con exact_sums, así que la misma serie agregada en otro
+    orden (p. ej. por bloques) tiene los mismos valores y la misma huella.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.DatetimeIndex(index).asi8.tobytes())
+    # + 0.0 normaliza -0.0, que tiene otros bytes que 0.0
+    digest.update(np.ascontiguousarray(np.asarray(values, dtype=float) + 0.0).tobytes())
+    return digest.hexdigest()
+
+class MonthlySeries:
+    """
+    Serie resampleada inmutable que comparten todos los modelos.
+    Guarda las cantidades en un arreglo de solo lectura junto con una huella
+    (SHA-256 de fechas y valores) que identifica su contenido.
+    """
+    __slots__ = ('_index', '_values', 'sector', 'fingerprint')
+
+    def __init__(self, index, values, sector):
+        values = np.array(values, dtype=float)
+        values.flags.writeable = False
+        object.__setattr__(self, '_index', pd.DatetimeIndex(index))
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, 'sector', sector)
+        object.__setattr__(self, 'fingerprint', series_fingerprint(self._index, values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MonthlySeries es inmutable.")
+
+    def __reduce__(self):
+        # Se reconstruye con el constructor al enviarse a otros procesos
+        return MonthlySeries, (self._index, self._values, self.sector)
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def values(self):
+        return self._values
+
+    def frame(self):
+        """Devuelve una copia nueva como DataFrame con la columna 'CANTIDAD', lista para los modelos."""
+        return pd.DataFrame({'CANTIDAD': self._values.copy()}, index=self._index.copy())
+
+def _content_hash(data):
+    """Huella del contenido crudo relevante para el preprocesamiento."""
+    hashed = pd.util.hash_pandas_object(data[['FECHA', 'SECTOR', 'CANTIDAD']], index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()
+
+def build_monthly_series(data, sector='PRIVADO', resample_frequency='MS'):
+    """
+    Ejecuta preprocess_data una sola vez por contenido de archivo, sector y frecuencia
+    y devuelve la MonthlySeries memorizada en llamadas posteriores.
+    Args:
+        data (pd.DataFrame | MonthlySeries): Datos crudos o una serie ya preparada.
+        sector (str): Sector para filtrar.
+        resample_frequency (str): Frecuencia de resampleo.
+    Returns:
+        MonthlySeries: Serie inmutable con su huella de contenido.
+    """
+    if isinstance(data, MonthlySeries):
+        return data
+
+    key = (_content_hash(data), sector, resample_frequency)
+    if key in _series_cache:
+        _series_cache.move_to_end(key)
+        return _series_cache[key]
+
+    processed = preprocess_data(data, sector=sector, resample_frequency=resample_frequency)
+    series = MonthlySeries(processed.index, processed['CANTIDAD'].to_numpy(), sector)
+
+    _series_cache[key] = series
+    if len(_series_cache) > MAX_CACHED_SERIES:
+        _series_cache.popitem(last=False)
+    return series
+
+def _exact_terms(values):
+    """Términos cuya suma exacta es la de values; permiten acumular bloques sin error de redondeo."""
+    terms = []
+    rest = list(values)
+    while True:
+        total = math.fsum(rest)
+        if total == 0.0 or not math.isfinite(total):
+            if total != 0.0:
+                terms.append(total)
+            return terms
+        terms.append(total)
+        rest.append(-total)
+
+class MonthlyAggregator:
+    """
+    Acumula por bloques las cantidades mensuales por sector y material.
+    Cada mes de cada par (sector, material) guarda solo unos pocos términos de su
+    suma exacta, así que la memoria depende del número de meses y grupos y no de
+    la cantidad de filas leídas. Los totales coinciden exactamente con preprocess_data
+    y con batch_forecast.monthly_by_group sobre los mismos datos completos.
+    """
+    # Términos máximos por mes antes de compactarlos
+    MAX_TERMS = 32
+
+    def __init__(self, sector=None, resample_frequency='MS'):
+        self.sector = sector
+        self.resample_frequency = resample_frequency
+        self.rows = 0
+        self._terms = {}
+        self._groups = OrderedDict()
+
+    def add(self, chunk):
+        """
+        Incorpora un bloque de filas crudas con 'FECHA', 'SECTOR', 'MATERIAL' y 'CANTIDAD'.
+        Args:
+            chunk (pd.DataFrame): Bloque de datos en formato largo.
+        Returns:
+            MonthlyAggregator: El mismo acumulador, para encadenar llamadas.
+        """
+        self.rows += len(chunk)
+        data = pd.DataFrame({
+            'FECHA': pd.to_datetime(chunk['FECHA'], errors='coerce'),
+            'SECTOR': chunk['SECTOR'].astype(object),
+            'MATERIAL': chunk['MATERIAL'].astype(object),
+            'CANTIDAD': np.asarray(chunk['CANTIDAD'], dtype=float),
+        })
+        data = data.dropna(subset=['FECHA'])
+        if self.sector is not None:
+            data = data[data['SECTOR'] == self.sector]
+        if data.empty:
+            return self
+
+        # Sectores o materiales vacíos se conservan como None: preprocess_data también los suma
+        for pair in pd.MultiIndex.from_frame(data[['SECTOR', 'MATERIAL']]).unique():
+            self._groups.setdefault(tuple(None if pd.isna(value) else value for value in pair), None)
+
+        grouper = pd.Grouper(key='FECHA', freq=self.resample_frequency)
+        grouped = data.groupby(['SECTOR', 'MATERIAL', grouper], dropna=False)['CANTIDAD']
+        index, chunk_terms = _reduce_groups(grouped, data['CANTIDAD'].to_numpy(), _exact_terms)
+        for (sector, material, month), new_terms in zip(index, chunk_terms):
+            key = (None if pd.isna(sector) else sector, None if pd.isna(material) else material, month)
+            terms = self._terms.setdefault(key, [])
+            terms.extend(new_terms)
+            if len(terms) > self.MAX_TERMS:
+                terms[:] = _exact_terms(terms)
+        return self
+
+    def _monthly(self, pairs):
+        totals = {}
+        for (sector, material, month), terms in self._terms.items():
+            if (sector, material) in pairs:
+                totals.setdefault(month, []).extend(terms)
+
+        if not totals:
+            index = pd.DatetimeIndex([], name='FECHA', freq=self.resample_frequency)
+            return pd.DataFrame({'CANTIDAD': pd.Series(dtype=float, index=index)})
+
+        # Igual que resample(): los meses sin movimientos quedan en cero
+        months = pd.DatetimeIndex(sorted(totals))
+        index = pd.date_range(months.min(), months.max(), freq=self.resample_frequency, name='FECHA')
+        sums = pd.Series([math.fsum(totals[month]) for month in months], index=months, dtype=float)
+        return sums.reindex(index, fill_value=0.0).clip(lower=0).to_frame('CANTIDAD')
+
+    def monthly(self, sector='PRIVADO'):
+        """
+        Serie mensual de un sector (todos los materiales), igual a preprocess_data.
+        Args:
+            sector (str): Sector a consultar.
+        Returns:
+            pd.DataFrame: Columna 'CANTIDAD' indexada por fecha.
+        """
+        return self._monthly({pair for pair in self._groups if pair[0] == sector})
+
+    def monthly_by_group(self, group_by=('MATERIAL',), sector=None):
+        """
+        Series mensuales por grupo, iguales a batch_forecast.monthly_by_group.
+        Args:
+            group_by (tuple): Columnas que definen cada serie ('SECTOR' y/o 'MATERIAL').
+            sector (str): Si se indica, considera solo ese sector.
+        Returns:
+            dict: Clave del grupo (tupla) -> pd.DataFrame con la columna 'CANTIDAD',
+                en el orden en que aparece cada grupo en los datos.
+        """
+        group_by = list(group_by)
+        members = OrderedDict()
+        for sector_name, material in self._groups:
+            if sector is not None and sector_name != sector:
+                continue
+            values = {'SECTOR': sector_name, 'MATERIAL': material}
+            key = tuple(values[column] for column in group_by)
+            if any(value is None for value in key):
+                continue
+            members.setdefault(key, set()).add((sector_name, material))
+        return {key: self._monthly(pairs) for key, pairs in members.items()}
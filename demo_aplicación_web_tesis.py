@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from design import show_logo_and_title, show_instructions, show_faq, show_contact_info
-from model_selector import select_best_model
+from chart_data import comparison_figure
+from design import show_logo_and_title, show_instructions, show_faq, show_contact_info, show_diagnostics
 from side_panels import show_left_panel, show_public_vs_private_demand
+from app_cache import HORIZONS, file_hash, load_upload, load_monthly_series, run_model_selection
 
 # Configuración de la página
 st.set_page_config(page_title="ProyeKTA+", page_icon="📊", layout="wide")
@@ -13,11 +13,13 @@ show_logo_and_title()
 show_instructions()
 
 # Subir y procesar el archivo
-uploaded_file = st.file_uploader("Subir archivo Excel", type=["xlsx"])
+uploaded_file = st.file_uploader("Subir archivo Excel, CSV o Parquet", type=["xlsx", "csv", "parquet"])
 if uploaded_file:
     try:
-        # Leer el archivo Excel
-        data = pd.read_excel(uploaded_file)
+        # Leer el archivo (en caché según su contenido; los Excel se convierten a Parquet)
+        file_bytes = uploaded_file.getvalue()
+        content_hash = file_hash(file_bytes)
+        data = load_upload(content_hash, uploaded_file.name, file_bytes)
         st.success("Archivo cargado exitosamente.")
 
         # Validar columnas requeridas
@@ -26,12 +28,16 @@ if uploaded_file:
             st.error("El archivo no contiene las columnas requeridas. Por favor verifica el formato.")
         else:
             # Seleccionar horizonte
-            horizon = st.selectbox("Selecciona el horizonte de proyección (meses):", [3, 6, 12])
+            horizon = st.selectbox("Selecciona el horizonte de proyección (meses):", list(HORIZONS))
 
-            # Ejecutar selección del mejor modelo
+            # Ejecutar selección del mejor modelo para el horizonte elegido, validado con sus
+            # propios últimos meses; cada horizonte queda en caché (y en el ForecastStore),
+            # así que los reruns y las otras sesiones lo reutilizan mientras no cambie el archivo
+            sector = 'PRIVADO'
             with st.spinner("Calculando las proyecciones..."):
                 try:
-                    results = select_best_model(data, horizon)
+                    monthly_series = load_monthly_series(content_hash, sector, data)
+                    results = run_model_selection(content_hash, sector, horizon, monthly_series)
                     if results:
                         # Mostrar detalles del modelo seleccionado
                         best_model = results['best_model']
@@ -52,26 +58,9 @@ if uploaded_file:
                         # Generar gráficos de comparación
                         if selected_models:
                             st.markdown("### Comparativa de Proyecciones")
-                            fig = go.Figure()
-                            fig.add_trace(go.Scatter(
-                                x=data['FECHA'], y=data['CANTIDAD'], mode='lines',
-                                name='Datos Históricos'
-                            ))
-                            for model in selected_models:
-                                model_results = results['all_results'][model]
-                                fig.add_trace(go.Scatter(
-                                    x=model_results['forecast_dates'],
-                                    y=model_results['forecast'],
-                                    mode='lines+markers',
-                                    name=f"Proyección {model}"
-                                ))
-                            fig.update_layout(
-                                title="Comparación de Modelos de Proyección",
-                                xaxis_title="Fecha",
-                                yaxis_title="Cantidad de Material (m³)",
-                                template="plotly_dark",
-                                hovermode="x"
-                            )
+                            # Historial a la frecuencia de modelación (no una fila por movimiento),
+                            # reducido con LTTB y en WebGL si es muy largo
+                            fig = comparison_figure(monthly_series, results['all_results'], selected_models)
                             st.plotly_chart(fig)
                         else:
                             st.warning("Por favor selecciona al menos un modelo para comparar.")
@@ -91,6 +80,10 @@ if uploaded_file:
                         ])
                         mape_comparison = mape_comparison.sort_values(by="MAPE (%)").reset_index(drop=True)
                         st.table(mape_comparison)
+
+                        # Instrumentación opcional: tiempos, ajustes, fallas y ranking de candidatos
+                        if 'telemetry' in results and st.checkbox("Mostrar diagnóstico de los modelos"):
+                            show_diagnostics(results['telemetry'])
                     else:
                         st.error("No se pudo seleccionar un modelo. Verifica los datos.")
                 except Exception as e:
@@ -98,7 +91,7 @@ if uploaded_file:
     except Exception as e:
         st.error(f"Error al leer el archivo: {e}")
 else:
-    st.info("Sube un archivo Excel para comenzar.")
+    st.info("Sube un archivo Excel, CSV o Parquet para comenzar.")
 
 # Mostrar secciones adicionales
 show_faq()
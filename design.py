@@ -19,7 +19,7 @@ def show_logo_and_title():
 def show_instructions():
     st.markdown(
         "<p style='text-align: center; color: #4E74F4; font-size: 1.2em;'>"
-        "Sube un archivo Excel (.xlsx) con los datos de demanda histórica para obtener una proyección de los próximos 3 meses."
+        "Sube un archivo Excel (.xlsx), CSV o Parquet con los datos de demanda histórica para obtener una proyección de los próximos 3 meses."
         "</p>",
         unsafe_allow_html=True
     )
@@ -98,9 +98,49 @@ def show_contact_info():
         unsafe_allow_html=True
     )
 
-# Ejecución de las funciones de la aplicación
-set_page_config()
-show_logo_and_title()
-show_instructions()
-show_faq()
-show_contact_info()
+# Función para mostrar el panel de diagnóstico de la selección de modelos
+def show_diagnostics(report):
+    """
+    Muestra la instrumentación de una ejecución de select_best_model.
+    Args:
+        report (telemetry.TelemetryReport): Reporte guardado en results['telemetry'].
+    """
+    # pandas se importa solo al mostrar el panel, que es opcional
+    import pandas as pd
+
+    with st.expander("Diagnóstico de la selección de modelos"):
+        st.markdown("**Duración por etapa (s)**")
+        stages = pd.DataFrame([
+            {"Modelo": model or "-", "Etapa": stage, "Segundos": seconds}
+            for (model, stage), seconds in report.stage_seconds().items()
+        ])
+        st.dataframe(stages)
+
+        st.markdown("**Ajustes de candidatos**")
+        summary = pd.DataFrame.from_dict(report.summary(), orient='index')
+        st.dataframe(summary)
+
+        failures = report.failures()
+        if failures:
+            st.markdown("**Fallas por motivo**")
+            st.dataframe(pd.DataFrame([
+                {"Modelo": model, "Motivo": reason, "Cantidad": count}
+                for (model, reason), count in failures.items()
+            ]))
+
+        best = report.leaderboard()
+        if best:
+            st.markdown("**Mejores candidatos (MAPE)**")
+            st.dataframe(pd.DataFrame(best)[['model', 'candidate', 'mape', 'aic', 'seconds', 'iterations']])
+
+        st.download_button("Descargar JSON", report.to_json(), file_name="diagnostico.json", mime="application/json")
+        st.download_button("Descargar Prometheus", report.to_prometheus(), file_name="diagnostico.prom", mime="text/plain")
+
+# Ejecución de las funciones de la aplicación (solo al ejecutar este archivo directamente;
+# al importarlo desde la aplicación o un proceso por lotes no se dibuja nada)
+if __name__ == "__main__":
+    set_page_config()
+    show_logo_and_title()
+    show_instructions()
+    show_faq()
+    show_contact_info()
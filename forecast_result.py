@@ -0,0 +1,99 @@
+# forecast_result.py
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+
+# Claves de los órdenes de cada modelo, las mismas que usaban los diccionarios de resultados
+ORDER_KEYS = {
+    'ARIMA': ('best_order',),
+    'SARIMA': ('order', 'seasonal_order'),
+    'Linear Projection': (),
+}
+
+class ForecastResult(Mapping):
+    """
+    Resultado compacto de un modelo de proyección. Guarda solo arreglos planos
+    (proyección, fechas como datetime64 y el vector de parámetros del ganador) y
+    construye la tabla de resultados recién al pedirla, sin conservarla.
+
+    Se accede como el diccionario que devolvían run_*_projection:
+    result['forecast'], result['forecast_dates'], result['mape'],
+    result['results_table'] y las claves de órdenes del modelo ('best_order' en
+    ARIMA; 'order' y 'seasonal_order' en SARIMA).
+    """
+    __slots__ = ('model', '_forecast', '_dates', 'mape', 'orders', 'params', 'cv_mape')
+
+    def __init__(self, model, forecast, forecast_dates, mape, orders=(), params=None):
+        """
+        Args:
+            model (str): 'ARIMA', 'SARIMA' o 'Linear Projection'.
+            forecast (array-like): Proyección.
+            forecast_dates (array-like): Fechas proyectadas.
+            mape (float): MAPE del modelo.
+            orders (tuple): Órdenes en el orden de ORDER_KEYS[model].
+            params (array-like): Parámetros ajustados del modelo ganador (None si no se conservan).
+        """
+        if len(orders) != len(ORDER_KEYS[model]):
+            raise ValueError(f"{model} espera los órdenes {ORDER_KEYS[model]}.")
+        self.model = model
+        self._forecast = np.asarray(forecast, dtype=float)
+        self._dates = np.asarray(pd.DatetimeIndex(forecast_dates).values)
+        self.mape = float(mape)
+        self.orders = tuple(tuple(order) for order in orders)
+        self.params = None if params is None else np.asarray(params, dtype=float)
+        self.cv_mape = None
+
+    def _keys(self):
+        keys = ('forecast', 'forecast_dates') + ORDER_KEYS[self.model] + ('mape', 'results_table')
+        return keys + (('cv_mape',) if self.cv_mape is not None else ())
+
+    def __getitem__(self, key):
+        if key == 'forecast':
+            return self._forecast
+        if key == 'forecast_dates':
+            return pd.DatetimeIndex(self._dates)
+        if key == 'mape':
+            return self.mape
+        if key == 'results_table':
+            return self.results_table
+        if key == 'cv_mape' and self.cv_mape is not None:
+            return self.cv_mape
+        if key in ORDER_KEYS[self.model]:
+            return self.orders[ORDER_KEYS[self.model].index(key)]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        # Solo el MAPE de validación cruzada se agrega después de crear el resultado
+        if key != 'cv_mape':
+            raise TypeError(f"ForecastResult no admite asignar '{key}'.")
+        self.cv_mape = float(value)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        orders = ' x '.join(str(order) for order in self.orders)
+        return f"ForecastResult({self.model}{' ' + orders if orders else ''}, MAPE={self.mape:.4f}, {len(self._forecast)} meses)"
+
+    @property
+    def results_table(self):
+        """Tabla 'Fecha' / 'Proyección (m³)'; se construye en cada acceso y no se guarda."""
+        return pd.DataFrame({
+            'Fecha': pd.DatetimeIndex(self._dates),
+            'Proyección (m³)': self._forecast
+        })
+
+    def nbytes(self):
+        """Bytes de los arreglos que guarda el resultado."""
+        params = 0 if self.params is None else self.params.nbytes
+        return self._forecast.nbytes + self._dates.nbytes + params
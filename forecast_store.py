@@ -0,0 +1,103 @@
+# forecast_store.py
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from data_preprocessor import series_fingerprint
+
+# Ruta del almacén por defecto; si la variable no está definida no se usa caché persistente
+STORE_ENV_VAR = 'PROYEKTA_FORECAST_STORE'
+
+def _to_jsonable(value):
+    """Convierte tuplas, arreglos y escalares de NumPy a tipos serializables en JSON."""
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if callable(value):
+        return None
+    return value
+
+class ForecastStore:
+    """
+    Caché persistente en SQLite con el modelo ganador de cada búsqueda de órdenes.
+    Cada entrada guarda el alpha de suavización, los órdenes y parámetros ajustados
+    del ganador y el ranking de candidatos, identificada por la huella de la serie
+    mensual, el horizonte y el espacio de búsqueda.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS forecasts ("
+                "key TEXT PRIMARY KEY, model TEXT, fingerprint TEXT, horizon INTEGER, "
+                "payload TEXT, created_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS forecasts_fingerprint ON forecasts (fingerprint)")
+
+    @contextmanager
+    def _connect(self):
+        # Una conexión por operación: el almacén se comparte entre procesos del pool
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def make_key(model, fingerprint, horizon, search_space):
+        """Clave de una búsqueda: modelo, huella de la serie, horizonte y espacio de búsqueda."""
+        description = json.dumps(
+            _to_jsonable({'model': model, 'fingerprint': fingerprint, 'horizon': horizon, 'search_space': search_space}),
+            sort_keys=True
+        )
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Devuelve el contenido guardado para la clave o None si no existe."""
+        with self._connect() as connection:
+            row = connection.execute("SELECT payload FROM forecasts WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, model, fingerprint, horizon, payload):
+        """Guarda (o reemplaza) el resultado de una búsqueda."""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO forecasts (key, model, fingerprint, horizon, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, fingerprint, horizon, json.dumps(_to_jsonable(payload)), time.time())
+            )
+
+    def invalidate(self, fingerprint=None):
+        """Elimina las entradas de una serie (o todas si no se indica huella)."""
+        with self._connect() as connection:
+            if fingerprint is None:
+                connection.execute("DELETE FROM forecasts")
+            else:
+                connection.execute("DELETE FROM forecasts WHERE fingerprint = ?", (fingerprint,))
+
+def default_store():
+    """Almacén indicado por la variable de entorno PROYEKTA_FORECAST_STORE, o None."""
+    path = os.environ.get(STORE_ENV_VAR)
+    return ForecastStore(path) if path else None
+
+def data_fingerprint(data):
+    """Huella de la serie mensual 'CANTIDAD' de un DataFrame indexado por fecha."""
+    return series_fingerprint(data.index, data['CANTIDAD'].to_numpy(dtype=float))
+
+def leaderboard(candidates, search_result, top=20):
+    """Ranking por MAPE de los candidatos ajustados por completo en una búsqueda."""
+    rows = [
+        {'candidate': candidates[i], 'mape': result['mape'], 'aic': result['aic']}
+        for i, result in search_result['results'].items()
+        if result is not None
+    ]
+    return sorted(rows, key=lambda row: row['mape'])[:top]
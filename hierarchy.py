@@ -0,0 +1,288 @@
+# hierarchy.py
+"""
+Proyección jerárquica con conciliación entre niveles (total, sector, material).
+
+El árbol se construye una sola vez: las series del nivel inferior (p. ej.
+SECTOR x MATERIAL) salen de un único groupby (batch_forecast.monthly_by_group)
+y cada nodo agregado es la suma de sus hojas, sin volver a filtrar ni
+resamplear los datos crudos. Cada nodo se proyecta por separado (en paralelo o
+en lote) y las proyecciones base se concilian para que los totales cuadren:
+
+- 'bottom_up': las hojas se suman hacia arriba.
+- 'top_down': el total se reparte según la proporción histórica de cada hoja.
+- 'mint': combinación de mínima traza (Wickramasuriya, Athanasopoulos y Hyndman).
+  Por defecto usa la ponderación estructural (WLS: varianza proporcional al
+  número de hojas de cada nodo). Con covariance_folds > 0 usa la covarianza de
+  los errores a un paso con origen móvil (one_step_errors), encogida hacia su
+  diagonal; cada origen vuelve a proyectar todos los nodos, así que cuesta
+  covariance_folds veces la proyección base.
+
+Ejemplo:
+    tabla = forecast_hierarchy(datos, horizon=3, levels=('SECTOR', 'MATERIAL'), method='mint')
+    tabla = forecast_hierarchy(datos, horizon=3, method='mint', covariance_folds=6)
+"""
+import numpy as np
+import pandas as pd
+from batch_forecast import forecast_series, monthly_by_group
+from data_preprocessor import MonthlySeries
+from multi_horizon import future_dates
+
+METHODS = ('bottom_up', 'top_down', 'mint')
+
+# Etiqueta de los niveles agregados en las tablas de resultados
+TOTAL_LABEL = 'TOTAL'
+
+class Hierarchy:
+    """
+    Árbol de agregación de series mensuales. Los nodos van del total a las hojas
+    y se identifican por tuplas con los valores de los niveles: () es el total,
+    ('PRIVADO',) un sector y ('PRIVADO', 'ARENA') una hoja.
+    """
+
+    def __init__(self, levels, nodes, summing_matrix, values, index):
+        self.levels = tuple(levels)
+        self.nodes = list(nodes)
+        self.summing_matrix = summing_matrix  # (nodos, hojas): 1 si la hoja suma al nodo
+        self.values = values  # (nodos, meses)
+        self.index = index
+
+    @property
+    def n_bottom(self):
+        return self.summing_matrix.shape[1]
+
+    @property
+    def bottom_nodes(self):
+        return self.nodes[-self.n_bottom:]
+
+    def position(self, node):
+        """Fila de un nodo en values y summing_matrix."""
+        return self.nodes.index(tuple(node))
+
+    def frame(self, node):
+        """Serie de un nodo como DataFrame con la columna 'CANTIDAD'."""
+        return pd.DataFrame({'CANTIDAD': self.values[self.position(node)]}, index=self.index.rename('FECHA'))
+
+    def series(self, node, sector='PRIVADO'):
+        """Serie de un nodo como MonthlySeries, para select_best_model y los modelos."""
+        return MonthlySeries(self.index, self.values[self.position(node)], sector)
+
+def build_hierarchy(data, levels=('SECTOR', 'MATERIAL'), sector=None, resample_frequency='MS'):
+    """
+    Construye el árbol con un único groupby sobre el nivel inferior.
+    Args:
+        data (pd.DataFrame): Datos crudos con 'FECHA', 'CANTIDAD' y las columnas de los niveles.
+        levels (tuple): Columnas de los niveles, de la más agregada a la más detallada.
+        sector (str): Si se indica, filtra ese sector antes de agrupar (el total es el del sector).
+        resample_frequency (str): Frecuencia de las series ('MS' o 'M').
+    Returns:
+        Hierarchy: Árbol con todas las series sobre un mismo índice de fechas.
+    """
+    levels = list(levels)
+    bottom = monthly_by_group(data, levels, sector=sector, resample_frequency=resample_frequency)
+    if not bottom:
+        raise ValueError("No hay datos para construir la jerarquía.")
+
+    # Todas las hojas sobre el mismo rango de fechas; los meses sin movimientos quedan en cero
+    start = min(frame.index.min() for frame in bottom.values())
+    end = max(frame.index.max() for frame in bottom.values())
+    index = pd.date_range(start, end, freq=resample_frequency)
+    bottom_keys = list(bottom)
+    bottom_values = np.vstack([bottom[key]['CANTIDAD'].reindex(index, fill_value=0).to_numpy(dtype=float)
+                               for key in bottom_keys])
+
+    # Nodos agregados: cada prefijo de las claves de las hojas, en orden de aparición
+    nodes = []
+    for depth in range(len(levels)):
+        nodes.extend(dict.fromkeys(key[:depth] for key in bottom_keys))
+    nodes.extend(bottom_keys)
+    summing_matrix = np.array([[float(key[:len(node)] == node) for key in bottom_keys] for node in nodes])
+
+    # Cada nodo es la suma de sus hojas
+    values = summing_matrix @ bottom_values
+    return Hierarchy(levels, nodes, summing_matrix, values, index)
+
+def base_forecasts(hierarchy, horizon, model='ARIMA', forecast_options=None, n_jobs=1, min_months=6, precomputed=None):
+    """
+    Proyección independiente de cada nodo (en paralelo o en lote, ver batch_forecast.forecast_series).
+    Los nodos que no se pueden proyectar usan el promedio de sus últimos `horizon` meses.
+    Args:
+        hierarchy (Hierarchy): Árbol de series.
+        horizon (int): Horizonte de proyección (número de meses).
+        model (str): 'ARIMA', 'SARIMA' o 'Linear Projection'.
+        forecast_options (dict): Argumentos adicionales para la función de proyección.
+        n_jobs (int): Número de procesos (1 = secuencial, -1 = todos los núcleos).
+        min_months (int): Meses mínimos para proyectar un nodo.
+        precomputed (dict): Nodo -> resultado ya calculado, con el formato de forecast_series
+            (se usa tal cual y ese nodo no se vuelve a ajustar).
+    Returns:
+        dict: 'forecast' (nodos, horizon), 'dates', 'mape', 'orders' y 'status' por nodo.
+    """
+    precomputed = precomputed or {}
+    pending = [i for i, node in enumerate(hierarchy.nodes) if node not in precomputed]
+    outcomes = dict(zip(pending, forecast_series(
+        [hierarchy.frame(hierarchy.nodes[i]) for i in pending], horizon, model, forecast_options, n_jobs, min_months
+    )))
+    for node, result in precomputed.items():
+        outcomes[hierarchy.position(node)] = (result, 'OK')
+
+    n_nodes = len(hierarchy.nodes)
+    forecast = np.empty((n_nodes, horizon))
+    mape = np.full(n_nodes, np.nan)
+    orders, status = [''] * n_nodes, [''] * n_nodes
+    for i in range(n_nodes):
+        result, status[i] = outcomes[i]
+        if result is None:
+            forecast[i] = hierarchy.values[i, -horizon:].mean()
+            continue
+        forecast[i] = np.asarray(result['Proyección (m³)'], dtype=float)
+        mape[i], orders[i] = result['MAPE'], result['Orden']
+
+    return {
+        'forecast': forecast,
+        'dates': future_dates(hierarchy.index, horizon),
+        'mape': mape,
+        'orders': orders,
+        'status': status,
+    }
+
+def one_step_errors(hierarchy, n_folds=6, model='ARIMA', forecast_options=None, n_jobs=1, min_months=6):
+    """
+    Errores a un paso con origen móvil de cada nodo, para estimar la covarianza de MinT.
+    En cada uno de los últimos n_folds meses el árbol se corta en ese mes, cada nodo se
+    proyecta un mes con los meses anteriores (base_forecasts) y se compara con el valor real;
+    los nodos que no se pueden proyectar usan el valor del mes anterior.
+    Args:
+        hierarchy (Hierarchy): Árbol de series.
+        n_folds (int): Orígenes (meses) evaluados.
+        Los demás argumentos son los de base_forecasts.
+    Returns:
+        np.ndarray: Errores real - proyección (nodos, n_folds).
+    """
+    from cross_validation import rolling_origin_splits
+
+    splits = rolling_origin_splits(len(hierarchy.index), 1, n_folds, min_train=min_months)
+    errors = np.empty((len(hierarchy.nodes), len(splits)))
+    for k, (_, origin, end) in enumerate(splits):
+        # Árbol hasta el mes evaluado inclusive: base_forecasts proyecta su último mes
+        truncated = Hierarchy(hierarchy.levels, hierarchy.nodes, hierarchy.summing_matrix,
+                              hierarchy.values[:, :end], hierarchy.index[:end])
+        base = base_forecasts(truncated, 1, model, forecast_options, n_jobs, min_months)
+        # El respaldo de base_forecasts promediaría el mismo mes evaluado: se usa el mes anterior
+        fallback = np.array([status != 'OK' for status in base['status']])
+        forecast = np.where(fallback, hierarchy.values[:, origin - 1], base['forecast'][:, 0])
+        errors[:, k] = hierarchy.values[:, origin] - forecast
+    return errors
+
+def shrunk_covariance(errors):
+    """
+    Covarianza de los errores encogida hacia su diagonal (Schäfer y Strimmer), como en MinT.
+    Args:
+        errors (np.ndarray): Errores (nodos, observaciones).
+    Returns:
+        np.ndarray: Matriz (nodos, nodos) definida positiva.
+    """
+    x = np.asarray(errors, dtype=float).T
+    n = len(x)
+    covariance = x.T @ x / n
+    variances = np.maximum(np.diag(covariance), np.finfo(float).eps * max(np.diag(covariance).max(), 1.0))
+    if n < 2:
+        return np.diag(variances)
+
+    scaled = x / np.sqrt(variances)
+    # Varianza estimada de cada correlación y correlaciones al cuadrado (fuera de la diagonal)
+    spread = (scaled ** 2).T @ (scaled ** 2) - (scaled.T @ scaled) ** 2 / n
+    spread *= 1 / (n * (n - 1))
+    correlation = covariance / np.sqrt(np.outer(variances, variances))
+    np.fill_diagonal(spread, 0)
+    np.fill_diagonal(correlation, 0)
+    denominator = (correlation ** 2).sum()
+    weight = 1.0 if denominator == 0 else min(max(spread.sum() / denominator, 0.0), 1.0)
+
+    shrunk = (1 - weight) * covariance
+    shrunk[np.diag_indices_from(shrunk)] = variances
+    return shrunk
+
+def reconcile(hierarchy, forecast, method='mint', errors=None):
+    """
+    Concilia proyecciones base para que cada nodo sea la suma de sus hojas.
+    Args:
+        hierarchy (Hierarchy): Árbol de series.
+        forecast (np.ndarray): Proyecciones base (nodos, horizonte).
+        method (str): 'bottom_up', 'top_down' o 'mint'.
+        errors (np.ndarray): Errores a un paso (nodos, observaciones) para MinT, como los de
+            one_step_errors; sin ellos se usa la ponderación estructural (varianza
+            proporcional al número de hojas del nodo).
+    Returns:
+        np.ndarray: Proyecciones conciliadas (nodos, horizonte), no negativas.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método desconocido: {method}. Opciones: {', '.join(METHODS)}")
+
+    summing = hierarchy.summing_matrix
+    forecast = np.asarray(forecast, dtype=float)
+    if method == 'bottom_up':
+        bottom = forecast[-hierarchy.n_bottom:]
+    elif method == 'top_down':
+        # Proporción de los promedios históricos de cada hoja sobre el total
+        history = hierarchy.values
+        total = history[0].mean()
+        shares = history[-hierarchy.n_bottom:].mean(axis=1) / total if total > 0 else np.full(hierarchy.n_bottom, 1 / hierarchy.n_bottom)
+        bottom = np.outer(shares, forecast[0])
+    else:
+        if errors is not None:
+            covariance = shrunk_covariance(errors)
+            if np.linalg.cond(covariance) > 1 / np.finfo(float).eps:
+                # Con muy pocos errores la covarianza puede quedar singular: se usan solo las varianzas
+                covariance = np.diag(np.diag(covariance))
+        else:
+            covariance = np.diag(summing.sum(axis=1))
+        # Hojas = (S' W^-1 S)^-1 S' W^-1 ŷ
+        weighted = np.linalg.solve(covariance, summing)
+        bottom = np.linalg.solve(summing.T @ weighted, weighted.T @ forecast)
+
+    # Sin demanda negativa: se corrigen las hojas y se vuelven a sumar, así los totales siguen cuadrando
+    return summing @ np.maximum(bottom, 0)
+
+def hierarchy_table(hierarchy, base, reconciled):
+    """
+    Tabla larga con una fila por nodo y fecha proyectada.
+    Returns:
+        pd.DataFrame: Columnas de los niveles (TOTAL_LABEL en los niveles agregados), 'Nivel',
+            'Fecha', 'Proyección base (m³)', 'Proyección (m³)', 'Orden', 'MAPE' y 'Estado'.
+    """
+    frames = []
+    for i, node in enumerate(hierarchy.nodes):
+        labels = dict(zip(hierarchy.levels, tuple(node) + (TOTAL_LABEL,) * (len(hierarchy.levels) - len(node))))
+        frames.append(pd.DataFrame({
+            **labels,
+            'Nivel': len(node),
+            'Fecha': base['dates'],
+            'Proyección base (m³)': base['forecast'][i],
+            'Proyección (m³)': reconciled[i],
+            'Orden': base['orders'][i],
+            'MAPE': base['mape'][i],
+            'Estado': base['status'][i],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def forecast_hierarchy(data, horizon=3, levels=('SECTOR', 'MATERIAL'), sector=None, model='ARIMA', method='mint',
+                       forecast_options=None, n_jobs=1, min_months=6, resample_frequency='MS', precomputed=None,
+                       covariance_folds=0):
+    """
+    Proyección conciliada de todos los nodos del árbol.
+    Args:
+        data (pd.DataFrame | Hierarchy): Datos crudos o un árbol ya construido con build_hierarchy.
+        method (str): Conciliación: 'bottom_up', 'top_down' o 'mint'.
+        covariance_folds (int): Con 'mint', orígenes de one_step_errors para estimar la
+            covarianza (0 = ponderación estructural, sin proyecciones adicionales).
+        Los demás argumentos son los de build_hierarchy y base_forecasts.
+    Returns:
+        pd.DataFrame: Ver hierarchy_table.
+    """
+    hierarchy = data if isinstance(data, Hierarchy) else build_hierarchy(data, levels, sector, resample_frequency)
+    base = base_forecasts(hierarchy, horizon, model, forecast_options, n_jobs, min_months, precomputed)
+    errors = None
+    if method == 'mint' and covariance_folds:
+        errors = one_step_errors(hierarchy, covariance_folds, model, forecast_options, n_jobs, min_months)
+    reconciled = reconcile(hierarchy, base['forecast'], method, errors)
+    return hierarchy_table(hierarchy, base, reconciled)
@@ -0,0 +1,198 @@
+# incremental_forecast.py
+"""
+Actualización incremental de proyecciones ARIMA/SARIMA al llegar meses nuevos.
+
+Ejemplo:
+    incremental = IncrementalForecast('SARIMA', horizon=3).fit(serie_mensual)
+    ...
+    incremental.update(serie_mensual_con_el_mes_nuevo)
+    forecast, forecast_dates, order, seasonal_order, mape = incremental.result()
+"""
+import inspect
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_percentage_error
+from arima_model import arima_forecast, restore_arima_model
+from data_preprocessor import MonthlySeries
+from multi_horizon import future_dates
+from sarima_model import ALPHAS, restore_sarima_model, sarima_forecast
+from smoothing import DEFAULT_ALPHAS, find_best_alpha, smooth_series
+
+# Modelo -> (búsqueda completa, reconstrucción con parámetros, grilla de alphas)
+MODELS = {
+    'ARIMA': (arima_forecast, restore_arima_model, DEFAULT_ALPHAS),
+    'SARIMA': (sarima_forecast, restore_sarima_model, ALPHAS),
+}
+
+def _as_frame(data):
+    """DataFrame mensual con 'CANTIDAD' a partir de un DataFrame o una MonthlySeries."""
+    if isinstance(data, MonthlySeries):
+        return data.frame()
+    return data[['CANTIDAD']].astype(float)
+
+class IncrementalForecast:
+    """
+    Mantiene el modelo ganador de una búsqueda y lo actualiza con los meses nuevos
+    sin volver a buscar el alpha ni los órdenes: la suavización se extiende con la
+    misma recursión y los modelos de espacio de estados filtran solo los puntos
+    nuevos (results.extend) con los parámetros ya ajustados.
+
+    La exactitud se vigila con el MAPE móvil de las proyecciones fuera de muestra
+    de cada mes nuevo (hechas antes de conocerlo). Si supera el umbral, o si cambian
+    valores históricos ya incorporados, se repite la búsqueda completa.
+    """
+
+    def __init__(self, model='ARIMA', horizon=3, window=3, tolerance=2.0, min_threshold=0.02, **forecast_options):
+        """
+        Args:
+            model (str): 'ARIMA' o 'SARIMA'.
+            horizon (int): Horizonte de proyección (número de meses).
+            window (int): Meses considerados en el MAPE móvil.
+            tolerance (float): Veces el MAPE de la búsqueda que se tolera antes de volver a buscar.
+            min_threshold (float): Umbral mínimo del MAPE móvil (evita búsquedas por errores ínfimos).
+            **forecast_options: Argumentos de arima_forecast/sarima_forecast para las búsquedas
+                completas (search, search_options, store, n_jobs, ...); los que no acepta la
+                función del modelo elegido lanzan ValueError.
+        """
+        if model not in MODELS:
+            raise ValueError(f"Modelo desconocido: {model}. Opciones: {', '.join(MODELS)}")
+        # Solo las opciones que acepta la búsqueda del modelo (p. ej. 'alpha' y 'orders' son de ARIMA)
+        accepted = set(inspect.signature(MODELS[model][0]).parameters) - {'data', 'horizon', 'return_params'}
+        unknown = sorted(set(forecast_options) - accepted)
+        if unknown:
+            raise ValueError(f"Opciones no válidas para {model}: {', '.join(unknown)}. "
+                             f"Opciones: {', '.join(sorted(accepted))}")
+        self.model = model
+        self.horizon = horizon
+        self.window = window
+        self.tolerance = tolerance
+        self.min_threshold = min_threshold
+        self.forecast_options = forecast_options
+        self.n_searches = 0
+        self.n_updates = 0
+        self.last_action = None
+
+    def fit(self, data):
+        """
+        Búsqueda completa del alpha y de los órdenes sobre toda la serie.
+        Args:
+            data (pd.DataFrame | MonthlySeries): Serie mensual con la columna 'CANTIDAD'.
+        Returns:
+            IncrementalForecast: El mismo objeto, listo para update().
+        """
+        search, restore, alphas = MODELS[self.model]
+        frame = _as_frame(data)
+        if len(frame) < self.horizon + 1:
+            raise ValueError(f"Datos insuficientes para realizar la proyección {self.model}.")
+
+        # La búsqueda devuelve también los parámetros del ganador: no se vuelve a ajustar
+        outcome = search(frame.copy(), self.horizon, return_params=True, **self.forecast_options)
+        self.orders = tuple(outcome[2:-2])
+        self.search_mape = outcome[-2]
+        self.params = np.asarray(outcome[-1], dtype=float)
+        self.threshold = max(self.tolerance * self.search_mape, self.min_threshold)
+
+        # Mismo alpha que eligió la búsqueda (find_best_alpha es determinista y no ajusta modelos)
+        alpha = self.forecast_options.get('alpha')
+        self.alpha = find_best_alpha(frame, alphas=alphas) if alpha is None else alpha
+        smoothed = smooth_series(frame['CANTIDAD'], self.alpha)
+        train = smoothed.iloc[:-self.horizon]
+
+        self._index = frame.index
+        self._values = frame['CANTIDAD'].to_numpy(dtype=float)
+        self._smoothed = smoothed.to_numpy()
+        self._holdout_results = restore(train, *self.orders, self.params)
+        self._full_results = restore(smoothed, *self.orders, self.params)
+        self._forecast = outcome[0]
+        self._forecast_dates = outcome[1]
+        self.mape = self.search_mape
+        self.errors = []
+        self.n_searches += 1
+        self.last_action = 'search'
+        return self
+
+    def rolling_mape(self):
+        """MAPE móvil de las proyecciones fuera de muestra de los últimos meses incorporados."""
+        if not self.errors:
+            return None
+        return float(np.mean(self.errors[-self.window:]))
+
+    def update(self, data):
+        """
+        Incorpora los meses posteriores al último conocido.
+        Args:
+            data (pd.DataFrame | MonthlySeries): Serie mensual completa actualizada, o solo
+                los meses nuevos, con la columna 'CANTIDAD'.
+        Returns:
+            IncrementalForecast: El mismo objeto; last_action indica 'append', 'search' o None.
+        """
+        frame = _as_frame(data)
+        last_date = self._index[-1]
+        new = frame[frame.index > last_date]
+
+        # Si cambió algún mes ya incorporado, el estado guardado deja de ser válido
+        known = frame[frame.index <= last_date]
+        if len(known):
+            stored = pd.Series(self._values, index=self._index).reindex(known.index)
+            if not np.array_equal(stored.to_numpy(), known['CANTIDAD'].to_numpy(dtype=float)):
+                return self.fit(self._merged(frame))
+
+        if new.empty:
+            self.last_action = None
+            return self
+
+        new_values = new['CANTIDAD'].to_numpy(dtype=float)
+        new_smoothed = self._extend_smoothing(new_values)
+
+        # Exactitud fuera de muestra: proyección hecha antes de conocer los meses nuevos,
+        # comparada con el nivel que ya incluye cada mes nuevo (new_smoothed[t] solo llega
+        # hasta el mes anterior y no vería un quiebre en el mes t)
+        predicted = np.asarray(self._full_results.forecast(steps=len(new_values)))
+        levels = self.alpha * new_values + (1.0 - self.alpha) * new_smoothed
+        denominator = np.maximum(np.abs(levels), np.finfo(np.float64).eps)
+        self.errors.extend((np.abs(predicted - levels) / denominator).tolist())
+
+        n_known = len(self._values)
+        self._index = self._index.append(new.index)
+        self._values = np.concatenate([self._values, new_values])
+        self._smoothed = np.concatenate([self._smoothed, new_smoothed])
+        smoothed = pd.Series(self._smoothed, index=self._index)
+
+        if self.rolling_mape() > self.threshold:
+            return self.fit(pd.DataFrame({'CANTIDAD': self._values}, index=self._index))
+
+        # Filtrar solo los puntos nuevos con los parámetros ya ajustados
+        self._full_results = self._full_results.extend(smoothed.iloc[n_known:])
+        self._holdout_results = self._holdout_results.extend(
+            smoothed.iloc[n_known - self.horizon:len(smoothed) - self.horizon]
+        )
+
+        test = smoothed.iloc[-self.horizon:]
+        forecast = self._holdout_results.forecast(steps=self.horizon)
+        self.mape = mean_absolute_percentage_error(test, forecast)
+        self._forecast = np.maximum(forecast, 0)  # Establecer valores negativos en 0
+        self._forecast_dates = future_dates(self._index, self.horizon)
+        self.n_updates += 1
+        self.last_action = 'append'
+        return self
+
+    def _extend_smoothing(self, new_values):
+        # Misma recursión que smoothing.exponential_smoothing, continuada desde el último nivel
+        extended = np.empty(len(new_values))
+        previous_value, previous_level = self._values[-1], self._smoothed[-1]
+        for t, value in enumerate(new_values):
+            extended[t] = self.alpha * previous_value + (1.0 - self.alpha) * previous_level
+            previous_value, previous_level = value, extended[t]
+        return extended
+
+    def _merged(self, frame):
+        known = pd.DataFrame({'CANTIDAD': self._values}, index=self._index)
+        return frame.combine_first(known)[['CANTIDAD']]
+
+    def result(self):
+        """
+        Proyección vigente con el mismo formato que arima_forecast/sarima_forecast.
+        Returns:
+            tuple: (proyección, fechas, órdenes..., MAPE).
+        """
+        return (self._forecast, self._forecast_dates, *self.orders, self.mape)
@@ -0,0 +1,145 @@
+# indicators.py
+"""
+Indicadores económicos (UF, dólar, ...) para los paneles laterales, sin bloquear
+el dibujo de la página.
+
+IndicatorProvider guarda los últimos valores obtenidos y nunca espera a la red:
+get() devuelve de inmediato el valor en memoria (aunque esté vencido) y, si ya
+pasó el TTL, lanza una actualización en un hilo de fondo con un tiempo máximo
+estricto. Si la fuente falla o no responde se sigue mostrando el último valor
+válido.
+
+La fuente es cualquier función sin argumentos que devuelva {indicador: valor}.
+Por defecto se consulta mindicador.cl; con la variable PROYEKTA_INDICATORS_SOURCE
+se puede usar otra URL (p. ej. un servidor de prueba local) o un archivo JSON con
+el mismo formato de la API, para trabajar sin conexión o en pruebas.
+"""
+import json
+import os
+import threading
+import time
+from functools import partial
+
+MINDICADOR_URL = "https://mindicador.cl/api"
+
+# URL o ruta de archivo de la fuente de indicadores; si no está definida se usa mindicador.cl
+SOURCE_ENV_VAR = 'PROYEKTA_INDICATORS_SOURCE'
+
+DEFAULT_TTL = 3600  # Segundos que un valor se considera vigente
+DEFAULT_TIMEOUT = 3.0  # Segundos máximos de una consulta a la fuente
+
+def parse_indicators(data):
+    """
+    Valores de una respuesta con el formato de mindicador.cl.
+    Args:
+        data (dict): Respuesta de la API ({'uf': {'valor': ...}, ...}).
+    Returns:
+        dict: Indicador -> valor.
+    """
+    return {
+        name: float(details['valor'])
+        for name, details in data.items()
+        if isinstance(details, dict) and details.get('valor') is not None
+    }
+
+def fetch_http(url=MINDICADOR_URL, timeout=DEFAULT_TIMEOUT):
+    """Consulta una API con el formato de mindicador.cl, con tiempo máximo."""
+    # requests se importa solo al consultar la red
+    import requests
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()  # Verifica si la solicitud fue exitosa
+    return parse_indicators(response.json())
+
+def fetch_file(path):
+    """Lee los indicadores de un archivo JSON con el formato de mindicador.cl."""
+    with open(path, encoding='utf-8') as file:
+        return parse_indicators(json.load(file))
+
+def source_from_env(timeout=DEFAULT_TIMEOUT):
+    """Fuente indicada en PROYEKTA_INDICATORS_SOURCE (URL o archivo); por defecto mindicador.cl."""
+    location = os.environ.get(SOURCE_ENV_VAR) or MINDICADOR_URL
+    if location.startswith(('http://', 'https://')):
+        return partial(fetch_http, location, timeout)
+    return partial(fetch_file, location)
+
+class IndicatorProvider:
+    """
+    Caché con TTL de los indicadores y actualización en segundo plano.
+    get() nunca consulta la fuente en el hilo que llama.
+    """
+
+    def __init__(self, source, ttl=DEFAULT_TTL):
+        self.source = source
+        self.ttl = ttl
+        self.values = {}
+        self.updated_at = None  # Momento (time.monotonic) de la última actualización exitosa
+        self.last_error = None
+        self._attempted_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        """True si no hay valores o ya pasó el TTL desde la última actualización."""
+        return self.updated_at is None or time.monotonic() - self.updated_at >= self.ttl
+
+    def refresh(self):
+        """Consulta la fuente en el hilo actual; ante un error se conservan los valores anteriores."""
+        try:
+            values = self.source()
+        except Exception as e:
+            with self._lock:
+                self.last_error = e
+                self._refreshing = False
+            return False
+        with self._lock:
+            self.values = dict(values)
+            self.updated_at = time.monotonic()
+            self.last_error = None
+            self._refreshing = False
+        return True
+
+    def refresh_in_background(self):
+        """
+        Lanza una actualización en un hilo de fondo si no hay otra en curso y no se
+        intentó hace poco (tras una falla se reintenta a lo más una vez por minuto).
+        Returns:
+            threading.Thread | None: Hilo lanzado o None si no se lanzó.
+        """
+        now = time.monotonic()
+        with self._lock:
+            recently = self._attempted_at is not None and now - self._attempted_at < min(self.ttl, 60)
+            if self._refreshing or (self.last_error is not None and recently):
+                return None
+            self._refreshing = True
+            self._attempted_at = now
+        thread = threading.Thread(target=self.refresh, name='indicators-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, name):
+        """
+        Valor de un indicador sin esperar a la red: el último valor obtenido (aunque
+        esté vencido) o None si todavía no hay ninguno. Si está vencido se actualiza
+        en segundo plano para las siguientes llamadas.
+        """
+        if self.is_stale():
+            self.refresh_in_background()
+        return self.values.get(name)
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider():
+    """Proveedor compartido por el proceso (sobrevive a las reejecuciones de Streamlit)."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = IndicatorProvider(source_from_env())
+        return _provider
+
+def set_provider(provider):
+    """Reemplaza el proveedor compartido (p. ej. con una fuente local en pruebas)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,503 @@
+# kalman_arima.py
+"""
+Motor ARIMA vectorizado: verosimilitud exacta por filtro de Kalman y proyección
+para muchas series y órdenes candidatos a la vez, con operaciones de NumPy sobre
+lotes en lugar de un objeto de statsmodels por ajuste.
+
+Reproduce la especificación de statsmodels.tsa.arima.model.ARIMA:
+- con d = 0 la serie es una media ('const') más un error ARMA(p, q);
+- con d > 0 se modela la serie diferenciada sin constante;
+- estacionariedad e invertibilidad se imponen con la misma transformación
+  (Jones/Monahan) que usa statsmodels.
+La varianza se concentra fuera de la verosimilitud y el optimizador es un BFGS
+por lotes con gradientes por diferencias centrales, evaluados todos en una sola
+pasada del filtro. Los parámetros devueltos tienen el orden y los nombres de
+statsmodels ('const', 'ar.L1', ..., 'ma.L1', ..., 'sigma2'), así que pueden
+restaurarse con arima_model.restore_arima_model.
+
+Los ajustes no son idénticos bit a bit a los de statsmodels (otro optimizador).
+Los órdenes con términos MA se optimizan desde dos puntos, ceros y la estimación
+de Hannan-Rissanen que usa statsmodels, y se conserva el mejor; así se llega a la
+misma verosimilitud que statsmodels o a una más alta cuando statsmodels queda en
+un máximo local (ver validate_against_statsmodels y test_kalman_arima.py).
+
+Solo cubre ARIMA no estacional: SARIMA se ajusta siempre con statsmodels
+(sarima_model.BACKENDS).
+"""
+import numpy as np
+
+# Tolerancias del optimizador: gradiente de la log-verosimilitud media y mejora relativa mínima
+GTOL = 1e-6
+FTOL = 1e-11
+DEFAULT_MAXITER = 200
+
+# Diferencia relativa de log-verosimilitud por debajo de la cual dos ajustes se consideran el mismo máximo
+_LLF_NOISE = 1e-6
+
+# Pasos de la búsqueda lineal, evaluados todos a la vez
+_LINE_STEPS = 0.5 ** np.arange(0, 16)
+
+def difference(values, d):
+    """Diferencia d veces cada fila de una matriz (series, meses)."""
+    values = np.asarray(values, dtype=float)
+    for _ in range(d):
+        values = values[:, 1:] - values[:, :-1]
+    return values
+
+def constrain_stationary(unconstrained):
+    """
+    Transformación de Jones (1980) / Monahan (1984) fila por fila: coeficientes de un
+    polinomio AR estacionario a partir de valores sin restricción. Igual a
+    statsmodels.tsa.statespace.tools.constrain_stationary_univariate aplicado a cada fila;
+    los ceros finales equivalen a un orden menor.
+    """
+    unconstrained = np.asarray(unconstrained, dtype=float)
+    order = unconstrained.shape[-1]
+    partial = unconstrained / np.sqrt(1 + unconstrained ** 2)
+    y = np.zeros(unconstrained.shape[:-1] + (order, order))
+    for k in range(order):
+        for i in range(k):
+            y[..., k, i] = y[..., k - 1, i] + partial[..., k] * y[..., k - 1, k - i - 1]
+        y[..., k, k] = partial[..., k]
+    return -y[..., order - 1, :]
+
+def unconstrain_stationary(constrained):
+    """Inversa de constrain_stationary (para arrancar desde parámetros conocidos)."""
+    constrained = np.asarray(constrained, dtype=float)
+    order = constrained.shape[-1]
+    y = np.zeros(constrained.shape[:-1] + (order, order))
+    y[..., order - 1, :] = -constrained
+    for k in range(order - 1, 0, -1):
+        partial = y[..., k, k]
+        for i in range(k):
+            y[..., k - 1, i] = (y[..., k, i] - partial * y[..., k, k - i - 1]) / (1 - partial ** 2)
+    partial = np.clip(np.diagonal(y, axis1=-2, axis2=-1), -1 + 1e-12, 1 - 1e-12)
+    return partial / np.sqrt(1 - partial ** 2)
+
+def _system(ar, ma, k_states):
+    """Matrices de transición (lote, r, r) y de selección (lote, r) de la forma de Harvey."""
+    batch = ar.shape[0]
+    transition = np.zeros((batch, k_states, k_states))
+    transition[:, :ar.shape[1], 0] = ar
+    transition[:, np.arange(k_states - 1), np.arange(1, k_states)] = 1.0
+    selection = np.zeros((batch, k_states))
+    selection[:, 0] = 1.0
+    selection[:, 1:ma.shape[1] + 1] = ma
+    return transition, selection
+
+def _stationary_covariance(transition, selection):
+    """Solución de P = T P T' + R R' para cada elemento del lote (varianza de innovación 1)."""
+    batch, k_states, _ = transition.shape
+    kron = np.einsum('bij,bkl->bikjl', transition, transition).reshape(batch, k_states ** 2, k_states ** 2)
+    rhs = np.einsum('bi,bj->bij', selection, selection).reshape(batch, k_states ** 2, 1)
+    with np.errstate(all='ignore'):
+        try:
+            solution = np.linalg.solve(np.eye(k_states ** 2) - kron, rhs)
+        except np.linalg.LinAlgError:
+            # Algún elemento singular: se resuelve uno por uno y se marca como inválido
+            solution = np.full_like(rhs, np.nan)
+            for b in range(batch):
+                try:
+                    solution[b] = np.linalg.solve(np.eye(k_states ** 2) - kron[b], rhs[b])
+                except np.linalg.LinAlgError:
+                    pass
+    covariance = solution.reshape(batch, k_states, k_states)
+    return (covariance + covariance.transpose(0, 2, 1)) / 2
+
+def arma_filter(y, ar, ma):
+    """
+    Filtro de Kalman de un ARMA de media cero para un lote de series del mismo largo,
+    con varianza de innovación 1 (la varianza se concentra después).
+    Args:
+        y (np.ndarray): Matriz (lote, n) de observaciones.
+        ar (np.ndarray), ma (np.ndarray): Coeficientes (lote, p) y (lote, q).
+    Returns:
+        tuple: (suma de v²/F, suma de log F, estado predicho final (lote, r), matriz de transición).
+    """
+    batch, n_obs = y.shape
+    k_states = max(ar.shape[1], ma.shape[1] + 1, 1)
+    transition, selection = _system(ar, ma, k_states)
+    state_noise = np.einsum('bi,bj->bij', selection, selection)
+    covariance = _stationary_covariance(transition, selection)
+    state = np.zeros((batch, k_states))
+
+    sum_squares = np.zeros(batch)
+    sum_log_variance = np.zeros(batch)
+    with np.errstate(all='ignore'):
+        for t in range(n_obs):
+            forecast_variance = covariance[:, 0, 0]
+            error = y[:, t] - state[:, 0]
+            gain = np.einsum('bij,bj->bi', transition, covariance[:, :, 0]) / forecast_variance[:, np.newaxis]
+            sum_squares += error ** 2 / forecast_variance
+            sum_log_variance += np.log(forecast_variance)
+            state = np.einsum('bij,bj->bi', transition, state) + gain * error[:, np.newaxis]
+            covariance = (transition @ covariance @ transition.transpose(0, 2, 1) + state_noise
+                          - np.einsum('bi,bj->bij', gain, gain) * forecast_variance[:, np.newaxis, np.newaxis])
+    return sum_squares, sum_log_variance, state, transition
+
+def _unpack(x, k_ar, k_ma):
+    # Vector sin restricción: [media, AR (k_ar), MA (k_ma)]
+    mean = x[:, 0]
+    ar = constrain_stationary(x[:, 1:1 + k_ar]) if k_ar else np.zeros((len(x), 0))
+    ma = -constrain_stationary(x[:, 1 + k_ar:]) if k_ma else np.zeros((len(x), 0))
+    return mean, ar, ma
+
+def _objective(x, y, k_ar, k_ma):
+    """Menos la log-verosimilitud concentrada media de cada elemento del lote (inf si no es válida)."""
+    mean, ar, ma = _unpack(x, k_ar, k_ma)
+    n_obs = y.shape[1]
+    sum_squares, sum_log_variance, _, _ = arma_filter(y - mean[:, np.newaxis], ar, ma)
+    with np.errstate(all='ignore'):
+        sigma2 = sum_squares / n_obs
+        loglike = -0.5 * n_obs * (np.log(2 * np.pi) + 1 + np.log(sigma2)) - 0.5 * sum_log_variance
+    value = -loglike / n_obs
+    return np.where(np.isfinite(value), value, np.inf)
+
+def _gradient(x, free, y, k_ar, k_ma):
+    """Gradiente por diferencias centrales; todas las perturbaciones van en una sola pasada del filtro."""
+    batch, k_params = x.shape
+    step = np.cbrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(x))
+    shifted = np.repeat(x[np.newaxis], 2 * k_params, axis=0)
+    for j in range(k_params):
+        shifted[2 * j, :, j] += step[:, j]
+        shifted[2 * j + 1, :, j] -= step[:, j]
+    values = _objective(shifted.reshape(-1, k_params), np.tile(y, (2 * k_params, 1)), k_ar, k_ma)
+    values = values.reshape(2 * k_params, batch)
+    with np.errstate(invalid='ignore'):
+        gradient = (values[0::2] - values[1::2]).T / (2 * step)
+    return np.where(free & np.isfinite(gradient), gradient, 0.0)
+
+def minimize_batch(x0, free, y, k_ar, k_ma, maxiter=DEFAULT_MAXITER):
+    """
+    BFGS por lotes: cada elemento tiene su propia aproximación de la Hessiana inversa
+    y se detiene por separado; la búsqueda lineal prueba todos los pasos a la vez.
+    Si la búsqueda lineal falla, el elemento reinicia su Hessiana inversa a la
+    identidad y reintenta en la dirección del gradiente; solo se detiene si
+    también falla ese reintento.
+    Returns:
+        tuple: (parámetros sin restricción, valor del objetivo, iteraciones por elemento).
+    """
+    x = np.where(free, x0, 0.0)
+    batch, k_params = x.shape
+    identity = np.eye(k_params) * (free[:, :, np.newaxis] & free[:, np.newaxis, :])
+    value = _objective(x, y, k_ar, k_ma)
+    gradient = _gradient(x, free, y, k_ar, k_ma)
+    inverse_hessian = identity.copy()
+    # True mientras la Hessiana inversa es la identidad (la dirección es la del gradiente)
+    steepest = np.ones(batch, dtype=bool)
+    iterations = np.zeros(batch, dtype=int)
+    active = np.isfinite(value) & (np.abs(gradient).max(axis=1) > GTOL)
+
+    for _ in range(maxiter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        direction = -np.einsum('bij,bj->bi', inverse_hessian[idx], gradient[idx])
+        slope = np.einsum('bi,bi->b', direction, gradient[idx])
+        # Si la dirección no es de descenso se reinicia con el gradiente
+        reset = slope >= 0
+        direction[reset] = -gradient[idx][reset]
+        slope[reset] = -np.einsum('bi,bi->b', gradient[idx][reset], gradient[idx][reset])
+        inverse_hessian[idx[reset]] = identity[idx[reset]]
+        steepest[idx[reset]] = True
+
+        trial = x[idx][np.newaxis] + _LINE_STEPS[:, np.newaxis, np.newaxis] * direction[np.newaxis]
+        trial_values = _objective(trial.reshape(-1, k_params), np.tile(y[idx], (len(_LINE_STEPS), 1)), k_ar, k_ma)
+        trial_values = trial_values.reshape(len(_LINE_STEPS), len(idx))
+        armijo = trial_values <= value[idx] + 1e-4 * _LINE_STEPS[:, np.newaxis] * slope
+        accepted = armijo.any(axis=0)
+        chosen = np.argmax(armijo, axis=0)
+
+        new_x = trial[chosen, np.arange(len(idx))]
+        new_value = trial_values[chosen, np.arange(len(idx))]
+        new_gradient = _gradient(new_x, free[idx], y[idx], k_ar, k_ma)
+
+        # Actualización BFGS donde se cumple la condición de curvatura
+        s = new_x - x[idx]
+        g = new_gradient - gradient[idx]
+        curvature = np.einsum('bi,bi->b', s, g)
+        update = accepted & (curvature > 1e-12)
+        if update.any():
+            u = np.flatnonzero(update)
+            rho = 1.0 / curvature[u]
+            left = np.eye(k_params) - rho[:, np.newaxis, np.newaxis] * np.einsum('bi,bj->bij', s[u], g[u])
+            updated = left @ inverse_hessian[idx[u]] @ left.transpose(0, 2, 1)
+            updated += rho[:, np.newaxis, np.newaxis] * np.einsum('bi,bj->bij', s[u], s[u])
+            inverse_hessian[idx[u]] = updated
+            steepest[idx[u]] = False
+
+        improvement = value[idx] - new_value
+        x[idx[accepted]] = new_x[accepted]
+        value[idx[accepted]] = new_value[accepted]
+        gradient[idx[accepted]] = new_gradient[accepted]
+        iterations[idx] += 1
+
+        # Búsqueda fallida con la aproximación BFGS: se reintenta con el gradiente
+        retry = ~accepted & ~steepest[idx]
+        inverse_hessian[idx[retry]] = identity[idx[retry]]
+        steepest[idx[retry]] = True
+
+        converged = ((~accepted & ~retry) | (accepted & (np.abs(new_gradient).max(axis=1) <= GTOL))
+                     | (accepted & (improvement <= FTOL * np.maximum(1.0, np.abs(new_value)))))
+        active[idx[converged]] = False
+    return x, value, iterations
+
+def _forecast_arma(state, transition, steps):
+    """Proyección del ARMA de media cero desde el estado predicho final."""
+    forecasts = np.empty((state.shape[0], steps))
+    for h in range(steps):
+        forecasts[:, h] = state[:, 0]
+        state = np.einsum('bij,bj->bi', transition, state)
+    return forecasts
+
+def _integrate(forecast_differences, values, d):
+    """Deshace d diferencias de una proyección a partir de los últimos valores observados."""
+    if d == 0:
+        return forecast_differences
+    levels = [values]
+    for _ in range(d - 1):
+        levels.append(levels[-1][:, 1:] - levels[-1][:, :-1])
+    forecast = forecast_differences
+    for level in reversed(levels):
+        forecast = level[:, -1:] + np.cumsum(forecast, axis=1)
+    return forecast
+
+def _is_stationary(coefficients):
+    """True si el polinomio AR 1 - c1 z - ... - cp z^p tiene sus raíces fuera del círculo unitario."""
+    if len(coefficients) == 0:
+        return True
+    companion = np.eye(len(coefficients), k=-1)
+    companion[0] = coefficients
+    return bool(np.all(np.abs(np.linalg.eigvals(companion)) < 1))
+
+def _css_start(y, p, q, has_mean):
+    """
+    Valores iniciales por mínimos cuadrados condicionales (Hannan-Rissanen), como los
+    de statsmodels: un AR largo estima los errores y luego se regresa y_t en sus
+    rezagos y en los rezagos de esos errores. Returns: (media, AR, MA), o None si la
+    serie es muy corta para estimarlos.
+    """
+    k = 2 * q
+    r = max(k + q, p)
+    if len(y) - r <= p + q + has_mean or len(y) - k <= k:
+        return None
+    mean = y.mean() if has_mean else 0.0
+    y = y - mean
+    lags = lambda series, count, start: np.column_stack([series[start - i:len(series) - i] for i in range(1, count + 1)])
+    residuals = y[k:] - lags(y, k, k) @ np.linalg.pinv(lags(y, k, k)) @ y[k:]
+    regressors = [lags(y, p, r)] if p else []
+    if q:
+        regressors.append(lags(residuals, q, r - k))
+    coefficients = np.linalg.pinv(np.column_stack(regressors)) @ y[r:]
+    ar, ma = coefficients[:p], coefficients[p:]
+    # Como statsmodels, la parte no estacionaria (o no invertible) arranca en cero
+    if not _is_stationary(ar):
+        ar = np.zeros(p)
+    if not _is_stationary(-ma):
+        ma = np.zeros(q)
+    return mean, ar, ma
+
+def _fit_same_differencing(values, orders, steps, maxiter):
+    """Ajusta filas con el mismo d; los órdenes menores se rellenan con coeficientes fijos en cero."""
+    d = orders[0][1]
+    y = difference(values, d)
+    batch, n_obs = y.shape
+    p_orders = np.array([order[0] for order in orders])
+    q_orders = np.array([order[2] for order in orders])
+    k_ar, k_ma = int(p_orders.max()), int(q_orders.max())
+    has_mean = d == 0
+
+    x0 = np.zeros((batch, 1 + k_ar + k_ma))
+    free = np.zeros_like(x0, dtype=bool)
+    if has_mean:
+        x0[:, 0] = y.mean(axis=1)
+        free[:, 0] = True
+    free[:, 1:1 + k_ar] = np.arange(k_ar) < p_orders[:, np.newaxis]
+    free[:, 1 + k_ar:] = np.arange(k_ma) < q_orders[:, np.newaxis]
+
+    maxiter = DEFAULT_MAXITER if maxiter is None else maxiter
+    x, value, iterations = minimize_batch(x0, free, y, k_ar, k_ma, maxiter)
+
+    # Con términos MA la verosimilitud suele tener varios máximos locales: se optimiza
+    # también desde la estimación de Hannan-Rissanen y se conserva el mejor de ambos
+    rows, starts = [], []
+    for b in np.flatnonzero(q_orders > 0):
+        start = _css_start(y[b], p_orders[b], q_orders[b], has_mean)
+        if start is None:
+            continue
+        mean, ar, ma = start
+        row = x0[b].copy()
+        row[0] = mean
+        row[1:1 + p_orders[b]] = unconstrain_stationary(ar) if len(ar) else []
+        row[1 + k_ar:1 + k_ar + q_orders[b]] = unconstrain_stationary(-ma)
+        rows.append(b)
+        starts.append(row)
+    if rows:
+        rows = np.array(rows)
+        x_css, value_css, iterations_css = minimize_batch(np.array(starts), free[rows], y[rows], k_ar, k_ma, maxiter)
+        better = value_css < value[rows]
+        x[rows[better]] = x_css[better]
+        value[rows[better]] = value_css[better]
+        iterations[rows] += iterations_css
+    mean, ar, ma = _unpack(x, k_ar, k_ma)
+    sum_squares, _, state, transition = arma_filter(y - mean[:, np.newaxis], ar, ma)
+    sigma2 = sum_squares / n_obs
+
+    # Con d > 0 statsmodels excluye las observaciones difusas: su llf es la del ARMA diferenciado
+    llf = -value * n_obs
+    forecast = np.empty((batch, 0))
+    if steps:
+        forecast = _integrate(_forecast_arma(state, transition, steps) + mean[:, np.newaxis], values, d)
+
+    params = []
+    names = []
+    for b, (p, _, q) in enumerate(orders):
+        params.append(np.concatenate([[mean[b]] if has_mean else [], ar[b, :p], ma[b, :q], [sigma2[b]]]))
+        names.append((['const'] if has_mean else []) + [f'ar.L{i}' for i in range(1, p + 1)]
+                     + [f'ma.L{i}' for i in range(1, q + 1)] + ['sigma2'])
+    k_params = np.array([len(row) for row in params])
+    return {
+        'params': params,
+        'param_names': names,
+        'llf': llf,
+        'aic': -2 * llf + 2 * k_params,
+        'iterations': iterations,
+        'forecast': forecast,
+    }
+
+def fit_arima_batch(values, orders, steps=0, maxiter=None):
+    """
+    Ajusta un lote de modelos ARIMA: una serie y un orden por fila, todos a la vez.
+    Args:
+        values (array-like): Matriz (filas, meses); todas las series del mismo largo.
+        orders (list | tuple): Un orden (p, d, q) por fila, o uno solo para todas.
+        steps (int): Meses a proyectar tras el final de cada serie.
+        maxiter (int): Límite de iteraciones del optimizador (None = DEFAULT_MAXITER).
+    Returns:
+        dict: Por fila, 'params' y 'param_names' (listas, en el formato de statsmodels),
+            'llf', 'aic' e 'iterations' (arreglos) y 'forecast' (filas, steps).
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    if len(orders) == 3 and all(np.isscalar(item) for item in orders):
+        orders = [tuple(orders)] * len(values)
+    orders = [tuple(int(item) for item in order) for order in orders]
+
+    batch = len(values)
+    fitted = {
+        'params': [None] * batch,
+        'param_names': [None] * batch,
+        'llf': np.full(batch, np.nan),
+        'aic': np.full(batch, np.nan),
+        'iterations': np.zeros(batch, dtype=int),
+        'forecast': np.full((batch, steps), np.nan),
+    }
+    # Cada d tiene su propio largo tras diferenciar: un lote por valor de d
+    for d in sorted({order[1] for order in orders}):
+        rows = [row for row, order in enumerate(orders) if order[1] == d]
+        group = _fit_same_differencing(values[rows], [orders[row] for row in rows], steps, maxiter)
+        for position, row in enumerate(rows):
+            fitted['params'][row] = group['params'][position]
+            fitted['param_names'][row] = group['param_names'][position]
+        for key in ('llf', 'aic', 'iterations', 'forecast'):
+            fitted[key][rows] = group[key]
+    return fitted
+
+def evaluate_arima_candidates(train, test, candidates, maxiter=None):
+    """
+    Evalúa varios órdenes ARIMA sobre una serie, con la misma interfaz que
+    arima_model.evaluate_arima_grid; todos los candidatos se ajustan en un solo lote.
+    Returns:
+        list: Dicts con 'mape', 'aic', 'forecast', 'params', 'param_names' e 'iterations'
+            (o None si el ajuste no es válido), alineados con `candidates`.
+    """
+    if not candidates:
+        return []
+    test = np.asarray(test, dtype=float)
+    train = np.tile(np.asarray(train, dtype=float), (len(candidates), 1))
+    fitted = fit_arima_batch(train, list(candidates), steps=len(test), maxiter=maxiter)
+    mapes = _mape_rows(test, fitted['forecast'])
+
+    results = []
+    for row in range(len(candidates)):
+        if not np.isfinite(mapes[row]) or not np.isfinite(fitted['llf'][row]):
+            results.append(None)
+            continue
+        results.append({
+            'mape': float(mapes[row]),
+            'aic': float(fitted['aic'][row]),
+            'forecast': fitted['forecast'][row],
+            'params': fitted['params'][row],
+            'param_names': fitted['param_names'][row],
+            'iterations': int(fitted['iterations'][row]),
+        })
+    return results
+
+def _mape_rows(actual, forecast):
+    # Misma definición que sklearn.metrics.mean_absolute_percentage_error, por fila
+    denominator = np.maximum(np.abs(actual), np.finfo(np.float64).eps)
+    return np.mean(np.abs(forecast - actual) / denominator, axis=-1)
+
+def batch_arima_forecast(values, horizon, orders, alphas=None):
+    """
+    Versión por lotes de arima_model.arima_forecast: suaviza cada serie con su mejor
+    alpha, ajusta todos los órdenes sobre el entrenamiento de todas las series en un
+    solo lote y elige por serie el orden con menor MAPE en la prueba.
+    Args:
+        values (array-like): Matriz (series, meses) con las cantidades mensuales.
+        horizon (int): Horizonte de proyección (número de meses).
+        orders (list): Órdenes (p, d, q) candidatos.
+        alphas (array-like): Grilla de alphas de la suavización.
+    Returns:
+        dict: 'forecast' (series, horizon), 'order' (lista), 'mape' y 'alpha' por serie;
+            las series sin ningún ajuste válido quedan con NaN y orden None.
+    """
+    from smoothing import batch_smoothing
+
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    best_alphas, smoothed = batch_smoothing(values, alphas)
+    train, test = smoothed[:, :-horizon], smoothed[:, -horizon:]
+
+    n_series, n_orders = len(values), len(orders)
+    fitted = fit_arima_batch(np.repeat(train, n_orders, axis=0), list(orders) * n_series, steps=horizon)
+    mapes = _mape_rows(np.repeat(test, n_orders, axis=0), fitted['forecast']).reshape(n_series, n_orders)
+    mapes = np.where(np.isfinite(mapes) & np.isfinite(fitted['llf']).reshape(n_series, n_orders), mapes, np.inf)
+
+    # Ante empates gana el primero de la grilla, como en order_search
+    best = np.argmin(mapes, axis=1)
+    valid = np.isfinite(mapes[np.arange(n_series), best])
+    forecasts = fitted['forecast'].reshape(n_series, n_orders, horizon)[np.arange(n_series), best]
+    return {
+        'forecast': np.where(valid[:, np.newaxis], np.maximum(forecasts, 0), np.nan),
+        'order': [tuple(orders[b]) if ok else None for b, ok in zip(best, valid)],
+        'mape': np.where(valid, mapes[np.arange(n_series), best], np.nan),
+        'alpha': best_alphas,
+    }
+
+def validate_against_statsmodels(values, order, steps=3, rtol=1e-3):
+    """
+    Compara el ajuste de este motor con statsmodels ARIMA para una serie.
+    Returns:
+        dict: Log-verosimilitud de ambos, su diferencia relativa 'llf_difference'
+            (positiva si este motor alcanza una más alta), mayor diferencia relativa de la
+            proyección, 'ok' si ambas diferencias están dentro de rtol y 'higher_llf' si no
+            coinciden porque este motor encontró un máximo más alto (statsmodels quedó en un
+            máximo local): se informa aparte, no como acuerdo.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    values = np.asarray(values, dtype=float)
+    reference = ARIMA(values, order=order).fit()
+    fitted = fit_arima_batch(values[np.newaxis], [order], steps=steps)
+    forecast = fitted['forecast'][0]
+    expected = np.asarray(reference.forecast(steps=steps))
+    forecast_error = float(np.max(np.abs(forecast - expected) / np.maximum(np.abs(expected), 1e-12)))
+    llf_difference = float((fitted['llf'][0] - reference.llf) / abs(reference.llf))
+    ok = abs(llf_difference) <= rtol and forecast_error <= rtol
+    return {
+        'llf': float(fitted['llf'][0]),
+        'llf_statsmodels': float(reference.llf),
+        'llf_difference': llf_difference,
+        'forecast_error': forecast_error,
+        'ok': ok,
+        'higher_llf': not ok and llf_difference > _LLF_NOISE,
+    }
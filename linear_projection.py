@@ -2,53 +2,22 @@ import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_percentage_error
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+from data_preprocessor import build_monthly_series
+from smoothing import batch_smoothing, find_best_alpha, smooth_series
+import telemetry
+from multi_horizon import future_dates, horizon_mapes, normalize_horizons, split_for_horizons
+from forecast_result import ForecastResult
 
-def preprocess_linear_data(data):
-    """
-    Preprocesar los datos cargados, filtrando por sector privado
-    y resampleando mensualmente.
-    """
-    data['FECHA'] = pd.to_datetime(data['FECHA'], errors='coerce')
-    data = data.dropna(subset=['FECHA'])
-    data = data.set_index('FECHA')
-    data_privado = data[data['SECTOR'] == 'PRIVADO']
-    
-    # Resamplear datos mensuales
-    data_resampled = data_privado[['CANTIDAD']].resample('MS').sum()
-    
-    # Manejo de valores negativos o nulos
-    data_resampled['CANTIDAD'] = data_resampled['CANTIDAD'].clip(lower=0).fillna(0)
-    
-    return data_resampled
-
-def find_best_alpha(data):
-    """
-    Encuentra el mejor valor de alpha para la suavización exponencial
-    basado en el MAPE más bajo.
-    """
-    alphas = np.linspace(0.01, 1.0, 10)
-    best_alpha = None
-    best_mape = float('inf')
-
-    for alpha in alphas:
-        model = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=alpha, optimized=False)
-        fitted_values = model.fittedvalues
-        mape = mean_absolute_percentage_error(data['CANTIDAD'], fitted_values)
-        if mape < best_mape:
-            best_mape = mape
-            best_alpha = alpha
-
-    return best_alpha
-
-def linear_forecast(data, horizon):
+def linear_forecast(data, horizon, return_params=False):
     """
     Realiza proyecciones lineales en base a los datos proporcionados.
-    Devuelve la proyección, las fechas proyectadas y el MAPE asociado.
+    Devuelve la proyección, las fechas proyectadas y el MAPE asociado; con
+    return_params agrega al final (intercepto, pendiente) de la tendencia.
     """
     # Encontrar el mejor alpha para suavización exponencial
-    best_alpha = find_best_alpha(data)
-    data['CANTIDAD_SUAVIZADA'] = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=best_alpha, optimized=False).fittedvalues
+    with telemetry.span('alpha_search', 'Linear Projection'):
+        best_alpha = find_best_alpha(data)
+    data['CANTIDAD_SUAVIZADA'] = smooth_series(data['CANTIDAD'], best_alpha)
 
     # División en conjunto de entrenamiento y prueba
     train = data['CANTIDAD_SUAVIZADA'].iloc[:-horizon]
@@ -60,40 +29,132 @@ def linear_forecast(data, horizon):
 
     # Ajustar el modelo de regresión lineal
     linear_model = LinearRegression()
-    linear_model.fit(train_index, train)
+    with telemetry.span('fit', 'Linear Projection'):
+        linear_model.fit(train_index, train)
 
     # Generar las proyecciones
     forecast = linear_model.predict(test_index)
     forecast = np.maximum(forecast, 0)  # Establecer valores negativos en 0
-    forecast_dates = pd.date_range(start=data.index[-1] + pd.DateOffset(months=1), periods=horizon, freq='M')
+    forecast_dates = future_dates(data.index, horizon)
 
     # Calcular el MAPE
     mape = mean_absolute_percentage_error(test, forecast)
 
+    if return_params:
+        return forecast, forecast_dates, mape, np.array([linear_model.intercept_, linear_model.coef_[0]])
     return forecast, forecast_dates, mape
 
+def linear_forecast_horizons(data, horizons):
+    """
+    Proyecciones lineales para varios horizontes con un solo ajuste sobre la
+    división del horizonte más largo (ver multi_horizon).
+    Returns:
+        dict: Horizonte -> (proyección, fechas, MAPE), como linear_forecast.
+    """
+    horizons = normalize_horizons(horizons)
+    with telemetry.span('alpha_search', 'Linear Projection'):
+        best_alpha = find_best_alpha(data)
+    data['CANTIDAD_SUAVIZADA'] = smooth_series(data['CANTIDAD'], best_alpha)
+    train, test = split_for_horizons(data['CANTIDAD_SUAVIZADA'], horizons)
+
+    train_index = np.arange(len(train)).reshape(-1, 1)
+    test_index = np.arange(len(train), len(train) + len(test)).reshape(-1, 1)
+
+    linear_model = LinearRegression()
+    with telemetry.span('fit', 'Linear Projection'):
+        linear_model.fit(train_index, train)
+    forecast = np.maximum(linear_model.predict(test_index), 0)  # Establecer valores negativos en 0
+
+    mapes = horizon_mapes(test, forecast, horizons)
+    return {h: (forecast[:h], future_dates(data.index, h), mapes[h]) for h in horizons}
+
+def batch_linear_forecast(values, horizon, alphas=None, interval=None):
+    """
+    Proyección lineal de muchas series del mismo largo en una sola operación
+    vectorizada: misma suavización, división y tendencia por mínimos cuadrados que
+    linear_forecast, pero resolviendo todas las pendientes a la vez con NumPy.
+    Args:
+        values (array-like): Matriz (series, meses) con las cantidades mensuales, sin NaN.
+        horizon (int): Horizonte de proyección (número de meses).
+        alphas (array-like): Grilla de alphas de la suavización (por defecto la de find_best_alpha).
+        interval (float): Nivel de los intervalos de predicción de la tendencia, p. ej. 0.95
+            (None = sin intervalos).
+    Returns:
+        dict: 'forecast' (series, horizon) con la proyección, 'mape' y 'alpha' por serie y,
+            con interval, 'lower' y 'upper' (series, horizon).
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n_train = values.shape[1] - horizon
+    if n_train < 2:
+        raise ValueError("Datos insuficientes para realizar la proyección lineal.")
+
+    best_alphas, smoothed = batch_smoothing(values, alphas)
+    train, test = smoothed[:, :n_train], smoothed[:, n_train:]
+
+    # Mínimos cuadrados de cada serie contra el índice temporal, en forma cerrada
+    x = np.arange(n_train, dtype=float)
+    x_centered = x - x.mean()
+    sxx = x_centered @ x_centered
+    train_mean = train.mean(axis=1)
+    slopes = (train - train_mean[:, np.newaxis]) @ x_centered / sxx
+    intercepts = train_mean - slopes * x.mean()
+
+    test_index = np.arange(n_train, n_train + horizon, dtype=float)
+    trend = intercepts[:, np.newaxis] + slopes[:, np.newaxis] * test_index
+    forecast = np.maximum(trend, 0)  # Establecer valores negativos en 0
+
+    denominator = np.maximum(np.abs(test), np.finfo(np.float64).eps)
+    result = {
+        'forecast': forecast,
+        'mape': np.mean(np.abs(forecast - test) / denominator, axis=1),
+        'alpha': best_alphas,
+    }
+
+    if interval is not None:
+        # Intervalo de predicción clásico de la regresión simple (t de Student con n - 2 g.l.)
+        from scipy.stats import t as student_t
+
+        residuals = train - (intercepts[:, np.newaxis] + slopes[:, np.newaxis] * x)
+        dof = n_train - 2
+        sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof) if dof > 0 else np.full(len(values), np.nan)
+        spread = np.sqrt(1 + 1 / n_train + (test_index - x.mean()) ** 2 / sxx)
+        margin = student_t.ppf(0.5 + interval / 2, max(dof, 1)) * sigma[:, np.newaxis] * spread
+        result['lower'] = np.maximum(trend - margin, 0)
+        result['upper'] = np.maximum(trend + margin, 0)
+    return result
+
 def run_linear_projection(data, horizon=3):
     """
     Función principal para ejecutar Proyección Lineal sobre un conjunto de datos.
-    Devuelve las proyecciones y las métricas asociadas.
+    Devuelve un ForecastResult con las proyecciones, las métricas asociadas y
+    los parámetros de la tendencia. Acepta los datos crudos o una MonthlySeries
+    ya preparada.
     """
-    data_processed = preprocess_linear_data(data)  # Usar la nueva función de preprocesamiento
+    with telemetry.span('preprocess', 'Linear Projection'):
+        data_processed = build_monthly_series(data).frame()  # Serie mensual compartida entre modelos
     
     # Validar que haya suficientes datos para realizar la proyección
     if len(data_processed) < horizon + 1:
         raise ValueError("Datos insuficientes para realizar la proyección lineal.")
     
-    forecast, forecast_dates, mape = linear_forecast(data_processed, horizon)
-    
-    # Crear tabla de resultados para integración
-    results_table = pd.DataFrame({
-        'Fecha': forecast_dates,
-        'Proyección (m³)': forecast
-    })
+    forecast, forecast_dates, mape, params = linear_forecast(data_processed, horizon, return_params=True)
+
+    # La tabla de resultados se construye al pedirla (results['results_table'])
+    return ForecastResult('Linear Projection', forecast, forecast_dates, mape, params=params)
+
+def run_linear_projection_horizons(data, horizons=(3, 6, 12)):
+    """
+    Ejecuta la Proyección Lineal para varios horizontes con un solo ajuste.
+    Returns:
+        dict: Horizonte -> resultados con el mismo formato que run_linear_projection.
+    """
+    with telemetry.span('preprocess', 'Linear Projection'):
+        data_processed = build_monthly_series(data).frame()
+
+    if len(data_processed) < max(horizons) + 1:
+        raise ValueError("Datos insuficientes para realizar la proyección lineal.")
 
     return {
-        "forecast": forecast,
-        "forecast_dates": forecast_dates,
-        "mape": mape,
-        "results_table": results_table
+        h: ForecastResult('Linear Projection', forecast, forecast_dates, mape)
+        for h, (forecast, forecast_dates, mape) in linear_forecast_horizons(data_processed, horizons).items()
     }
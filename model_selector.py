@@ -1,71 +1,324 @@
+import importlib
 import pandas as pd
-import plotly.graph_objects as go
-from arima_model import run_arima_projection  # Proyección con ARIMA
-from linear_projection import run_linear_projection  # Proyección Lineal
-from sarima_model import run_sarima_projection  # Proyección con SARIMA
+from data_preprocessor import build_monthly_series  # Preprocesamiento compartido
 import traceback  # Para manejo detallado de errores
+import time
+import telemetry  # Tiempos por etapa, ajustes por candidato y fallas
+import multiprocessing
 
-def select_best_model(data, horizon):
+# Modelos candidatos: (clave en los resultados, nombre para los mensajes, (módulo, función)).
+# Los módulos de cada modelo (statsmodels, scikit-learn) se importan recién al
+# ejecutarlo, así que importar este módulo no los carga.
+MODELS = [
+    ('ARIMA', 'ARIMA', ('arima_model', 'run_arima_projection')),
+    ('Linear Projection', 'Proyección Lineal', ('linear_projection', 'run_linear_projection')),
+    ('SARIMA', 'SARIMA', ('sarima_model', 'run_sarima_projection')),
+]
+
+# Mismos modelos evaluando varios horizontes con una sola búsqueda (ver select_best_model_shared_split)
+MULTI_HORIZON_MODELS = [
+    ('ARIMA', 'ARIMA', ('arima_model', 'run_arima_projection_horizons')),
+    ('Linear Projection', 'Proyección Lineal', ('linear_projection', 'run_linear_projection_horizons')),
+    ('SARIMA', 'SARIMA', ('sarima_model', 'run_sarima_projection_horizons')),
+]
+
+def load_runner(runner):
+    """Función de un modelo: importa su módulo si se indica como (módulo, función)."""
+    if callable(runner):
+        return runner
+    module_name, function_name = runner
+    return getattr(importlib.import_module(module_name), function_name)
+
+def _timed_run(runner, monthly_series, horizon, name=None):
+    """Ejecuta un modelo y mide su duración; se usa también en los procesos de _run_concurrently."""
+    start = time.perf_counter()
+    with telemetry.span('model', name):
+        result = load_runner(runner)(monthly_series, horizon)
+    return result, time.perf_counter() - start
+
+def _timed_run_remote(runner, monthly_series, horizon, name):
+    """_timed_run en un proceso hijo: devuelve además los registros de telemetry del proceso hijo."""
+    with telemetry.collect() as report:
+        try:
+            result, seconds = _timed_run(runner, monthly_series, horizon, name)
+        except Exception as e:
+            # Los registros acompañan a la excepción para no perder el motivo de la falla
+            e.telemetry_records = report.records()
+            raise
+    return result, seconds, report.records()
+
+def _budget_for(time_budget, name):
+    """Presupuesto en segundos de un modelo: número común o diccionario por modelo."""
+    if isinstance(time_budget, dict):
+        return time_budget.get(name)
+    return time_budget
+
+def _run_sequentially(monthly_series, horizon, results, timings, models=MODELS):
+    """Ejecuta los modelos uno tras otro, como en la versión original."""
+    for name, label, runner in models:
+        try:
+            print(f"Ejecutando {label}...")
+            model_results, timings[name] = _timed_run(runner, monthly_series, horizon, name)
+            print(f"Resultado {label}:", model_results)
+            results[name] = model_results
+        except Exception as e:
+            print(f"Error ejecutando {label}: {e}")
+            traceback.print_exc()
+
+def _remote_entry(connection, runner, monthly_series, horizon, name):
+    """Proceso hijo de _run_concurrently: envía por `connection` el resultado o la falla."""
+    try:
+        connection.send(('ok', _timed_run_remote(runner, monthly_series, horizon, name)))
+    except Exception as e:
+        # Solo texto y registros: la excepción misma podría no ser serializable
+        connection.send(('error', (f"{type(e).__name__}: {e}", traceback.format_exc(),
+                                   getattr(e, 'telemetry_records', {}))))
+    finally:
+        connection.close()
+
+def _run_concurrently(monthly_series, horizon, time_budget, results, timings, timed_out, models=MODELS):
+    """
+    Ejecuta todos los modelos a la vez, cada uno en su propio proceso. Los que superan
+    su presupuesto se reportan como vencidos y su proceso se termina con terminate().
+    """
+    start = time.monotonic()
+    context = multiprocessing.get_context()
+    workers = []
+    try:
+        for name, label, runner in models:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_remote_entry, args=(sender, runner, monthly_series, horizon, name),
+                                      daemon=True)
+            process.start()
+            sender.close()
+            workers.append((name, label, process, receiver))
+        print("Ejecutando " + ", ".join(label for _, label, _ in models) + " en paralelo...")
+
+        # Todos parten a la vez, así que cada plazo se mide desde el mismo inicio
+        for name, label, process, receiver in workers:
+            budget = _budget_for(time_budget, name)
+            remaining = None if budget is None else max(0.0, start + budget - time.monotonic())
+            try:
+                if not receiver.poll(remaining):
+                    raise TimeoutError
+                status, payload = receiver.recv()
+            except TimeoutError:
+                process.terminate()
+                timings[name] = time.monotonic() - start
+                timed_out.append(name)
+                telemetry.merge({'spans': [{'stage': 'model', 'model': name, 'status': 'timeout',
+                                            'reason': 'TimeoutError', 'seconds': timings[name]}]})
+                print(f"{label} superó su presupuesto de {budget} s y fue cancelado.")
+                continue
+            except EOFError:
+                # El proceso terminó sin responder (por ejemplo, sin memoria)
+                print(f"Error ejecutando {label}: el proceso terminó con código {process.exitcode}")
+                continue
+            if status == 'ok':
+                model_results, timings[name], records = payload
+                telemetry.merge(records)
+                print(f"Resultado {label}:", model_results)
+                results[name] = model_results
+            else:
+                message, child_traceback, records = payload
+                telemetry.merge(records)
+                print(f"Error ejecutando {label}: {message}")
+                print(child_traceback)
+    finally:
+        # Ningún proceso queda vivo: los que no respondieron a tiempo (o tras un error) se terminan
+        for _, _, process, receiver in workers:
+            receiver.close()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+def select_best_model(data, horizon, concurrent=False, time_budget=None, sector='PRIVADO', cv=None):
     """
     Evalúa múltiples modelos de proyección y selecciona el mejor basado en el MAPE más bajo.
     Args:
-        data (pd.DataFrame): Datos de entrada (con columna 'CANTIDAD').
+        data (pd.DataFrame): Datos de entrada (con columnas 'FECHA', 'SECTOR' y 'CANTIDAD'); no se modifican.
         horizon (int): Horizonte de proyección (número de meses).
+        concurrent (bool): Ejecuta todos los modelos a la vez, cada uno en su propio proceso.
+        time_budget (float | dict): Segundos máximos por modelo (un valor común o
+            {nombre del modelo: segundos}). Requiere concurrent=True.
+        sector (str): Sector a proyectar cuando se reciben datos crudos.
+        cv (dict | bool): Selecciona por el MAPE promedio de una validación cruzada con origen
+            móvil en vez del MAPE de la prueba única; True usa las opciones por defecto y un
+            diccionario se pasa a cross_validation.cross_validate (n_folds, step, window, reuse, n_jobs, reselect).
     Returns:
-        dict: Resultados del modelo seleccionado, incluyendo proyección, MAPE y detalles del modelo.
+        dict: Resultados del modelo seleccionado, incluyendo proyección, MAPE y detalles del modelo,
+            la duración de cada modelo ('timings'), los modelos vencidos ('timed_out') y la
+            instrumentación de la ejecución ('telemetry', un telemetry.TelemetryReport). Con cv,
+            además la validación cruzada ('cv') y el 'cv_mape' de cada modelo.
     """
-    # Diccionario para almacenar resultados
-    results = {}
+    if time_budget is not None and not concurrent:
+        raise ValueError("Los presupuestos de tiempo por modelo requieren concurrent=True.")
+
+    with telemetry.collect() as report:
+        results = _select_best_model(data, horizon, concurrent, time_budget, sector, cv)
+    if results is not None:
+        results['telemetry'] = report
+    return results
+
+def select_best_model_horizons(data, horizons=(3, 6, 12), concurrent=False, time_budget=None, sector='PRIVADO'):
+    """
+    Selecciona el mejor modelo para varios horizontes. Cada horizonte se valida con
+    su propia prueba (sus últimos h meses): los resultados de cada h coinciden con los
+    de select_best_model(data, h) y se reutiliza el ForecastStore.
+    Args:
+        horizons (list): Horizontes de proyección (número de meses).
+        Los demás argumentos son los de select_best_model.
+    Returns:
+        dict: Horizonte -> resultados con el mismo formato que select_best_model; los
+            horizontes que no se pudieron seleccionar no aparecen.
+    """
+    if time_budget is not None and not concurrent:
+        raise ValueError("Los presupuestos de tiempo por modelo requieren concurrent=True.")
 
-    # Proyección con ARIMA
     try:
-        print("Ejecutando ARIMA...")
-        arima_results = run_arima_projection(data, horizon)
-        print("Resultado ARIMA:", arima_results)
-        results['ARIMA'] = arima_results
+        monthly_series = build_monthly_series(data, sector=sector)
     except Exception as e:
-        print(f"Error ejecutando ARIMA: {e}")
+        print(f"Error preprocesando los datos: {e}")
         traceback.print_exc()
+        return None
+    selections = {}
+    for h in sorted(set(horizons)):
+        selection = select_best_model(monthly_series, h, concurrent, time_budget, sector)
+        if selection is not None:
+            selections[h] = selection
+    return selections or None
 
-    # Proyección con Proyección Lineal
+def select_best_model_shared_split(data, horizons=(3, 6, 12), concurrent=False, time_budget=None, sector='PRIVADO'):
+    """
+    Aproximación de select_best_model_horizons con una sola búsqueda por modelo: todos
+    los horizontes comparten la división del horizonte más largo y cada uno elige su
+    ganador con el MAPE de los primeros h meses (ver multi_horizon).
+    Quedó fuera del alcance de la aplicación: para h < max(horizons) la proyección son
+    los primeros h meses de una prueba que termina antes del último dato, no usa el
+    ForecastStore y requiere al menos max(horizons) + 1 meses. Se conserva para medir
+    su costo frente a la validación por horizonte (benchmark.py --shared-split).
+    Args:
+        horizons (list): Horizontes de proyección (número de meses).
+        Los demás argumentos son los de select_best_model.
+    Returns:
+        dict: Horizonte -> resultados con el mismo formato que select_best_model; los
+            tiempos ('timings') y la instrumentación ('telemetry') son los de la ejecución común.
+    """
+    if time_budget is not None and not concurrent:
+        raise ValueError("Los presupuestos de tiempo por modelo requieren concurrent=True.")
+
+    horizons = tuple(sorted(set(horizons)))
     try:
-        print("Ejecutando Proyección Lineal...")
-        linear_results = run_linear_projection(data, horizon)
-        print("Resultado Proyección Lineal:", linear_results)
-        results['Linear Projection'] = linear_results
+        monthly_series = build_monthly_series(data, sector=sector)
     except Exception as e:
-        print(f"Error ejecutando Proyección Lineal: {e}")
+        print(f"Error preprocesando los datos: {e}")
         traceback.print_exc()
+        return None
+    if len(monthly_series) < max(horizons) + 1:
+        print(f"Datos insuficientes para la división común: se requieren {max(horizons) + 1} meses.")
+        return None
+
+    with telemetry.collect() as report:
+        outcome = _run_models(monthly_series, horizons, concurrent, time_budget, sector, MULTI_HORIZON_MODELS)
+    if outcome is None:
+        return None
+
+    results, timings, timed_out, _ = outcome
+    selections = {}
+    for h in horizons:
+        horizon_results = {name: model_results[h] for name, model_results in results.items() if h in model_results}
+        selection = _best_of(horizon_results, timings, timed_out, label=f" (horizonte {h})")
+        if selection is not None:
+            selection['telemetry'] = report
+            selections[h] = selection
+    return selections or None
+
+def _select_best_model(data, horizon, concurrent, time_budget, sector, cv=None):
+    """Cuerpo de select_best_model, ejecutado con la instrumentación activa."""
+    outcome = _run_models(data, horizon, concurrent, time_budget, sector, MODELS)
+    if outcome is None:
+        return None
+    results, timings, timed_out, monthly_series = outcome
+    if cv is None or cv is False or not results:
+        return _best_of(results, timings, timed_out)
+
+    # Validación cruzada: alpha y órdenes se vuelven a elegir con los meses previos a los pliegues
+    from cross_validation import cross_validate
 
-    # Proyección con SARIMA
+    options = {} if cv is True else dict(cv)
     try:
-        print("Ejecutando SARIMA...")
-        sarima_results = run_sarima_projection(data, horizon)
-        print("Resultado SARIMA:", sarima_results)
-        results['SARIMA'] = sarima_results
+        cv_results = cross_validate(monthly_series, horizon, results, **options)
     except Exception as e:
-        print(f"Error ejecutando SARIMA: {e}")
+        print(f"Error en la validación cruzada; se usa la prueba única: {e}")
         traceback.print_exc()
+        return _best_of(results, timings, timed_out)
 
+    for model_name, cv_mape in cv_results['mean'].items():
+        results[model_name]['cv_mape'] = cv_mape
+    selection = _best_of(results, timings, timed_out, key='cv_mape')
+    if selection is not None:
+        selection['cv'] = cv_results
+    return selection
+
+def _run_models(data, horizon, concurrent, time_budget, sector, models):
+    """
+    Preprocesa los datos una vez y ejecuta los modelos indicados.
+    Returns:
+        tuple: (resultados por modelo, segundos por modelo, modelos vencidos, serie mensual),
+            o None si falla el preprocesamiento.
+    """
+    # Diccionario para almacenar resultados
+    results = {}
+    timings = {}
+    timed_out = []
+
+    # Preprocesar una sola vez; todos los modelos consumen la misma serie inmutable
+    try:
+        with telemetry.span('preprocess'):
+            monthly_series = build_monthly_series(data, sector=sector)
+    except Exception as e:
+        print(f"Error preprocesando los datos: {e}")
+        traceback.print_exc()
+        return None
+
+    if concurrent:
+        _run_concurrently(monthly_series, horizon, time_budget, results, timings, timed_out, models)
+    else:
+        _run_sequentially(monthly_series, horizon, results, timings, models)
+    return results, timings, timed_out, monthly_series
+
+def _best_of(results, timings, timed_out, label='', key='mape'):
+    """
+    Elige el modelo con menor error y arma el diccionario que devuelve select_best_model.
+    `key` es la métrica usada: 'mape' (prueba única) o 'cv_mape' (validación cruzada).
+    """
     # Verificar si al menos un modelo se ejecutó correctamente
     if not results:
-        print("No se pudo ejecutar ningún modelo. Verifica los datos y parámetros.")
+        print(f"No se pudo ejecutar ningún modelo{label}. Verifica los datos y parámetros.")
         return None
 
-    # Imprimir MAPEs para cada modelo
-    print("\nMAPE de cada modelo:")
+    # Imprimir MAPEs y tiempos para cada modelo
+    print(f"\nMAPE de cada modelo{label}:")
     for model_name, details in results.items():
-        print(f"- MAPE de {model_name}: {details['mape']:.2%}")
+        cv_text = f", validación cruzada {details['cv_mape']:.2%}" if 'cv_mape' in details else ""
+        print(f"- MAPE de {model_name}: {details['mape']:.2%}{cv_text} ({timings[model_name]:.1f} s)")
 
-    # Seleccionar el modelo con menor MAPE
-    best_model = min(results, key=lambda x: results[x]['mape'])
+    # Seleccionar el modelo con menor error; los modelos sin error válido quedan al final
+    best_model = min(results, key=lambda x: _error_or_inf(results[x].get(key)))
 
     return {
         'best_model': best_model,
         'details': results[best_model],
-        'all_results': results  # Todos los resultados para análisis posterior
+        'all_results': results,  # Todos los resultados para análisis posterior
+        'timings': timings,  # Segundos por modelo
+        'timed_out': timed_out  # Modelos cancelados por superar su presupuesto
     }
 
+def _error_or_inf(error):
+    """Error para ordenar; los ausentes o NaN (pliegues fallidos) cuentan como infinito."""
+    return float('inf') if error is None or error != error else error
+
 def generate_graph(data, selected_models, all_results):
     """
     Genera un gráfico interactivo de los datos históricos y las proyecciones seleccionadas.
@@ -96,6 +349,9 @@ def generate_graph(data, selected_models, all_results):
         st.error("La columna 'CANTIDAD' no está disponible en los datos.")
         return None
 
+    # Plotly se importa solo al graficar, para no cargarlo en ejecuciones por lotes
+    import plotly.graph_objects as go
+
     # Crear figura del gráfico
     fig = go.Figure()
 
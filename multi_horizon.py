@@ -0,0 +1,70 @@
+# multi_horizon.py
+"""
+Evaluación de varios horizontes con una sola búsqueda por modelo.
+
+Todos los horizontes comparten la división entrenamiento/prueba del horizonte
+más largo: cada candidato se ajusta una vez, proyecta max(horizons) meses y su
+MAPE para el horizonte h se calcula sobre los primeros h meses de esa misma
+proyección. Así, evaluar 3, 6 y 12 meses cuesta lo mismo que evaluar 12.
+
+Es una aproximación: para h < max(horizons) la proyección corresponde a meses
+que terminan antes del último dato y la serie necesita max(horizons) + 1 meses.
+Por eso la aplicación y model_selector.select_best_model_horizons validan cada
+horizonte con sus propios últimos h meses; esta evaluación solo se usa en
+model_selector.select_best_model_shared_split, que se mide en benchmark.py.
+"""
+import numpy as np
+import pandas as pd
+from smoothing import batch_mape
+
+def normalize_horizons(horizons):
+    """Horizontes únicos y ordenados; valida que sean enteros positivos."""
+    horizons = sorted({int(h) for h in horizons})
+    if not horizons or horizons[0] < 1:
+        raise ValueError("Los horizontes deben ser enteros positivos.")
+    return horizons
+
+def split_for_horizons(series, horizons):
+    """
+    División común entrenamiento/prueba para todos los horizontes.
+    Returns:
+        tuple: (train, test) donde test tiene el largo del horizonte más largo.
+    """
+    longest = max(horizons)
+    return series.iloc[:-longest], series.iloc[-longest:]
+
+def horizon_mapes(test, forecast, horizons):
+    """
+    MAPE de una proyección para cada horizonte, sobre sus primeros h meses.
+    Returns:
+        dict: Horizonte -> MAPE.
+    """
+    actual = np.asarray(test, dtype=float)
+    forecast = np.asarray(forecast, dtype=float)
+    return {h: float(batch_mape(actual[:h], forecast[:h])) for h in horizons}
+
+def best_per_horizon(results, test, horizons):
+    """
+    Mejor candidato de cada horizonte entre los ajustes completos de una búsqueda.
+    Args:
+        results (dict): Índice del candidato -> resultado con 'forecast' (o None si falló).
+        test (pd.Series): Conjunto de prueba común.
+        horizons (list): Horizontes a evaluar.
+    Returns:
+        dict: Horizonte -> (índice del ganador, MAPE); ante empates gana el primero de la grilla.
+    """
+    best = {}
+    for i in sorted(results):
+        if results[i] is None:
+            continue
+        for h, mape in horizon_mapes(test, results[i]['forecast'], horizons).items():
+            if not np.isnan(mape) and (h not in best or mape < best[h][1]):
+                best[h] = (i, mape)
+    return best
+
+def future_dates(index, horizon):
+    """Fechas de fin de mes proyectadas a continuación del último mes de la serie."""
+    # Mismas fechas que date_range(freq='M'), obsoleto desde pandas 2.2, cuyo reemplazo
+    # 'ME' no existe en versiones anteriores; los períodos mensuales sirven en ambas
+    months = pd.period_range(pd.Timestamp(index[-1]).to_period('M') + 1, periods=horizon, freq='M')
+    return months.to_timestamp(how='end').normalize()
@@ -0,0 +1,227 @@
+# order_search.py
+import math
+
+STRATEGIES = ('exhaustive', 'aic_topk', 'stepwise', 'halving', 'warm_start')
+
+# Iteraciones máximas de cada ajuste en caliente de la estrategia warm_start
+WARM_ITER = 15
+
+def _flatten(candidate):
+    """Convierte un candidato anidado, p. ej. ((p, d, q), (P, D, Q, s)), en una tupla plana."""
+    if isinstance(candidate, tuple):
+        return tuple(value for item in candidate for value in _flatten(item))
+    return (candidate,)
+
+def _aic(result):
+    """AIC de un resultado; los ajustes fallidos o sin AIC válido quedan al final del ranking."""
+    if result is None or result.get('aic') is None or math.isnan(result['aic']):
+        return float('inf')
+    return result['aic']
+
+def _rank_by_aic(indices, results):
+    """Ordena índices por AIC creciente; los empates se resuelven por posición en la grilla."""
+    return sorted(indices, key=lambda i: (_aic(results[i]), i))
+
+def nearest_candidate(candidate, fitted, group_key=None, group_penalty=4):
+    """
+    Candidato ya ajustado más cercano a `candidate`: menor suma de diferencias entre
+    sus órdenes, sumando group_penalty si cambian los órdenes de diferenciación
+    (group_key). Ante empates gana el ajustado primero.
+    """
+    target = _flatten(candidate)
+    group = group_key(candidate) if group_key else None
+
+    def distance(other):
+        penalty = group_penalty if group_key and group_key(other) != group else 0
+        return sum(abs(a - b) for a, b in zip(_flatten(other), target)) + penalty
+
+    return min(fitted, key=distance)
+
+def warm_start_params(param_names, neighbour):
+    """
+    Parámetros iniciales para un modelo con `param_names` a partir de un vecino
+    ajustado (param_names, params): los términos compartidos se copian por nombre
+    y los nuevos parten en cero.
+    """
+    names, params = neighbour
+    by_name = dict(zip(names, params))
+    return [float(by_name.get(name, 0.0)) for name in param_names]
+
+def _exhaustive(candidates, evaluate, **options):
+    """Ajusta completamente todos los candidatos."""
+    indices = list(range(len(candidates)))
+    return indices, evaluate(candidates), 0
+
+def _aic_topk(candidates, evaluate, top_k=5, proxy_iter=5, **options):
+    """
+    Ajusta todos los candidatos con pocas iteraciones del optimizador, los ordena
+    por AIC y solo reajusta por completo los top_k mejores.
+    """
+    cheap = evaluate(candidates, maxiter=proxy_iter)
+    ranked = [i for i in _rank_by_aic(range(len(candidates)), cheap) if cheap[i] is not None]
+    finalists = sorted(ranked[:top_k])
+    full = evaluate([candidates[i] for i in finalists])
+    return finalists, full, len(candidates)
+
+def _halving(candidates, evaluate, top_k=5, proxy_iter=2, eta=4, **options):
+    """
+    Successive halving: en cada ronda se conserva la fracción 1/eta de candidatos
+    con menor AIC y se multiplica por eta el presupuesto de iteraciones, hasta
+    quedar con top_k candidatos que se ajustan por completo.
+    """
+    alive = list(range(len(candidates)))
+    budget = proxy_iter
+    n_proxy_fits = 0
+    while len(alive) > top_k:
+        partial = evaluate([candidates[i] for i in alive], maxiter=budget)
+        n_proxy_fits += len(alive)
+        results = dict(zip(alive, partial))
+        ranked = [i for i in _rank_by_aic(alive, results) if results[i] is not None]
+        alive = sorted(ranked[:max(top_k, math.ceil(len(alive) / eta))])
+        budget *= eta
+
+    full = evaluate([candidates[i] for i in alive])
+    return alive, full, n_proxy_fits
+
+def _stepwise(candidates, evaluate, group_key=None, start=None, max_steps=50, **options):
+    """
+    Búsqueda stepwise al estilo de auto_arima: dentro de cada combinación de
+    órdenes de diferenciación parte del candidato más cercano a `start` y se
+    desplaza al vecino (un orden ±1) con menor AIC mientras este mejore.
+    """
+    flat = [_flatten(candidate) for candidate in candidates]
+    groups = {}
+    for i, candidate in enumerate(candidates):
+        groups.setdefault(group_key(candidate) if group_key else None, []).append(i)
+
+    results = {}
+
+    def fit(indices):
+        pending = [i for i in indices if i not in results]
+        if pending:
+            results.update(zip(pending, evaluate([candidates[i] for i in pending])))
+
+    for members in groups.values():
+        if start is None:
+            current = members[0]
+        else:
+            target = _flatten(start)
+            current = min(members, key=lambda i: (sum(abs(a - b) for a, b in zip(flat[i], target)), i))
+        fit([current])
+
+        for _ in range(max_steps):
+            neighbours = [
+                i for i in members
+                if sum(abs(a - b) for a, b in zip(flat[i], flat[current])) == 1
+            ]
+            fit(neighbours)
+            best = _rank_by_aic(neighbours, results)[0] if neighbours else current
+            if _aic(results[best]) >= _aic(results[current]):
+                break
+            current = best
+
+    visited = sorted(results)
+    return visited, [results[i] for i in visited], 0
+
+def _warm_start(candidates, evaluate, top_k=5, warm_iter=WARM_ITER, **options):
+    """
+    Ajusta toda la grilla partiendo cada optimización desde los parámetros del
+    vecino ya ajustado más cercano, con a lo más warm_iter iteraciones (statsmodels
+    usa 50 en un ajuste normal), y confirma los top_k de menor MAPE con ajustes
+    normales. Es una aproximación: el orden por MAPE de los ajustes truncados no es
+    el de los ajustes completos, así que el ganador puede diferir del de la búsqueda
+    exhaustiva (compare_with_exhaustive mide la diferencia). Más warm_iter o top_k
+    la acercan a la exhaustiva a cambio de tiempo.
+    """
+    warm = evaluate(candidates, maxiter=warm_iter, warm_start=True)
+    ranked = sorted((i for i in range(len(candidates)) if warm[i] is not None), key=lambda i: (warm[i]['mape'], i))
+    finalists = sorted(ranked[:top_k])
+    full = evaluate([candidates[i] for i in finalists])
+    return finalists, full, len(candidates)
+
+_SEARCHES = {
+    'exhaustive': _exhaustive,
+    'aic_topk': _aic_topk,
+    'stepwise': _stepwise,
+    'halving': _halving,
+    'warm_start': _warm_start,
+}
+
+def search_orders(candidates, evaluate, strategy='exhaustive', **options):
+    """
+    Busca el candidato con menor MAPE usando la estrategia indicada.
+    Args:
+        candidates (list): Candidatos en el orden de la grilla original.
+        evaluate (callable): evaluate(candidates, maxiter=None, warm_start=False) devuelve
+            una lista alineada de dicts con 'mape', 'aic' y opcionalmente 'iterations'
+            (o None si el ajuste falla). Con maxiter se espera un ajuste barato, usado solo
+            para ordenar; con warm_start cada ajuste parte del vecino ya ajustado más cercano.
+        strategy (str): 'exhaustive', 'aic_topk', 'stepwise', 'halving' o 'warm_start'.
+        **options: top_k, proxy_iter, eta, group_key, start, max_steps, warm_iter según la estrategia.
+    Returns:
+        dict: 'best' (índice del ganador o None), 'results' (índice -> resultado de los
+            ajustes completos), 'n_fits' (ajustes completos), 'n_proxy_fits'
+            (ajustes baratos o en caliente) y 'n_iterations' (iteraciones del optimizador
+            en todos los ajustes).
+    """
+    if strategy not in _SEARCHES:
+        raise ValueError(f"Estrategia de búsqueda desconocida: {strategy}. Opciones: {', '.join(STRATEGIES)}")
+
+    n_iterations = 0
+
+    def counted_evaluate(subset, **kwargs):
+        nonlocal n_iterations
+        subset_results = evaluate(subset, **kwargs)
+        n_iterations += sum(result.get('iterations') or 0 for result in subset_results if result is not None)
+        return subset_results
+
+    indices, full, n_proxy_fits = _SEARCHES[strategy](candidates, counted_evaluate, **options)
+    results = dict(zip(indices, full))
+
+    # Menor MAPE entre los ajustes completos; ante empates gana el primero de la grilla
+    best = None
+    for i in sorted(results):
+        if results[i] is not None and (best is None or results[i]['mape'] < results[best]['mape']):
+            best = i
+
+    return {
+        'best': best,
+        'results': results,
+        'n_fits': len(indices),
+        'n_proxy_fits': n_proxy_fits,
+        'n_iterations': n_iterations,
+    }
+
+def compare_with_exhaustive(candidates, evaluate, strategy, **options):
+    """
+    Ejecuta la estrategia indicada y la búsqueda exhaustiva sobre los mismos
+    candidatos, y reporta la reducción de ajustes, las iteraciones del optimizador
+    ahorradas y la diferencia de MAPE.
+    Returns:
+        dict: Ajustes, iteraciones y MAPE de ambas búsquedas, 'fit_reduction' (ajustes
+            de la exhaustiva por cada ajuste de la estrategia, contando los de la
+            aproximación barata), 'full_fit_reduction' (solo los ajustes completos),
+            'iterations_saved' y 'mape_delta'.
+    """
+    exhaustive = search_orders(candidates, evaluate, 'exhaustive')
+    searched = search_orders(candidates, evaluate, strategy, **options)
+
+    def best_mape(search):
+        return search['results'][search['best']]['mape'] if search['best'] is not None else float('inf')
+
+    return {
+        'strategy': strategy,
+        'n_fits': searched['n_fits'],
+        'n_proxy_fits': searched['n_proxy_fits'],
+        'n_fits_exhaustive': exhaustive['n_fits'],
+        'fit_reduction': exhaustive['n_fits'] / max(searched['n_fits'] + searched['n_proxy_fits'], 1),
+        'full_fit_reduction': exhaustive['n_fits'] / max(searched['n_fits'], 1),
+        'n_iterations': searched['n_iterations'],
+        'n_iterations_exhaustive': exhaustive['n_iterations'],
+        'iterations_saved': exhaustive['n_iterations'] - searched['n_iterations'],
+        'mape': best_mape(searched),
+        'mape_exhaustive': best_mape(exhaustive),
+        'mape_delta': best_mape(searched) - best_mape(exhaustive),
+        'same_candidate': (searched['best'] is not None and exhaustive['best'] is not None
+                           and candidates[searched['best']] == candidates[exhaustive['best']]),
+    }
@@ -0,0 +1,104 @@
+# plotting.py
+"""
+Gráficos opcionales de las proyecciones, separados del cálculo.
+
+Las funciones run_*_projection solo calculan; para ver el resultado se pide la
+figura explícitamente:
+
+    result = run_sarima_projection(datos, 3)
+    fig = plot_forecast(datos, {'SARIMA': result})                        # Plotly
+    fig = plot_forecast(datos, {'SARIMA': result}, backend='matplotlib')
+
+Plotly y matplotlib se importan solo al graficar. Con matplotlib se crea una
+Figure sin pyplot: no se abre ninguna ventana ni se bloquea el proceso, y la
+figura se guarda con fig.savefig(...) o se muestra con st.pyplot(fig).
+"""
+import importlib
+from data_preprocessor import build_monthly_series
+from smoothing import find_best_alpha, smooth_series
+
+BACKENDS = ('plotly', 'matplotlib')
+
+# Grilla de alphas de la suavización de cada modelo (módulo, atributo); el resto usa la por defecto
+SMOOTHING_ALPHAS = {
+    'SARIMA': ('sarima_model', 'ALPHAS'),
+}
+
+def smoothed_history(data, model=None, sector='PRIVADO'):
+    """
+    Serie mensual y su versión suavizada, con el mismo alpha que elige el modelo.
+    Args:
+        data (pd.DataFrame | MonthlySeries): Datos crudos o una serie ya preparada.
+        model (str): Modelo cuya grilla de alphas se usa (None = grilla por defecto).
+        sector (str): Sector a graficar cuando se reciben datos crudos.
+    Returns:
+        pd.DataFrame: Columnas 'CANTIDAD' y 'CANTIDAD_SUAVIZADA' con índice mensual.
+    """
+    frame = build_monthly_series(data, sector=sector).frame()
+    alphas = None
+    if model in SMOOTHING_ALPHAS:
+        module_name, attribute = SMOOTHING_ALPHAS[model]
+        alphas = getattr(importlib.import_module(module_name), attribute)
+    frame['CANTIDAD_SUAVIZADA'] = smooth_series(frame['CANTIDAD'], find_best_alpha(frame, alphas=alphas))
+    return frame
+
+def plot_forecast(data, results, backend='plotly', title=None, sector='PRIVADO'):
+    """
+    Gráfico de la demanda mensual suavizada y de las proyecciones indicadas.
+    Args:
+        data (pd.DataFrame | MonthlySeries): Datos crudos o la serie usada en la proyección.
+        results (dict): Nombre del modelo -> resultado de run_*_projection
+            (con 'forecast' y 'forecast_dates').
+        backend (str): 'plotly' (plotly.graph_objects.Figure) o 'matplotlib' (matplotlib.figure.Figure).
+        title (str): Título del gráfico.
+        sector (str): Sector a graficar cuando se reciben datos crudos.
+    Returns:
+        Figure: Figura del backend elegido.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend}. Opciones: {', '.join(BACKENDS)}")
+
+    # Con un solo modelo se suaviza como ese modelo; con varios, con la grilla por defecto
+    model = next(iter(results)) if len(results) == 1 else None
+    history = smoothed_history(data, model, sector)
+    title = title or "Proyección de Demanda" + (f" ({model})" if model else "")
+
+    if backend == 'plotly':
+        return _plotly_figure(history, results, title)
+    return _matplotlib_figure(history, results, title)
+
+def _plotly_figure(history, results, title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=history.index,
+        y=history['CANTIDAD_SUAVIZADA'],
+        mode='lines',
+        name='Datos Suavizados'
+    ))
+    for name, details in results.items():
+        fig.add_trace(go.Scatter(
+            x=details['forecast_dates'],
+            y=details['forecast'],
+            mode='lines+markers',
+            name=f"Pronóstico {name}",
+            line=dict(dash='dash')
+        ))
+    fig.update_layout(title=title, xaxis_title="Fecha", yaxis_title="Cantidad de Material", hovermode="x")
+    return fig
+
+def _matplotlib_figure(history, results, title):
+    # Figure directa (sin pyplot): no depende del backend gráfico ni abre ventanas
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(history.index, history['CANTIDAD_SUAVIZADA'], label='Datos Suavizados')
+    for name, details in results.items():
+        ax.plot(details['forecast_dates'], details['forecast'], label=f"Pronóstico {name}", linestyle='--')
+    ax.set_xlabel('Fecha')
+    ax.set_ylabel('Cantidad de Material')
+    ax.set_title(title)
+    ax.legend()
+    return fig
@@ -2,10 +2,10 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 import plotly.graph_objects as go
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.metrics import mean_absolute_percentage_error
 import itertools
+import arima_model
+from data_preprocessor import series_fingerprint
+from hierarchy import build_hierarchy, forecast_hierarchy
 
 # Definir alpha globalmente para la suavización exponencial
 alpha = 0.9
@@ -23,43 +23,24 @@ def upload_and_process_file():
             return data
     return None
 
+# Búsqueda de los mejores valores de p, d, q
+ORDERS = list(itertools.product(range(1, 6), [1], range(0, 4)))
+
 # Función para realizar proyecciones ARIMA
 def arima_forecast(data, horizon):
-    # Suavización exponencial
-    data['CANTIDAD_SUAVIZADA'] = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=alpha, optimized=False).fittedvalues
-
-    # División en conjunto de entrenamiento y prueba
-    train = data['CANTIDAD_SUAVIZADA'].iloc[:-horizon]
-    test = data['CANTIDAD_SUAVIZADA'].iloc[-horizon:]
-
-    # Optimización de parámetros ARIMA
-    best_mape = float("inf")
-    best_order = None
-    best_model = None
-
-    # Búsqueda de los mejores valores de p, d, q
-    p = range(1, 6)
-    d = [1]
-    q = range(0, 4)
-    for combination in itertools.product(p, d, q):
-        try:
-            model = ARIMA(train, order=combination).fit()
-            forecast = model.forecast(steps=horizon)
-            mape = mean_absolute_percentage_error(test, forecast)
-
-            if mape < best_mape:
-                best_mape = mape
-                best_order = combination
-                best_model = model
-        except:
-            continue
-
-    # Generar proyección para los próximos meses
-    forecast = best_model.forecast(steps=horizon)
-    forecast = forecast.apply(lambda x: max(0, x))  # Establecer valores negativos en 0
-    forecast_dates = pd.date_range(start=data.index[-1] + pd.DateOffset(months=1), periods=horizon, freq='M')
-
-    return forecast, forecast_dates, best_order, best_mape
+    return arima_model.arima_forecast(data, horizon, orders=ORDERS, alpha=alpha)
+
+# Proyecciones conciliadas memorizadas entre reruns; Streamlit descarta la menos usada al superarlas
+MAX_CACHED_PROJECTIONS = 16
+
+# Los parámetros con guion bajo no se usan como clave: el árbol ya está identificado por
+# la huella de sus series y sus nodos, así que cada rerun no vuelve a iniciar el pool
+@st.cache_data(max_entries=MAX_CACHED_PROJECTIONS, show_spinner=False)
+def reconciled_projection(fingerprint, nodes, horizon, _tree):
+    """Proyección ARIMA conciliada (MinT) del árbol una sola vez por contenido y horizonte."""
+    return forecast_hierarchy(
+        _tree, horizon, model='ARIMA', method='mint', forecast_options={'orders': ORDERS, 'alpha': alpha}, n_jobs=-1
+    )
 
 # Función para mostrar la proyección ARIMA general y desglosada
 def show_projection(data):
@@ -77,43 +58,39 @@ def show_projection(data):
         st.warning("No hay suficientes datos para el sector PRIVADO después del resampleo.")
         return
 
+    horizon = st.selectbox("Selecciona el horizonte de proyección (meses):", [3, 6, 12])
+
+    # Un solo árbol total -> materiales (un único groupby) proyectado en paralelo y conciliado:
+    # las proyecciones por material suman la proyección total
+    tree = build_hierarchy(data_privado.reset_index(), levels=('MATERIAL',))
+    fingerprint = series_fingerprint(tree.index, tree.values.ravel())
+    table = reconciled_projection(fingerprint, tuple(tree.nodes), horizon, tree)
+
     # Desglosar por tipo de material
     st.write("### Proyección Desglosada por Tipo de Material")
-    forecast_results = {}
-    if 'MATERIAL' in data_privado.columns:
-        for product_type in data_privado['MATERIAL'].unique():
-            data_producto = data_privado[data_privado['MATERIAL'] == product_type][['CANTIDAD']].resample('M').sum()
-
-            if len(data_producto) < 6:
-                st.warning(f"El material '{product_type}' tiene datos insuficientes para una proyección fiable y se omitirá.")
-                continue
-
-            forecast, forecast_dates, _, _ = arima_forecast(data_producto, horizon=3)
-            forecast_results[product_type] = {
-                "Fecha": forecast_dates.strftime('%B %Y'),
-                "Proyección (m³)": forecast.round().astype(int)
-            }
-
-        for product_type, results in forecast_results.items():
-            st.write(f"#### {product_type}")
-            forecast_table = pd.DataFrame({
-                "Fecha": results["Fecha"],
-                "Proyección ARIMA (m³)": results["Proyección (m³)"]
-            })
-            st.write(forecast_table)
+    for product_type, results in table[table['Nivel'] == 1].groupby('MATERIAL', sort=False):
+        if (results['Estado'] != 'OK').any():
+            st.warning(f"El material '{product_type}' tiene datos insuficientes para una proyección fiable; "
+                       "se usa el promedio de sus últimos meses.")
+        st.write(f"#### {product_type}")
+        forecast_table = pd.DataFrame({
+            "Fecha": results['Fecha'].dt.strftime('%B %Y').tolist(),
+            "Proyección ARIMA conciliada (m³)": results['Proyección (m³)'].round().astype(int).tolist()
+        })
+        st.write(forecast_table)
 
     # Proyección total
     st.write("### Proyección Total de Demanda (Todos los Tipos de Material)")
-    data_privado_total = data_privado[['CANTIDAD']].resample('M').sum()
-
-    horizon = st.selectbox("Selecciona el horizonte de proyección (meses):", [3, 6, 12])
-    forecast, forecast_dates, best_order, best_mape = arima_forecast(data_privado_total, horizon=horizon)
+    total = table[table['Nivel'] == 0]
+    forecast, forecast_dates = total['Proyección (m³)'].to_numpy(), total['Fecha']
+    best_order, best_mape = total['Orden'].iloc[0], total['MAPE'].iloc[0]
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data_privado_total.index, y=data_privado_total['CANTIDAD'], mode='lines', name='Datos Suavizados'))
-    fig.add_trace(go.Scatter(x=forecast_dates, y=forecast, mode='lines+markers', name=f'Pronóstico ARIMA{best_order} ({horizon} meses)', line=dict(dash='dash', color='green')))
+    # La curva es la suma conciliada (MinT) de los materiales, no el pronóstico directo del total
+    fig.add_trace(go.Scatter(x=tree.index, y=tree.values[0], mode='lines', name='Datos Históricos (mensual)'))
+    fig.add_trace(go.Scatter(x=forecast_dates, y=forecast, mode='lines+markers', name=f'Pronóstico conciliado MinT ({horizon} meses)', line=dict(dash='dash', color='green')))
     fig.update_layout(
-        title=f'Proyección ARIMA{best_order} ({horizon} meses)',
+        title=f'Proyección Total Conciliada (MinT, base ARIMA{best_order}, {horizon} meses)',
         xaxis_title='Fecha',
         yaxis_title='Cantidad de Material (m³)',
         hovermode="x"
@@ -121,7 +98,7 @@ def show_projection(data):
     st.plotly_chart(fig)
 
     st.write(f"### Error Promedio del Pronóstico ({horizon} meses)")
-    st.write(f"Error Promedio Asociado (MAPE): {best_mape:.2%}")
+    st.write(f"Error Promedio Asociado (MAPE del pronóstico base ARIMA{best_order} del total): {best_mape:.2%}")
 ### De usarlo alguna vez después, sacar los #
 # Streamlit app
 #def main():
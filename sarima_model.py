@@ -1,150 +1,359 @@
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+from data_preprocessor import build_monthly_series
+from smoothing import find_best_alpha, smooth_series
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from sklearn.metrics import mean_absolute_percentage_error
-import matplotlib.pyplot as plt
-from itertools import product
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product, repeat
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+from order_search import nearest_candidate, search_orders, warm_start_params
+from forecast_store import data_fingerprint, default_store, leaderboard
+from forecast_result import ForecastResult
+from multi_horizon import best_per_horizon, future_dates, normalize_horizons, split_for_horizons
+import telemetry
 
-def preprocess_data(data):
+# Grilla de alphas para la suavización exponencial
+ALPHAS = np.linspace(0.01, 1.0, 20)  # Mayor granularidad
+
+# Motores de ajuste: solo statsmodels. kalman_arima no modela la parte estacional, así que
+# SARIMA no tiene el motor 'kalman' de arima_model.BACKENDS
+BACKENDS = ('statsmodels',)
+
+def sarima_grid(seasonal_period=3):
     """
-    Preprocesar los datos cargados, filtrando por sector privado
-    y resampleando mensualmente.
+    Construye la grilla de combinaciones (p,d,q)x(P,D,Q,s) evaluadas por SARIMA,
+    en el mismo orden en que se recorren durante la búsqueda.
     """
-    data['FECHA'] = pd.to_datetime(data['FECHA'], errors='coerce')
-    data = data.dropna(subset=['FECHA'])
-    data = data.set_index('FECHA')
-    data_privado = data[data['SECTOR'] == 'PRIVADO']
-    
-    # Resamplear datos mensuales
-    data_resampled = data_privado[['CANTIDAD']].resample('MS').sum()
-    
-    # Manejo de valores negativos o nulos
-    data_resampled['CANTIDAD'] = data_resampled['CANTIDAD'].clip(lower=0).fillna(0)
-    
-    return data_resampled
+    # Rango de parámetros para SARIMA
+    p_values = [1, 2, 3, 4]
+    d_values = [0, 1]
+    q_values = [0, 1, 2]
+    P_values = [0, 1, 2]
+    D_values = [0, 1]
+    Q_values = [0, 1, 2]
 
-def find_best_alpha(data):
+    return [
+        ((p, d, q), (P, D, Q, seasonal_period))
+        for (p, d, q), (P, D, Q) in product(product(p_values, d_values, q_values), product(P_values, D_values, Q_values))
+    ]
+
+def _differencing_orders(candidate):
+    """Órdenes de diferenciación (d, D) de un candidato; la búsqueda stepwise no los mezcla."""
+    (_, d, _), (_, D, _, _) = candidate
+    return d, D
+
+def fit_sarima_candidate(train, test, order, seasonal_order, fit_timeout=None, maxiter=None, start_from=None):
     """
-    Encuentra el mejor valor de alpha para la suavización exponencial
-    basado en el MAPE más bajo.
+    Ajusta un candidato SARIMA sobre el conjunto de entrenamiento y lo evalúa
+    contra el conjunto de prueba.
+    Args:
+        train (pd.Series): Serie de entrenamiento.
+        test (pd.Series): Serie de prueba.
+        order (tuple): Orden (p, d, q).
+        seasonal_order (tuple): Orden estacional (P, D, Q, s).
+        fit_timeout (float): Segundos máximos para el ajuste (None = sin límite).
+        maxiter (int): Límite de iteraciones del optimizador para ajustes baratos
+            (None = ajuste completo).
+        start_from (tuple): (param_names, params) de un vecino ya ajustado desde el
+            cual arrancar el optimizador (None = parámetros iniciales por defecto).
+    Returns:
+        dict: 'mape', 'aic', 'forecast' (predicción sobre el periodo de prueba),
+            'params' y 'param_names' (parámetros ajustados) e 'iterations'
+            (iteraciones del optimizador), o None si el ajuste falla (el motivo
+            queda registrado en telemetry).
     """
-    alphas = np.linspace(0.01, 1.0, 20)  # Mayor granularidad
-    best_alpha = None
-    best_mape = float('inf')
+    start = time.perf_counter()
+    callback = None
+    if fit_timeout is not None:
+        deadline = time.monotonic() + fit_timeout
+
+        # El optimizador invoca el callback en cada iteración; al superar el
+        # plazo se aborta el ajuste y el candidato se descarta
+        def callback(params):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Ajuste SARIMA{order}x{seasonal_order} superó {fit_timeout} s")
+
+    try:
+        # Definir y ajustar el modelo SARIMA
+        model = SARIMAX(
+            train,
+            order=order,
+            seasonal_order=seasonal_order,
+            enforce_stationarity=False,
+            enforce_invertibility=False
+        )
+        start_params = None if start_from is None else warm_start_params(model.param_names, start_from)
+        if maxiter is None:
+            result = model.fit(disp=False, callback=callback, start_params=start_params)
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', ConvergenceWarning)
+                result = model.fit(disp=False, callback=callback, maxiter=maxiter, start_params=start_params)
+
+        # Generar predicciones
+        forecast = result.predict(start=len(train), end=len(train) + len(test) - 1)
+
+        # Calcular el MAPE
+        mape = mean_absolute_percentage_error(test, forecast)
+    except Exception as e:
+        telemetry.record_fit('SARIMA', (order, seasonal_order), time.perf_counter() - start,
+                             status='timeout' if isinstance(e, TimeoutError) else 'failed',
+                             reason=type(e).__name__, error=str(e),
+                             proxy=maxiter is not None, warm_start=start_from is not None)
+        return None
+
+    iterations = result.mle_retvals.get('iterations') if result.mle_retvals else None
+    telemetry.record_fit('SARIMA', (order, seasonal_order), time.perf_counter() - start, iterations=iterations,
+                         mape=mape, aic=result.aic, proxy=maxiter is not None, warm_start=start_from is not None)
+    # Solo arreglos planos: el modelo ajustado se libera al salir de la función
+    return {
+        'mape': mape,
+        'aic': result.aic,
+        'forecast': np.asarray(forecast),
+        'params': np.asarray(result.params),
+        'param_names': list(model.param_names),
+        'iterations': iterations,
+    }
+
+def _fit_sarima_chunk(train, test, chunk, fit_timeout, maxiter, warm_start=False):
+    """
+    Ajusta secuencialmente un bloque de candidatos dentro de un proceso del pool.
+    Con warm_start cada ajuste parte de los parámetros del candidato ya ajustado
+    más cercano dentro del mismo bloque.
+    """
+    results = []
+    fitted = {}
+    for candidate in chunk:
+        start_from = None
+        if warm_start and fitted:
+            start_from = fitted[nearest_candidate(candidate, fitted, _differencing_orders)]
+        result = fit_sarima_candidate(train, test, *candidate, fit_timeout, maxiter, start_from)
+        if result is not None:
+            fitted[candidate] = (result['param_names'], result['params'])
+        results.append(result)
+    return results
+
+def _fit_sarima_chunk_remote(train, test, chunk, fit_timeout, maxiter, warm_start=False):
+    """
+    Versión de _fit_sarima_chunk para el pool: devuelve también los registros de
+    telemetry del proceso hijo, que el proceso principal agrega a su reporte.
+    """
+    with telemetry.collect() as report:
+        results = _fit_sarima_chunk(train, test, chunk, fit_timeout, maxiter, warm_start)
+    return results, report.records()
+
+def evaluate_sarima_grid(train, test, candidates, n_jobs=1, fit_timeout=None, maxiter=None, warm_start=False):
+    """
+    Evalúa todos los candidatos SARIMA, opcionalmente repartidos en un pool de procesos.
+    Args:
+        train (pd.Series): Serie de entrenamiento.
+        test (pd.Series): Serie de prueba.
+        candidates (list): Lista de tuplas (order, seasonal_order).
+        n_jobs (int): Número de procesos (1 = secuencial, -1 o None = todos los núcleos).
+        fit_timeout (float): Segundos máximos por ajuste individual.
+        maxiter (int): Límite de iteraciones del optimizador (None = ajuste completo).
+        warm_start (bool): Arrancar cada ajuste desde el vecino ya ajustado más cercano;
+            en paralelo, dentro de cada bloque de candidatos.
+    Returns:
+        list: Resultados de fit_sarima_candidate, alineados con `candidates`.
+    """
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(candidates))
+
+    if n_jobs <= 1:
+        return _fit_sarima_chunk(train, test, candidates, fit_timeout, maxiter, warm_start)
 
-    for alpha in alphas:
-        model = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=alpha, optimized=False)
-        fitted_values = model.fittedvalues
-        mape = mean_absolute_percentage_error(data['CANTIDAD'], fitted_values)
-        if mape < best_mape:
-            best_mape = mape
-            best_alpha = alpha
+    # Bloques contiguos para amortizar el costo de enviar la serie a cada proceso;
+    # el orden de los resultados se conserva para que la selección sea determinista
+    chunk_size = max(1, len(candidates) // (n_jobs * 4))
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
 
-    return best_alpha
+    results = []
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for chunk_results, records in executor.map(_fit_sarima_chunk_remote, repeat(train), repeat(test), chunks, repeat(fit_timeout), repeat(maxiter), repeat(warm_start)):
+            results.extend(chunk_results)
+            telemetry.merge(records)
+    return results
 
-def sarima_forecast(data, horizon, seasonal_period=3):
+def restore_sarima_model(train, order, seasonal_order, params):
+    """
+    Reconstruye un modelo SARIMA a partir de parámetros ya ajustados, sin volver
+    a optimizar (arranque en caliente desde el almacén persistente).
+    """
+    model = SARIMAX(
+        train,
+        order=order,
+        seasonal_order=seasonal_order,
+        enforce_stationarity=False,
+        enforce_invertibility=False
+    )
+    return model.filter(np.asarray(params, dtype=float))
+
+def sarima_forecast(data, horizon, seasonal_period=3, n_jobs=1, fit_timeout=None, search='exhaustive', search_options=None, store=None,
+                    return_params=False, backend='statsmodels'):
     """
     Realiza proyecciones SARIMA en base a los datos proporcionados.
     Devuelve la proyección, las fechas proyectadas y el MAPE asociado.
+    Con n_jobs distinto de 1 los candidatos se ajustan en un pool de procesos;
+    fit_timeout limita los segundos de cada ajuste individual. `search` elige la
+    estrategia de order_search ('exhaustive', 'aic_topk', 'stepwise', 'halving' o
+    'warm_start') y `search_options` sus parámetros (top_k, proxy_iter, eta, ...). Con un
+    ForecastStore (o PROYEKTA_FORECAST_STORE definido) se reutiliza el modelo
+    ganador de una búsqueda anterior sobre la misma serie. Con return_params se
+    agrega al final de la tupla el vector de parámetros del ganador. `backend` existe
+    por simetría con arima_forecast, pero el único motor SARIMA es 'statsmodels'.
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor SARIMA desconocido: {backend}. SARIMA solo se ajusta con statsmodels; "
+                         f"el motor 'kalman' existe solo para ARIMA.")
+    candidates = sarima_grid(seasonal_period)
+
+    # Consultar el almacén persistente antes de buscar
+    store = store or default_store()
+    cached = None
+    if store is not None:
+        fingerprint = data_fingerprint(data)
+        search_space = {'grid': candidates, 'search': search, 'options': search_options, 'alphas': ALPHAS}
+        key = store.make_key('SARIMA', fingerprint, horizon, search_space)
+        with telemetry.span('store_lookup', 'SARIMA'):
+            cached = store.get(key)
+
     # Encontrar el mejor alpha para suavización exponencial
-    best_alpha = find_best_alpha(data)
-    data['CANTIDAD_SUAVIZADA'] = SimpleExpSmoothing(data['CANTIDAD']).fit(smoothing_level=best_alpha, optimized=False).fittedvalues
+    with telemetry.span('alpha_search', 'SARIMA'):
+        best_alpha = cached['alpha'] if cached else find_best_alpha(data, alphas=ALPHAS)
+    data['CANTIDAD_SUAVIZADA'] = smooth_series(data['CANTIDAD'], best_alpha)
 
     # División en conjunto de entrenamiento y prueba
     train = data['CANTIDAD_SUAVIZADA'].iloc[:-horizon]
     test = data['CANTIDAD_SUAVIZADA'].iloc[-horizon:]
 
-    # Rango de parámetros para SARIMA
-    p_values = [1, 2, 3, 4]
-    d_values = [0, 1]
-    q_values = [0, 1, 2]
-    P_values = [0, 1, 2]
-    D_values = [0, 1]
-    Q_values = [0, 1, 2]
+    if cached:
+        # Arranque en caliente: sin búsqueda, con los parámetros guardados del ganador
+        best_order = tuple(cached['order'])
+        best_seasonal_order = tuple(cached['seasonal_order'])
+        best_params = np.asarray(cached['params'], dtype=float)
+        with telemetry.span('restore', 'SARIMA'):
+            restored = restore_sarima_model(train, best_order, best_seasonal_order, best_params)
+            best_forecast = np.asarray(restored.predict(start=len(train), end=len(train) + len(test) - 1))
+            del restored
+        best_mape = cached['mape']
+    else:
+        # Buscar los parámetros SARIMA evaluando la grilla (en serie o en paralelo)
+        evaluate = partial(evaluate_sarima_grid, train, test, n_jobs=n_jobs, fit_timeout=fit_timeout)
+        options = {'group_key': _differencing_orders, 'start': ((2, 0, 2), (1, 0, 1, seasonal_period))}
+        options.update(search_options or {})
+        with telemetry.span('grid_search', 'SARIMA'):
+            search_result = search_orders(candidates, evaluate, strategy=search, **options)
+
+        if search_result['best'] is None:
+            raise ValueError("Ningún candidato SARIMA pudo ajustarse a los datos.")
+
+        best_order, best_seasonal_order = candidates[search_result['best']]
+        best_result = search_result['results'][search_result['best']]
+        best_mape = best_result['mape']
+        best_forecast = best_result['forecast']
+        best_params = best_result['params']
+
+        if store is not None:
+            with telemetry.span('store_save', 'SARIMA'):
+                store.put(key, 'SARIMA', fingerprint, horizon, {
+                    'alpha': best_alpha,
+                    'order': best_order,
+                    'seasonal_order': best_seasonal_order,
+                    'params': best_params,
+                    'mape': best_mape,
+                    'leaderboard': leaderboard(candidates, search_result),
+                })
 
-    # Variables para almacenar el mejor modelo y resultados
-    best_mape = float('inf')
-    best_order = None
-    best_seasonal_order = None
-    best_model = None
-    best_forecast = None
-
-    # Bucle para optimizar parámetros SARIMA
-    for (p, d, q), (P, D, Q) in product(product(p_values, d_values, q_values), product(P_values, D_values, Q_values)):
-        try:
-            # Definir y ajustar el modelo SARIMA
-            model = SARIMAX(
-                train,
-                order=(p, d, q),
-                seasonal_order=(P, D, Q, seasonal_period),
-                enforce_stationarity=False,
-                enforce_invertibility=False
-            )
-            result = model.fit(disp=False)
-
-            # Generar predicciones
-            forecast = result.predict(start=len(train), end=len(train) + len(test) - 1)
-
-            # Calcular el MAPE
-            mape = mean_absolute_percentage_error(test, forecast)
-
-            # Actualizar el mejor modelo si el MAPE es menor
-            if mape < best_mape:
-                best_mape = mape
-                best_order = (p, d, q)
-                best_seasonal_order = (P, D, Q, seasonal_period)
-                best_model = result
-                best_forecast = forecast
-        except Exception as e:
-            continue
+        # Los candidatos descartados se liberan de inmediato; solo queda el ganador
+        del search_result, best_result
 
     # Generar la proyección con el mejor modelo
-    future_forecast = best_model.predict(start=len(train), end=len(train) + horizon - 1)
-    future_forecast = np.maximum(future_forecast, 0)  # Establecer valores negativos en 0
-    forecast_dates = pd.date_range(start=data.index[-1] + pd.DateOffset(months=1), periods=horizon, freq='M')
+    future_forecast = np.maximum(best_forecast, 0)  # Establecer valores negativos en 0
+    forecast_dates = future_dates(data.index, horizon)
 
+    if return_params:
+        return future_forecast, forecast_dates, best_order, best_seasonal_order, best_mape, best_params
     return future_forecast, forecast_dates, best_order, best_seasonal_order, best_mape
 
-def run_sarima_projection(data, horizon=3, seasonal_period=3):
+def sarima_forecast_horizons(data, horizons, seasonal_period=3, n_jobs=1, fit_timeout=None, search='exhaustive', search_options=None):
+    """
+    Proyecciones SARIMA para varios horizontes con una sola búsqueda: cada candidato
+    se ajusta una vez sobre la división del horizonte más largo y se elige el
+    ganador de cada horizonte con el MAPE de los primeros h meses (ver multi_horizon).
+    Las estrategias no exhaustivas guían la búsqueda con el horizonte más largo.
+    Returns:
+        dict: Horizonte -> (proyección, fechas, orden, orden estacional, MAPE), como sarima_forecast.
+    """
+    horizons = normalize_horizons(horizons)
+    candidates = sarima_grid(seasonal_period)
+
+    with telemetry.span('alpha_search', 'SARIMA'):
+        best_alpha = find_best_alpha(data, alphas=ALPHAS)
+    data['CANTIDAD_SUAVIZADA'] = smooth_series(data['CANTIDAD'], best_alpha)
+    train, test = split_for_horizons(data['CANTIDAD_SUAVIZADA'], horizons)
+
+    evaluate = partial(evaluate_sarima_grid, train, test, n_jobs=n_jobs, fit_timeout=fit_timeout)
+    options = {'group_key': _differencing_orders, 'start': ((2, 0, 2), (1, 0, 1, seasonal_period))}
+    options.update(search_options or {})
+    with telemetry.span('grid_search', 'SARIMA'):
+        search_result = search_orders(candidates, evaluate, strategy=search, **options)
+
+    winners = best_per_horizon(search_result['results'], test, horizons)
+    if not winners:
+        raise ValueError("Ningún candidato SARIMA pudo ajustarse a los datos.")
+
+    projections = {}
+    for h, (index, mape) in winners.items():
+        forecast = np.maximum(np.asarray(search_result['results'][index]['forecast'])[:h], 0)
+        projections[h] = (forecast, future_dates(data.index, h), *candidates[index], mape)
+    return projections
+
+def run_sarima_projection(data, horizon=3, seasonal_period=3, n_jobs=1, fit_timeout=None, search='exhaustive', search_options=None, store=None):
     """
     Función principal para ejecutar SARIMA sobre un conjunto de datos.
-    Devuelve las proyecciones, las métricas asociadas y los datos en tabla.
+    Devuelve un ForecastResult con las proyecciones, las métricas asociadas y los
+    parámetros del modelo ganador, sin imprimir ni graficar (ver plotting).
+    Acepta los datos crudos o una MonthlySeries ya preparada.
     """
-    data_processed = preprocess_data(data)
+    with telemetry.span('preprocess', 'SARIMA'):
+        data_processed = build_monthly_series(data).frame()  # Serie mensual compartida entre modelos
     
     # Validar que haya suficientes datos para realizar la proyección
     if len(data_processed) < horizon + 1:
         raise ValueError("Datos insuficientes para realizar la proyección SARIMA.")
     
-    forecast, forecast_dates, best_order, best_seasonal_order, mape = sarima_forecast(data_processed, horizon, seasonal_period)
-    
-    # Crear tabla con los resultados
-    results_table = pd.DataFrame({
-        'Fecha': forecast_dates,
-        'Proyección (m³)': forecast
-    })
-    
-    # Mostrar resultados
-    print("\nResultados de Proyección:")
-    print(results_table)
-
-    # Visualización de los resultados finales
-    plt.figure(figsize=(10, 6))
-    plt.plot(data_processed.index, data_processed['CANTIDAD_SUAVIZADA'], label='Datos Suavizados')
-    plt.plot(forecast_dates, forecast, label='Pronóstico SARIMA', linestyle='--')
-    plt.xlabel('Fecha')
-    plt.ylabel('Cantidad de Material')
-    plt.title(f'Proyección de Demanda (SARIMA) - Periodo Estacional = {seasonal_period}')
-    plt.legend()
-    plt.show()
+    forecast, forecast_dates, best_order, best_seasonal_order, mape, params = sarima_forecast(
+        data_processed, horizon, seasonal_period, n_jobs=n_jobs, fit_timeout=fit_timeout,
+        search=search, search_options=search_options, store=store, return_params=True
+    )
     
+    # Solo cálculo: la tabla y los gráficos se generan a pedido (results_table, plotting.plot_forecast)
+    return ForecastResult('SARIMA', forecast, forecast_dates, mape, (best_order, best_seasonal_order), params)
+
+def run_sarima_projection_horizons(data, horizons=(3, 6, 12), seasonal_period=3, n_jobs=1, fit_timeout=None, search='exhaustive', search_options=None):
+    """
+    Ejecuta SARIMA para varios horizontes con una sola búsqueda.
+    Returns:
+        dict: Horizonte -> resultados con el mismo formato que run_sarima_projection.
+    """
+    with telemetry.span('preprocess', 'SARIMA'):
+        data_processed = build_monthly_series(data).frame()
+
+    if len(data_processed) < max(horizons) + 1:
+        raise ValueError("Datos insuficientes para realizar la proyección SARIMA.")
+
+    projections = sarima_forecast_horizons(
+        data_processed, horizons, seasonal_period, n_jobs=n_jobs, fit_timeout=fit_timeout,
+        search=search, search_options=search_options
+    )
     return {
-        "forecast": forecast,
-        "forecast_dates": forecast_dates,
-        "order": best_order,
-        "seasonal_order": best_seasonal_order,
-        "mape": mape,
-        "results_table": results_table
+        h: ForecastResult('SARIMA', forecast, forecast_dates, mape, (best_order, best_seasonal_order))
+        for h, (forecast, forecast_dates, best_order, best_seasonal_order, mape) in projections.items()
     }
@@ -1,19 +1,16 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import requests
+from indicators import get_provider
 
 def get_current_uf():
-    """Obtiene el valor actual de la UF desde mindicador.cl."""
-    try:
-        response = requests.get("https://mindicador.cl/api")
-        response.raise_for_status()  # Verifica si la solicitud fue exitosa
-        data = response.json()
-        uf_value = data['uf']['valor']
-        return uf_value
-    except Exception as e:
-        st.error(f"Error al obtener el valor de la UF: {e}")
-        return None
+    """
+    Obtiene el valor actual de la UF desde mindicador.cl (o la fuente de
+    PROYEKTA_INDICATORS_SOURCE) sin bloquear la página: devuelve el último valor
+    en caché, aunque esté vencido, y lo actualiza en segundo plano. Devuelve None
+    mientras no se haya obtenido ningún valor.
+    """
+    return get_provider().get('uf')
 
 def show_left_panel():
     # Datos simulados del MOP por región
@@ -87,6 +84,8 @@ def show_left_panel():
             "<p style='color: #8AB4F8;'><b>Fuente:</b> <a href='https://mindicador.cl/' target='_blank' style='color: #4E74F4;'>mindicador.cl</a></p>", 
             unsafe_allow_html=True
         )
+    else:
+        st.sidebar.caption("UF Actual: no disponible por el momento.")
 
 def show_public_vs_private_demand():
     # Datos para el gráfico de barras
@@ -133,7 +132,8 @@ def show_public_vs_private_demand():
         unsafe_allow_html=True
     )
 
-# Llamada a las funciones para mostrar los paneles
-show_left_panel()
-show_public_vs_private_demand()
+# Llamada a las funciones para mostrar los paneles (solo al ejecutar este archivo directamente)
+if __name__ == "__main__":
+    show_left_panel()
+    show_public_vs_private_demand()
 
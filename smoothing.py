@@ -0,0 +1,88 @@
+# smoothing.py
+import numpy as np
+import pandas as pd
+
+DEFAULT_ALPHAS = np.linspace(0.01, 1.0, 10)
+
+def exponential_smoothing(values, alphas):
+    """
+    Evalúa la recursión de suavización exponencial simple para varios alphas a la vez.
+    Reproduce los valores ajustados de SimpleExpSmoothing(...).fit(optimized=False):
+    el nivel inicial es la primera observación y cada valor ajustado es
+    alpha * y[t-1] + (1 - alpha) * ajustado[t-1].
+    Args:
+        values (array-like): Serie observada de largo n.
+        alphas (array-like): Vector de k parámetros de suavización.
+    Returns:
+        np.ndarray: Matriz (k, n) con los valores ajustados para cada alpha.
+    """
+    values = np.asarray(values, dtype=float)
+    alphas = np.asarray(alphas, dtype=float).reshape(-1)
+
+    fitted = np.empty((alphas.size, values.size))
+    if values.size == 0:
+        return fitted
+
+    # La recursión es secuencial en el tiempo pero vectorizada sobre los alphas
+    fitted[:, 0] = values[0]
+    level_weight = 1.0 - alphas
+    for t in range(1, values.size):
+        fitted[:, t] = alphas * values[t - 1] + level_weight * fitted[:, t - 1]
+    return fitted
+
+def batch_mape(actual, fitted):
+    """
+    MAPE de cada fila de `fitted` contra `actual`, con la misma definición que
+    sklearn.metrics.mean_absolute_percentage_error.
+    """
+    actual = np.asarray(actual, dtype=float)
+    denominator = np.maximum(np.abs(actual), np.finfo(np.float64).eps)
+    return np.mean(np.abs(fitted - actual) / denominator, axis=-1)
+
+def find_best_alpha(data, alphas=None):
+    """
+    Encuentra el mejor valor de alpha para la suavización exponencial
+    basado en el MAPE más bajo, evaluando toda la grilla de alphas en una pasada.
+    Args:
+        data (pd.DataFrame): Datos con la columna 'CANTIDAD'.
+        alphas (array-like): Grilla de alphas (por defecto 10 valores entre 0.01 y 1).
+    Returns:
+        float: Alpha con menor MAPE (el primero de la grilla ante empates).
+    """
+    alphas = DEFAULT_ALPHAS if alphas is None else np.asarray(alphas, dtype=float)
+    values = data['CANTIDAD'].to_numpy(dtype=float)
+
+    mapes = batch_mape(values, exponential_smoothing(values, alphas))
+    mapes = np.where(np.isnan(mapes), np.inf, mapes)
+    return alphas[np.argmin(mapes)]
+
+def batch_smoothing(values, alphas=None):
+    """
+    find_best_alpha y smooth_series para muchas series del mismo largo a la vez.
+    Args:
+        values (array-like): Matriz (series, meses) con las cantidades observadas.
+        alphas (array-like): Grilla de alphas (por defecto la de find_best_alpha).
+    Returns:
+        tuple: (alpha elegido para cada serie, matriz (series, meses) suavizada con ese alpha).
+    """
+    alphas = DEFAULT_ALPHAS if alphas is None else np.asarray(alphas, dtype=float).reshape(-1)
+    values = np.asarray(values, dtype=float)
+    n_series, n_obs = values.shape
+
+    # Misma recursión que exponential_smoothing, vectorizada sobre series y alphas
+    fitted = np.empty((n_series, alphas.size, n_obs))
+    if n_obs == 0:
+        return np.full(n_series, alphas[0]), values.copy()
+    fitted[:, :, 0] = values[:, :1]
+    level_weight = 1.0 - alphas
+    for t in range(1, n_obs):
+        fitted[:, :, t] = alphas * values[:, t - 1:t] + level_weight * fitted[:, :, t - 1]
+
+    mapes = batch_mape(values[:, np.newaxis, :], fitted)
+    best = np.argmin(np.where(np.isnan(mapes), np.inf, mapes), axis=1)
+    return alphas[best], fitted[np.arange(n_series), best]
+
+def smooth_series(series, alpha):
+    """Devuelve la serie suavizada con el alpha indicado, conservando su índice."""
+    fitted = exponential_smoothing(series.to_numpy(dtype=float), [alpha])[0]
+    return pd.Series(fitted, index=series.index, name=series.name)
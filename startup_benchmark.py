@@ -0,0 +1,141 @@
+# startup_benchmark.py
+"""
+Benchmark del arranque de la aplicación web: tiempo desde el lanzamiento hasta el
+primer dibujo de la página y tiempo de importación de cada módulo.
+
+Cada medición corre en un proceso nuevo, para que ningún módulo venga ya
+importado. El primer dibujo es la primera ejecución completa del script de
+Streamlit (sin archivo cargado), medida con streamlit.testing. Los tiempos de
+importación salen de `python -X importtime`.
+
+Ejemplos:
+    python startup_benchmark.py
+    python startup_benchmark.py --repeat 5 --top 20 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP = 'demo_aplicación_web_tesis.py'
+
+# Módulos de la aplicación importados por el script antes del primer dibujo
+APP_MODULES = ['app_cache', 'design', 'side_panels']
+
+# Dependencias pesadas que no deberían cargarse antes de ejecutar un modelo
+HEAVY_MODULES = ['statsmodels', 'sklearn', 'scipy', 'matplotlib', 'tensorflow', 'pmdarima']
+
+# Se ejecuta en el proceso nuevo: mide el lanzamiento y la primera ejecución del script
+_FIRST_PAINT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout={timeout})
+loaded = time.perf_counter()
+app.run()
+painted = time.perf_counter()
+print(json.dumps({{
+    'launch_seconds': loaded - start,
+    'first_paint_seconds': painted - start,
+    'exceptions': [str(e.value) for e in app.exception],
+    'heavy_modules': [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+def _run_python(args, directory):
+    """Ejecuta el intérprete actual en un proceso nuevo (sin almacén persistente ni red para la UF)."""
+    env = dict(os.environ)
+    env.pop('PROYEKTA_FORECAST_STORE', None)
+    return subprocess.run([sys.executable, '-W', 'ignore'] + args, capture_output=True, text=True,
+                          cwd=directory, env=env, check=True)
+
+def first_paint(app=APP, directory='.', timeout=60):
+    """
+    Tiempo desde el lanzamiento hasta el primer dibujo del script de Streamlit.
+    Returns:
+        dict: 'launch_seconds' (importar Streamlit y preparar el script), 'first_paint_seconds'
+            (hasta terminar la primera ejecución), 'exceptions' y 'heavy_modules' (dependencias
+            pesadas cargadas al terminar).
+    """
+    code = _FIRST_PAINT.format(app=app, timeout=timeout, heavy=HEAVY_MODULES)
+    output = _run_python(['-c', code], directory).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def import_times(modules=APP_MODULES, directory='.'):
+    """
+    Tiempo de importación de cada módulo según `python -X importtime`.
+    Returns:
+        list: Diccionarios con 'module', 'self_ms' y 'cumulative_ms', de mayor a menor acumulado.
+    """
+    code = '; '.join(f'import {module}' for module in modules)
+    stderr = _run_python(['-X', 'importtime', '-c', code], directory).stderr
+
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.append({
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+    return sorted(times, key=lambda entry: entry['cumulative_ms'], reverse=True)
+
+def run(app=APP, directory='.', repeat=3, top=15):
+    """
+    Mide el arranque `repeat` veces y los tiempos de importación una vez.
+    Returns:
+        dict: 'first_paint' (mediana, mínimo y máximo en segundos y cada corrida),
+            'heavy_modules', 'exceptions' y 'imports' (los `top` módulos más lentos).
+    """
+    runs = [first_paint(app, directory) for _ in range(repeat)]
+    paints = [r['first_paint_seconds'] for r in runs]
+    return {
+        'app': app,
+        'python': sys.version.split()[0],
+        'first_paint': {
+            'median_seconds': statistics.median(paints),
+            'min_seconds': min(paints),
+            'max_seconds': max(paints),
+            'runs': runs,
+        },
+        'heavy_modules': runs[-1]['heavy_modules'],
+        'exceptions': runs[-1]['exceptions'],
+        'imports': import_times(directory=directory)[:top],
+    }
+
+def print_report(report):
+    """Resumen legible del benchmark de arranque."""
+    paint = report['first_paint']
+    print(f"Primer dibujo de {report['app']}: mediana {paint['median_seconds']:.2f} s "
+          f"(mín. {paint['min_seconds']:.2f} s, máx. {paint['max_seconds']:.2f} s, {len(paint['runs'])} corridas)")
+    print("Dependencias pesadas cargadas: " + (', '.join(report['heavy_modules']) or 'ninguna'))
+    for exception in report['exceptions']:
+        print(f"Excepción en el script: {exception}")
+    print("\nImportaciones más lentas (ms acumulados / propios):")
+    for entry in report['imports']:
+        print(f"  {entry['cumulative_ms']:9.1f} {entry['self_ms']:9.1f}  {entry['module']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del arranque de la aplicación web.")
+    parser.add_argument('--app', default=APP, help="Script de Streamlit a medir.")
+    parser.add_argument('--repeat', type=int, default=3, help="Corridas del primer dibujo.")
+    parser.add_argument('--top', type=int, default=15, help="Módulos más lentos a reportar.")
+    parser.add_argument('--output', help="Archivo JSON de resultados.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    report = run(args.app, directory, args.repeat, args.top)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# telemetry.py
+"""
+Instrumentación de la selección de modelos: duración de cada etapa, tiempo,
+iteraciones y motivo de falla de cada candidato ajustado y ranking por MAPE.
+
+Ejemplo:
+    with telemetry.collect() as report:
+        arima_forecast(data, 3)
+    print(report.to_prometheus())
+
+Fuera de collect() las funciones de registro no hacen nada, así que la
+instrumentación no tiene costo cuando nadie la consulta.
+"""
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Reportes activos del contexto actual; cada registro se agrega a todos (collect() puede
+# anidarse). Cada hilo (p. ej. cada sesión de Streamlit) tiene su propio contexto, así que
+# las ejecuciones concurrentes no se mezclan.
+_active_reports = ContextVar('telemetry_active_reports', default=())
+
+def _candidate_label(candidate):
+    """Texto legible de un candidato: (p, d, q) o (p, d, q)x(P, D, Q, s)."""
+    if isinstance(candidate, tuple) and candidate and all(isinstance(item, tuple) for item in candidate):
+        return 'x'.join(str(item) for item in candidate)
+    return str(candidate)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _prometheus_line(name, labels, value):
+    label_text = ','.join(f'{key}="{_escape(labels[key])}"' for key in sorted(labels))
+    return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+class TelemetryReport:
+    """
+    Mediciones de una ejecución: 'spans' (etapas con su duración) y 'fits'
+    (un registro por candidato ajustado). Es serializable con pickle para
+    viajar desde los procesos del pool y guardarse en la caché de Streamlit.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.fits = []
+
+    def records(self):
+        """Registros crudos, para enviarlos desde otro proceso y combinarlos con merge()."""
+        return {'spans': list(self.spans), 'fits': list(self.fits)}
+
+    def extend(self, records):
+        self.spans.extend(records.get('spans', []))
+        self.fits.extend(records.get('fits', []))
+
+    def summary(self):
+        """
+        Resumen por modelo de los ajustes de candidatos.
+        Returns:
+            dict: Modelo -> 'fits', 'failed', 'proxy_fits', 'warm_started', 'fit_seconds' e 'iterations'.
+        """
+        summary = {}
+        for fit in self.fits:
+            model = summary.setdefault(fit['model'], {
+                'fits': 0, 'failed': 0, 'proxy_fits': 0, 'warm_started': 0, 'fit_seconds': 0.0, 'iterations': 0
+            })
+            model['fits'] += 1
+            model['failed'] += fit['status'] != 'ok'
+            model['proxy_fits'] += bool(fit.get('proxy'))
+            model['warm_started'] += bool(fit.get('warm_start'))
+            model['fit_seconds'] += fit['seconds']
+            model['iterations'] += fit.get('iterations') or 0
+        return summary
+
+    def stage_seconds(self):
+        """Segundos acumulados por (modelo, etapa)."""
+        totals = {}
+        for span in self.spans:
+            key = (span.get('model'), span['stage'])
+            totals[key] = totals.get(key, 0.0) + span['seconds']
+        return totals
+
+    def failures(self):
+        """Cantidad de ajustes fallidos por (modelo, motivo)."""
+        counts = {}
+        for fit in self.fits:
+            if fit['status'] != 'ok':
+                key = (fit['model'], fit.get('reason') or fit['status'])
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def leaderboard(self, model=None, top=10):
+        """Candidatos con ajuste completo exitoso ordenados por MAPE (opcionalmente de un modelo)."""
+        rows = [
+            fit for fit in self.fits
+            if fit['status'] == 'ok' and not fit.get('proxy') and fit.get('mape') is not None
+            and (model is None or fit['model'] == model)
+        ]
+        return sorted(rows, key=lambda fit: fit['mape'])[:top]
+
+    def to_dict(self):
+        return {
+            'spans': self.spans,
+            'fits': self.fits,
+            'summary': self.summary(),
+            'failures': [
+                {'model': model, 'reason': reason, 'count': count}
+                for (model, reason), count in sorted(self.failures().items())
+            ],
+            'leaderboard': self.leaderboard(),
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent, default=str)
+
+    def to_prometheus(self, prefix='proyekta'):
+        """Exporta los totales en el formato de texto de Prometheus."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Segundos acumulados por etapa.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for (model, stage), seconds in sorted(self.stage_seconds().items(), key=lambda item: (str(item[0][0]), item[0][1])):
+            lines.append(_prometheus_line(f"{prefix}_stage_seconds_total", {'model': model or '', 'stage': stage}, seconds))
+
+        metrics = [
+            ('candidate_fits_total', 'fits', 'Candidatos ajustados.'),
+            ('candidate_failures_total', 'failed', 'Candidatos cuyo ajuste falló.'),
+            ('candidate_fit_seconds_total', 'fit_seconds', 'Segundos de ajuste de candidatos.'),
+            ('candidate_iterations_total', 'iterations', 'Iteraciones del optimizador.'),
+        ]
+        summary = self.summary()
+        for metric, field, description in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {description}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for model in sorted(summary):
+                lines.append(_prometheus_line(f"{prefix}_{metric}", {'model': model}, summary[model][field]))
+
+        lines.append(f"# HELP {prefix}_candidate_failures_by_reason_total Fallas por motivo.")
+        lines.append(f"# TYPE {prefix}_candidate_failures_by_reason_total counter")
+        for (model, reason), count in sorted(self.failures().items()):
+            lines.append(_prometheus_line(f"{prefix}_candidate_failures_by_reason_total", {'model': model, 'reason': reason}, count))
+
+        lines.append(f"# HELP {prefix}_best_mape Menor MAPE entre los candidatos de cada modelo.")
+        lines.append(f"# TYPE {prefix}_best_mape gauge")
+        for model in sorted(summary):
+            best = self.leaderboard(model, top=1)
+            if best:
+                lines.append(_prometheus_line(f"{prefix}_best_mape", {'model': model, 'candidate': best[0]['candidate']}, best[0]['mape']))
+        return '\n'.join(lines) + '\n'
+
+@contextmanager
+def collect():
+    """Activa la instrumentación mientras dura el bloque y entrega el TelemetryReport."""
+    report = TelemetryReport()
+    token = _active_reports.set(_active_reports.get() + (report,))
+    try:
+        yield report
+    finally:
+        _active_reports.reset(token)
+
+def enabled():
+    """Indica si hay algún collect() activo en el contexto actual."""
+    return bool(_active_reports.get())
+
+def merge(records):
+    """Agrega registros obtenidos en otro proceso a los reportes activos."""
+    for report in _active_reports.get():
+        report.extend(records)
+
+@contextmanager
+def span(stage, model=None):
+    """Mide la duración de una etapa; si el bloque lanza una excepción se registra su tipo."""
+    if not _active_reports.get():
+        yield
+        return
+
+    start = time.perf_counter()
+    record = {'stage': stage, 'model': model, 'status': 'ok'}
+    try:
+        yield
+    except BaseException as e:
+        record['status'] = 'error'
+        record['reason'] = type(e).__name__
+        raise
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        merge({'spans': [record]})
+
+def record_fit(model, candidate, seconds, status='ok', iterations=None, mape=None, aic=None, reason=None,
+               error=None, proxy=False, warm_start=False):
+    """
+    Registra el ajuste de un candidato.
+    Args:
+        model (str): 'ARIMA', 'SARIMA', ...
+        candidate (tuple): Órdenes del candidato.
+        seconds (float): Duración del ajuste.
+        status (str): 'ok', 'failed' o 'timeout'.
+        iterations (int): Iteraciones del optimizador.
+        mape (float), aic (float): Métricas del ajuste exitoso.
+        reason (str): Tipo de la excepción cuando el ajuste falla.
+        error (str): Mensaje de la excepción.
+        proxy (bool): Ajuste barato con iteraciones limitadas.
+        warm_start (bool): Ajuste iniciado desde un vecino.
+    """
+    if not _active_reports.get():
+        return
+    merge({'fits': [{
+        'model': model,
+        'candidate': _candidate_label(candidate),
+        'seconds': seconds,
+        'status': status,
+        'iterations': iterations,
+        'mape': None if mape is None else float(mape),
+        'aic': None if aic is None else float(aic),
+        'reason': reason,
+        'error': error,
+        'proxy': proxy,
+        'warm_start': warm_start,
+    }]})
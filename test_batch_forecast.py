@@ -0,0 +1,24 @@
+# test_batch_forecast.py
+import numpy as np
+import pandas as pd
+from batch_forecast import monthly_by_group
+from hierarchy import build_hierarchy
+
+def _raw_with_blank_material():
+    dates = pd.to_datetime(['2020-01-05', '2020-01-20', '2020-02-05', '2020-02-07', '2020-03-01', '2020-03-02'])
+    return pd.DataFrame({
+        'FECHA': dates,
+        'SECTOR': ['PRIVADO'] * 6,
+        'MATERIAL': ['ARENA', np.nan, 'GRAVA', 'ARENA', None, 'GRAVA'],
+        'CANTIDAD': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+def test_blank_material_rows_are_skipped():
+    data = _raw_with_blank_material()
+    series = monthly_by_group(data, ('MATERIAL',))
+    assert list(series) == [('ARENA',), ('GRAVA',)]
+    assert series[('ARENA',)]['CANTIDAD'].tolist() == [1.0, 4.0]
+    assert list(monthly_by_group(data, ('SECTOR', 'MATERIAL'))) == [('PRIVADO', 'ARENA'), ('PRIVADO', 'GRAVA')]
+
+    tree = build_hierarchy(data, levels=('MATERIAL',))
+    assert tree.bottom_nodes == [('ARENA',), ('GRAVA',)]
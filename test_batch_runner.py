@@ -0,0 +1,22 @@
+# test_batch_runner.py
+import numpy as np
+import pandas as pd
+import batch_runner
+
+def _tasks():
+    return [({'archivo': 'a.csv', 'SECTOR': sector}, np.arange(12.0)) for sector in ('PRIVADO', 'PUBLICO')]
+
+def test_sequential_run_records_failed_groups(monkeypatch, tmp_path):
+    def run_task(group, series, horizon, verbose=False):
+        if group['SECTOR'] == 'PRIVADO':
+            raise RuntimeError('falla de prueba')
+        forecasts = [{**group, 'modelo': 'X', 'seleccionado': True, 'fecha': None, 'proyeccion_m3': 1.0}]
+        return forecasts, [{**group, 'modelo': 'X', 'mape': 0.1, 'segundos': 0.0, 'seleccionado': True, 'estado': 'OK'}]
+
+    monkeypatch.setattr(batch_runner, 'build_tasks', lambda *args: _tasks())
+    monkeypatch.setattr(batch_runner, 'run_task', run_task)
+    assert batch_runner.main(['datos.csv', '--jobs', '1', '--output-dir', str(tmp_path)]) == 0
+
+    ranking = pd.read_csv(tmp_path / 'ranking_mape.csv')
+    assert ranking.set_index('SECTOR')['estado'].to_dict() == {'PRIVADO': 'Error: falla de prueba', 'PUBLICO': 'OK'}
+    assert len(pd.read_csv(tmp_path / 'proyecciones.csv')) == 1
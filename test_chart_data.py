@@ -0,0 +1,40 @@
+# test_chart_data.py
+import numpy as np
+import pandas as pd
+from chart_data import MAX_POINTS, comparison_figure, downsample, lttb
+
+def test_lttb_keeps_endpoints_and_point_count():
+    rng = np.random.default_rng(0)
+    x = np.arange(5000, dtype=float)
+    y = np.cumsum(rng.normal(0, 1, x.size))
+    y[1234] = 1e3  # Un pico aislado se conserva
+    for n_out in (3, 10, 500):
+        index = lttb(x, y, n_out)
+        assert len(index) == n_out
+        assert index[0] == 0 and index[-1] == len(x) - 1
+        assert np.all(np.diff(index) > 0)
+        assert 1234 in index
+    np.testing.assert_array_equal(lttb(x[:7], y[:7], 10), np.arange(7))
+
+def test_downsample_bounds_the_trace():
+    dates = pd.date_range('2000-01-01', periods=3000, freq='D')
+    values = np.sin(np.arange(3000) / 50)
+    kept_dates, kept_values = downsample(dates, values, max_points=200)
+    assert len(kept_dates) == len(kept_values) == 200
+    assert (kept_dates[0], kept_dates[-1]) == (dates[0], dates[-1])
+    assert (kept_values[0], kept_values[-1]) == (values[0], values[-1])
+    short_dates, short_values = downsample(dates[:50], values[:50], max_points=200)
+    assert short_dates.equals(dates[:50]) and np.array_equal(short_values, values[:50])
+
+def test_comparison_figure_is_monthly_and_bounded():
+    # Un movimiento por día durante ~14 años: la figura grafica meses, no filas
+    dates = pd.date_range('2010-01-01', periods=5000, freq='D')
+    data = pd.DataFrame({'FECHA': dates, 'SECTOR': 'PRIVADO', 'MATERIAL': 'ARENA', 'CANTIDAD': 1.0})
+    results = {'ARIMA': {'forecast': np.ones(3), 'forecast_dates': pd.date_range('2023-10-01', periods=3, freq='MS')}}
+    figure = comparison_figure(data, results, ['ARIMA'], max_points=100)
+    history, forecast = figure.data
+    assert len(history.x) == 100 and history.type == 'scatter'
+    assert len(forecast.x) == 3
+    # 5000 meses: se reduce a MAX_POINTS y se dibuja con WebGL
+    long_figure = comparison_figure(data.assign(FECHA=pd.date_range('1800-01-01', periods=5000, freq='MS')), results, [])
+    assert len(long_figure.data[0].x) == MAX_POINTS and long_figure.data[0].type == 'scattergl'
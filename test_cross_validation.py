@@ -0,0 +1,24 @@
+# test_cross_validation.py
+import warnings
+import numpy as np
+import pandas as pd
+from cross_validation import cross_validate
+
+def _monthly(n_months=36, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n_months, freq='MS')
+    values = 200 + 3 * np.arange(n_months) + 20 * np.sin(np.arange(n_months)) + rng.normal(0, 5, n_months)
+    return pd.DataFrame({'CANTIDAD': values}, index=index)
+
+def test_selection_ignores_test_windows():
+    data = _monthly()
+    changed = data.copy()
+    # Solo cambian los meses de prueba (los últimos horizon + n_folds - 1 = 5)
+    changed.iloc[-5:, 0] *= 3
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        original = cross_validate(data, 3, ['ARIMA', 'Linear Projection'], n_folds=3)
+        modified = cross_validate(changed, 3, ['ARIMA', 'Linear Projection'], n_folds=3)
+    assert original['orders'] == modified['orders']
+    assert list(original['errors'].index) == ['ARIMA', 'Linear Projection']
+    assert np.isfinite(original['mean']).all()
@@ -0,0 +1,62 @@
+# test_data_preprocessor.py
+import numpy as np
+import pandas as pd
+from batch_forecast import monthly_by_group
+from data_preprocessor import MonthlyAggregator, preprocess_data, series_fingerprint
+
+def _raw(n_months=36, rows_per_month=40, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for m in range(n_months):
+        for _ in range(rows_per_month):
+            date = pd.Timestamp('2020-01-01') + pd.DateOffset(months=m) + pd.Timedelta(days=int(rng.integers(0, 27)))
+            rows.append((date, rng.choice(['PRIVADO', 'PUBLICO']), rng.choice(['ARENA', 'GRAVA']), rng.uniform(0.1, 50.3)))
+    data = pd.DataFrame(rows, columns=['FECHA', 'SECTOR', 'MATERIAL', 'CANTIDAD'])
+    return data.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def _aggregate(data, chunk_size):
+    aggregator = MonthlyAggregator()
+    for start in range(0, len(data), chunk_size):
+        aggregator.add(data.iloc[start:start + chunk_size])
+    return aggregator
+
+def test_chunked_totals_match_in_memory():
+    data = _raw()
+    expected = preprocess_data(data)
+    expected_groups = monthly_by_group(data, ('SECTOR', 'MATERIAL'))
+    for chunk_size in (7, 100, len(data)):
+        aggregator = _aggregate(data, chunk_size)
+        monthly = aggregator.monthly('PRIVADO')
+        assert monthly.index.equals(expected.index)
+        np.testing.assert_array_equal(monthly['CANTIDAD'], expected['CANTIDAD'])
+        groups = aggregator.monthly_by_group(('SECTOR', 'MATERIAL'))
+        assert list(groups) == list(expected_groups)
+        for key, frame in groups.items():
+            np.testing.assert_array_equal(frame['CANTIDAD'], expected_groups[key]['CANTIDAD'])
+
+def test_fingerprint_does_not_depend_on_row_order_or_chunks():
+    data = _raw()
+    expected = preprocess_data(data)
+    fingerprint = series_fingerprint(expected.index, expected['CANTIDAD'])
+    for seed in range(3):
+        shuffled = data.sample(frac=1, random_state=seed + 1)
+        monthly = preprocess_data(shuffled)
+        assert series_fingerprint(monthly.index, monthly['CANTIDAD']) == fingerprint
+        for chunk_size in (7, 1000):
+            monthly = _aggregate(shuffled, chunk_size).monthly('PRIVADO')
+            assert series_fingerprint(monthly.index, monthly['CANTIDAD']) == fingerprint
+
+def test_exact_totals_of_ill_conditioned_sums():
+    # El total exacto es 2.0; la suma en orden de las filas da 0.0 o 4.0 según el orden
+    data = pd.DataFrame({
+        'FECHA': pd.to_datetime(['2020-01-03'] * 4),
+        'SECTOR': ['PRIVADO'] * 4,
+        'MATERIAL': ['ARENA'] * 4,
+        'CANTIDAD': [1e16, 2.0, -1e16, 0.0],
+    })
+    for rows in ([0, 1, 2, 3], [1, 0, 2, 3], [2, 3, 0, 1]):
+        shuffled = data.iloc[rows]
+        assert preprocess_data(shuffled)['CANTIDAD'].tolist() == [2.0]
+        assert monthly_by_group(shuffled)[('ARENA',)]['CANTIDAD'].tolist() == [2.0]
+        for chunk_size in (1, 2, 4):
+            assert _aggregate(shuffled, chunk_size).monthly('PRIVADO')['CANTIDAD'].tolist() == [2.0]
@@ -0,0 +1,53 @@
+# test_forecast_result.py
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from arima_model import arima_forecast, restore_arima_model
+from data_preprocessor import MonthlySeries
+from forecast_result import ForecastResult
+from linear_projection import run_linear_projection
+from smoothing import find_best_alpha, smooth_series
+
+def _monthly(n_months=30, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n_months, freq='MS')
+    return pd.DataFrame({'CANTIDAD': 500 + np.cumsum(rng.normal(0, 10, n_months))}, index=index)
+
+def test_result_reads_like_the_previous_dict():
+    dates = pd.date_range('2022-01-31', periods=3, freq='ME')
+    result = ForecastResult('SARIMA', [1.0, 2.0, 3.0], dates, 0.1, ((1, 1, 1), (0, 1, 1, 3)), params=[0.5, 2.0])
+    assert list(result) == ['forecast', 'forecast_dates', 'order', 'seasonal_order', 'mape', 'results_table']
+    assert result['seasonal_order'] == (0, 1, 1, 3) and result['forecast_dates'].equals(dates)
+    # La tabla se construye en cada acceso y no se guarda
+    assert result['results_table'] is not result['results_table']
+    assert result['results_table']['Proyección (m³)'].tolist() == [1.0, 2.0, 3.0]
+    assert not hasattr(result, '__dict__')
+    assert result.nbytes() == 3 * 8 + 3 * 8 + 2 * 8
+
+    result['cv_mape'] = 0.2
+    copy = pickle.loads(pickle.dumps(result))
+    assert dict(copy)['cv_mape'] == 0.2 and np.array_equal(copy.params, result.params)
+    with pytest.raises(TypeError):
+        result['mape'] = 0.0
+    with pytest.raises(ValueError):
+        ForecastResult('ARIMA', [1.0], dates[:1], 0.1)
+
+def test_return_params_keeps_only_the_winners_parameters():
+    data = _monthly()
+    horizon = 3
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        outcome = arima_forecast(data.copy(), horizon, orders=[(1, 1, 0), (0, 1, 1)], return_params=True)
+        assert len(outcome) == len(arima_forecast(data.copy(), horizon, orders=[(1, 1, 0), (0, 1, 1)])) + 1
+        forecast, _, order, _, params = outcome
+        # Con el vector de parámetros basta para reconstruir la proyección del ganador
+        smoothed = smooth_series(data['CANTIDAD'], find_best_alpha(data))
+        restored = restore_arima_model(smoothed.iloc[:-horizon], order, params).forecast(steps=horizon)
+    np.testing.assert_allclose(np.maximum(restored, 0), forecast, rtol=1e-8)
+
+    linear = run_linear_projection(MonthlySeries(data.index, data['CANTIDAD'], 'PRIVADO'), horizon)
+    train = smooth_series(data['CANTIDAD'], find_best_alpha(data)).iloc[:-horizon]
+    slope, intercept = np.polyfit(np.arange(len(train)), train, 1)
+    np.testing.assert_allclose(linear.params, [intercept, slope], rtol=1e-9)
@@ -0,0 +1,40 @@
+# test_hierarchy.py
+import numpy as np
+import pandas as pd
+from hierarchy import build_hierarchy, forecast_hierarchy, one_step_errors, reconcile
+
+def _raw(n_months=30, materials=('ARENA', 'GRAVA', 'RIPIO'), seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for m in range(n_months):
+        for j, material in enumerate(materials):
+            for sector in ('PRIVADO', 'PUBLICO'):
+                date = pd.Timestamp('2020-01-01') + pd.DateOffset(months=m) + pd.Timedelta(days=int(rng.integers(0, 27)))
+                rows.append((date, sector, material, 100 * (j + 1) + 3 * m + rng.normal(0, 10)))
+    return pd.DataFrame(rows, columns=['FECHA', 'SECTOR', 'MATERIAL', 'CANTIDAD'])
+
+def test_reconciled_levels_add_up():
+    tree = build_hierarchy(_raw(), levels=('SECTOR', 'MATERIAL'))
+    for covariance_folds in (0, 4):
+        table = forecast_hierarchy(tree, 3, model='Linear Projection', method='mint', covariance_folds=covariance_folds)
+        total = table[table['Nivel'] == 0]['Proyección (m³)'].to_numpy()
+        leaves = table[table['Nivel'] == 2].groupby('Fecha', sort=True)['Proyección (m³)'].sum().to_numpy()
+        assert np.allclose(total, leaves)
+
+def test_one_step_errors_use_only_earlier_months():
+    tree = build_hierarchy(_raw(), levels=('MATERIAL',), sector='PRIVADO')
+    errors = one_step_errors(tree, n_folds=4, model='Linear Projection')
+    assert errors.shape == (len(tree.nodes), 4)
+    # Cambiar el futuro de cada origen no cambia su error
+    changed = tree.values.copy()
+    changed[:, -1] *= 10
+    tree.values = changed
+    assert np.allclose(one_step_errors(tree, n_folds=4, model='Linear Projection')[:, :-1], errors[:, :-1])
+
+def test_mint_without_errors_is_structural():
+    tree = build_hierarchy(_raw(), levels=('MATERIAL',), sector='PRIVADO')
+    forecast = tree.values[:, -3:] * np.array([[1.1], [0.9], [1.0], [1.2]])
+    summing = tree.summing_matrix
+    weights = np.diag(1 / summing.sum(axis=1))
+    expected = summing @ np.linalg.solve(summing.T @ weights @ summing, summing.T @ weights @ forecast)
+    assert np.allclose(reconcile(tree, forecast, 'mint'), expected)
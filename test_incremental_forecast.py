@@ -0,0 +1,37 @@
+# test_incremental_forecast.py
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from incremental_forecast import IncrementalForecast
+
+def _monthly(n_months=30, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n_months, freq='MS')
+    return pd.DataFrame({'CANTIDAD': 500 + np.cumsum(rng.normal(0, 10, n_months))}, index=index)
+
+def test_rejects_options_of_another_model():
+    with pytest.raises(ValueError, match='alpha'):
+        IncrementalForecast('SARIMA', horizon=3, alpha=0.5)
+    IncrementalForecast('ARIMA', horizon=3, alpha=0.5, orders=[(1, 1, 0)])
+
+def test_fit_reuses_search_params_and_updates():
+    data = _monthly()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        incremental = IncrementalForecast('ARIMA', horizon=3, orders=[(1, 1, 0), (0, 1, 1)]).fit(data.iloc[:-1])
+        # El estado restaurado con los parámetros de la búsqueda reproduce su proyección
+        assert np.allclose(np.maximum(incremental._holdout_results.forecast(steps=3), 0), incremental.result()[0])
+        incremental.update(data)
+    assert (incremental.last_action, incremental.n_searches, incremental.n_updates) == ('append', 1, 1)
+    assert len(incremental.result()[0]) == 3
+
+def test_shock_forces_a_new_search():
+    data = _monthly()
+    shocked = data.copy()
+    shocked.iloc[-1, 0] *= 3
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        incremental = IncrementalForecast('ARIMA', horizon=3, orders=[(1, 1, 0), (0, 1, 1)]).fit(data.iloc[:-1])
+        incremental.update(shocked)
+    assert (incremental.last_action, incremental.n_searches, incremental.n_updates) == ('search', 2, 0)
@@ -0,0 +1,56 @@
+# test_indicators.py
+import json
+import threading
+import time
+import indicators
+from indicators import IndicatorProvider, set_provider, source_from_env
+
+def test_get_never_waits_for_the_source():
+    release = threading.Event()
+
+    def slow_source():
+        release.wait(5)
+        return {'uf': 37000.0}
+
+    provider = IndicatorProvider(slow_source)
+    start = time.perf_counter()
+    assert provider.get('uf') is None
+    assert provider.get('uf') is None  # La actualización en curso no se repite
+    assert time.perf_counter() - start < 0.5
+    release.set()
+    for _ in range(100):
+        if provider.get('uf') is not None:
+            break
+        time.sleep(0.01)
+    assert provider.get('uf') == 37000.0
+
+def test_keeps_the_last_value_when_the_source_fails():
+    answers = [{'uf': 37000.0}, RuntimeError('sin conexión')]
+
+    def source():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    provider = IndicatorProvider(source)
+    assert provider.refresh()
+    provider.updated_at -= 2 * provider.ttl  # El valor ya venció
+    thread = provider.refresh_in_background()
+    thread.join(5)
+    assert isinstance(provider.last_error, RuntimeError)
+    assert provider.get('uf') == 37000.0
+    # Tras una falla no se reintenta de inmediato en cada rerun
+    assert provider.refresh_in_background() is None
+
+def test_local_file_source(tmp_path, monkeypatch):
+    path = tmp_path / 'indicadores.json'
+    path.write_text(json.dumps({'version': '1.7.0', 'uf': {'codigo': 'uf', 'valor': 37123.45}}), encoding='utf-8')
+    monkeypatch.setenv(indicators.SOURCE_ENV_VAR, str(path))
+    provider = IndicatorProvider(source_from_env())
+    assert provider.refresh() and provider.values == {'uf': 37123.45}
+
+    from side_panels import get_current_uf
+    monkeypatch.setattr(indicators, '_provider', None)
+    set_provider(provider)
+    assert get_current_uf() == 37123.45
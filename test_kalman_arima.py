@@ -0,0 +1,42 @@
+# test_kalman_arima.py
+import warnings
+import numpy as np
+import pytest
+from arima_model import arima_grid, arima_forecast
+from kalman_arima import fit_arima_batch, validate_against_statsmodels
+from sarima_model import sarima_forecast
+
+def _random_walks(count=4, n_months=45, seed=0):
+    rng = np.random.default_rng(seed)
+    return [500 + np.cumsum(rng.normal(0, 10, n_months)) for _ in range(count)]
+
+def test_matches_statsmodels_on_grid():
+    # 4 caminatas aleatorias x arima_grid(): coincide con statsmodels salvo donde encuentra
+    # un máximo más alto, que se informa aparte y no cuenta como acuerdo
+    checks = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for series, values in enumerate(_random_walks()):
+            for order in arima_grid():
+                checks[series, order] = validate_against_statsmodels(values, order)
+    higher = {key: check for key, check in checks.items() if check['higher_llf']}
+    failures = {key: check for key, check in checks.items() if not check['ok'] and key not in higher}
+    assert not failures
+    assert len(higher) <= len(checks) // 10
+    assert all(check['llf_difference'] > 0 and check['llf'] > check['llf_statsmodels'] for check in higher.values())
+
+def test_batch_rows_match_single_fits():
+    values = _random_walks(count=2)
+    orders = [(1, 1, 2), (2, 0, 1)]
+    batch = fit_arima_batch(np.vstack(values), orders, steps=3)
+    for row, (series, order) in enumerate(zip(values, orders)):
+        single = fit_arima_batch(series[np.newaxis], [order], steps=3)
+        assert np.isclose(batch['llf'][row], single['llf'][0], rtol=1e-8)
+        assert np.allclose(batch['forecast'][row], single['forecast'][0], rtol=1e-6)
+
+def test_sarima_has_no_kalman_backend():
+    frame = np.zeros(1)
+    with pytest.raises(ValueError, match='kalman'):
+        sarima_forecast(frame, 3, backend='kalman')
+    with pytest.raises(ValueError):
+        arima_forecast(frame, 3, backend='otro')
@@ -0,0 +1,35 @@
+# test_linear_projection.py
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from linear_projection import batch_linear_forecast, linear_forecast
+from smoothing import exponential_smoothing
+
+def _series(count=5, n_months=24, seed=0):
+    rng = np.random.default_rng(seed)
+    trend = rng.uniform(-5, 5, (count, 1)) * np.arange(n_months)
+    return np.maximum(300 + trend + rng.normal(0, 15, (count, n_months)), 0)
+
+def test_batch_matches_linear_regression():
+    values = _series()
+    values[0] = np.linspace(200, 5, values.shape[1])  # Tendencia que se proyecta bajo cero
+    index = pd.date_range('2020-01-01', periods=values.shape[1], freq='MS')
+    for horizon in (1, 3, 6):
+        batch = batch_linear_forecast(values, horizon)
+        for row, series in enumerate(values):
+            forecast, _, mape = linear_forecast(pd.DataFrame({'CANTIDAD': series}, index=index), horizon)
+            np.testing.assert_allclose(batch['forecast'][row], forecast, rtol=1e-9, atol=1e-9)
+            assert np.isclose(batch['mape'][row], mape, rtol=1e-9)
+
+def test_intervals_match_ols_prediction_intervals():
+    values = _series(count=2)
+    horizon = 3
+    batch = batch_linear_forecast(values, horizon, interval=0.9)
+    n_train = values.shape[1] - horizon
+    x = np.arange(n_train + horizon, dtype=float)
+    for row, series in enumerate(values):
+        smoothed = exponential_smoothing(series, [batch['alpha'][row]])[0]
+        model = sm.OLS(smoothed[:n_train], sm.add_constant(x[:n_train])).fit()
+        frame = model.get_prediction(sm.add_constant(x[n_train:])).summary_frame(alpha=0.1)
+        np.testing.assert_allclose(batch['lower'][row], np.maximum(frame['obs_ci_lower'], 0), rtol=1e-9)
+        np.testing.assert_allclose(batch['upper'][row], np.maximum(frame['obs_ci_upper'], 0), rtol=1e-9)
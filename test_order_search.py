@@ -0,0 +1,29 @@
+# test_order_search.py
+from order_search import compare_with_exhaustive
+
+CANDIDATES = [(1, 0, 0), (2, 0, 0), (1, 1, 1)]
+
+def test_compare_when_exhaustive_finds_nothing():
+    calls = []
+
+    def evaluate(subset, maxiter=None, warm_start=False):
+        # Los ajustes de la búsqueda exhaustiva (la primera llamada) fallan todos, p. ej. por fit_timeout
+        calls.append(subset)
+        if len(calls) == 1:
+            return [None] * len(subset)
+        return [{'mape': 0.1 * (i + 1), 'aic': float(i)} for i in range(len(subset))]
+
+    comparison = compare_with_exhaustive(CANDIDATES, evaluate, 'aic_topk', top_k=2)
+    assert comparison['mape_exhaustive'] == float('inf')
+    assert comparison['mape'] == 0.1
+    assert comparison['same_candidate'] is False
+
+def test_fit_reduction_counts_proxy_fits():
+    def evaluate(subset, maxiter=None, warm_start=False):
+        return [{'mape': 0.1 * (i + 1), 'aic': float(i)} for i in range(len(subset))]
+
+    comparison = compare_with_exhaustive(CANDIDATES, evaluate, 'aic_topk', top_k=2)
+    # Exhaustiva: 3 ajustes; aic_topk: 3 ajustes baratos + 2 completos
+    assert (comparison['n_fits'], comparison['n_proxy_fits'], comparison['n_fits_exhaustive']) == (2, 3, 3)
+    assert comparison['fit_reduction'] == 3 / 5
+    assert comparison['full_fit_reduction'] == 3 / 2
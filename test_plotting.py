@@ -0,0 +1,56 @@
+# test_plotting.py
+import numpy as np
+import pandas as pd
+import pytest
+import plotly.graph_objects as go
+from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
+import sarima_model
+from data_preprocessor import MonthlySeries
+from plotting import plot_forecast, smoothed_history
+from smoothing import find_best_alpha, smooth_series
+
+def _series(n_months=24, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n_months, freq='MS')
+    return MonthlySeries(index, 500 + np.cumsum(rng.normal(0, 10, n_months)), 'PRIVADO')
+
+def _result(series, horizon=3):
+    dates = pd.date_range(series.index[-1] + pd.DateOffset(months=1), periods=horizon, freq='MS')
+    return {'forecast': np.full(horizon, 510.0), 'forecast_dates': dates}
+
+def test_compute_path_neither_prints_nor_plots(monkeypatch, capsys):
+    series = _series()
+    stub = lambda data, horizon, *args, **kwargs: (*_result(series, horizon).values(), (1, 1, 1), (0, 1, 1, 3), 0.1, [0.5])
+    monkeypatch.setattr(sarima_model, 'sarima_forecast', stub)
+    figures = plt.get_fignums()
+    result = sarima_model.run_sarima_projection(series, 3)
+    assert result['order'] == (1, 1, 1) and result.params.tolist() == [0.5]
+    assert capsys.readouterr().out == ''
+    assert plt.get_fignums() == figures
+
+def test_plot_forecast_backends():
+    series = _series()
+    results = {'ARIMA': _result(series), 'Linear Projection': _result(series)}
+    fig = plot_forecast(series, results)
+    assert isinstance(fig, go.Figure) and len(fig.data) == 3
+    assert list(fig.data[1].y) == [510.0] * 3
+
+    figures = plt.get_fignums()
+    fig = plot_forecast(series, {'SARIMA': _result(series)}, backend='matplotlib')
+    assert isinstance(fig, Figure) and len(fig.axes[0].lines) == 2
+    assert 'SARIMA' in fig.axes[0].get_title()
+    assert plt.get_fignums() == figures  # Sin pyplot: no se registra ni abre ninguna ventana
+    with pytest.raises(ValueError, match='Backend'):
+        plot_forecast(series, results, backend='bokeh')
+
+def test_smoothed_history_uses_the_models_alpha_grid():
+    series = _series(seed=2)
+    frame = series.frame()
+    for model, alphas in (('SARIMA', sarima_model.ALPHAS), (None, None)):
+        expected = smooth_series(frame['CANTIDAD'], find_best_alpha(frame, alphas=alphas))
+        history = smoothed_history(series, model)
+        np.testing.assert_array_equal(history['CANTIDAD_SUAVIZADA'], expected)
+        np.testing.assert_array_equal(history['CANTIDAD'], frame['CANTIDAD'])
+    # Las dos grillas eligen alphas distintos en esta serie
+    assert find_best_alpha(frame, alphas=sarima_model.ALPHAS) != find_best_alpha(frame)
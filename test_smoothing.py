@@ -0,0 +1,31 @@
+# test_smoothing.py
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+from smoothing import DEFAULT_ALPHAS, batch_smoothing, exponential_smoothing, find_best_alpha, smooth_series
+
+def _series(count=6, n_months=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return 500 + np.cumsum(rng.normal(0, 20, (count, n_months)), axis=1)
+
+def test_matches_statsmodels_fitted_values():
+    values = _series(count=1)[0]
+    fitted = exponential_smoothing(values, DEFAULT_ALPHAS)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for row, alpha in enumerate(DEFAULT_ALPHAS):
+            expected = SimpleExpSmoothing(values, initialization_method='known', initial_level=values[0]).fit(
+                smoothing_level=alpha, optimized=False).fittedvalues
+            assert np.allclose(fitted[row], expected, rtol=1e-10)
+
+def test_batch_matches_per_series_loop():
+    values = _series()
+    values[2, 5] = 0.0  # Un mes sin movimientos (MAPE con denominador eps)
+    for alphas in (None, np.linspace(0.01, 1.0, 1000)):
+        best_alphas, smoothed = batch_smoothing(values, alphas)
+        for row, series in enumerate(values):
+            frame = pd.DataFrame({'CANTIDAD': series})
+            alpha = find_best_alpha(frame, alphas=alphas)
+            assert best_alphas[row] == alpha
+            np.testing.assert_allclose(smoothed[row], smooth_series(frame['CANTIDAD'], alpha), rtol=1e-12)
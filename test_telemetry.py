@@ -0,0 +1,40 @@
+# test_telemetry.py
+import threading
+import telemetry
+
+def _run_session(name, started, release, reports):
+    # Cada hilo simula una sesión de Streamlit con su propio collect()
+    with telemetry.collect() as report:
+        started.wait()
+        for i in range(50):
+            with telemetry.span('stage', name):
+                telemetry.record_fit(name, (i, 0, 0), 0.0, mape=0.1)
+        release.wait()
+    reports[name] = report
+
+def test_concurrent_collects_stay_separate():
+    started = threading.Barrier(2)
+    release = threading.Barrier(2)
+    reports = {}
+    threads = [threading.Thread(target=_run_session, args=(name, started, release, reports)) for name in ('A', 'B')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name in ('A', 'B'):
+        report = reports[name]
+        assert len(report.fits) == 50
+        assert len(report.spans) == 50
+        assert {fit['model'] for fit in report.fits} == {name}
+        assert {span['model'] for span in report.spans} == {name}
+    assert not telemetry.enabled()
+
+def test_nested_collect_receives_inner_records():
+    with telemetry.collect() as outer:
+        with telemetry.collect() as inner:
+            telemetry.record_fit('ARIMA', (1, 1, 1), 0.0)
+        telemetry.record_fit('ARIMA', (2, 1, 1), 0.0)
+    assert len(inner.fits) == 1
+    assert len(outer.fits) == 2
+    assert not telemetry.enabled()